@@ -1 +1,5 @@
 # Cash Up FastAPI application package
+import time
+
+# Start of the import phase in the startup breakdown.
+BOOT_STARTED = time.perf_counter()
@@ -0,0 +1,343 @@
+"""Deferred YOLO analysis of uploaded photos.
+
+The upload commits the photo with ``analysis_status = ANALYZING`` and an
+``analysis_jobs`` row in the same transaction, then returns without waiting
+for the model. A background worker claims due jobs, runs them through the
+inference batcher and writes ``has_trash`` / ``trash_count`` /
+``max_trash_confidence`` / ``detections``.
+
+Jobs live in SQLite, so they survive restarts. A claim pushes the job's
+``available_at`` one lease into the future instead of deleting it; if the
+process dies mid-batch, the job becomes due again when the lease runs out and
+any worker (in any process) picks it up. Failed attempts are retried with
+exponential backoff; after ``ANALYSIS_MAX_ATTEMPTS`` the photo is marked
+``FAILED``, which is what a failed synchronous analysis used to store.
+
+An instance whose model cannot load claims nothing, so jobs wait for one that
+can. A batch that hit the model failing mid-way hands its jobs back without
+using up an attempt. ``requeue_failed`` (the admin requeue endpoint) puts
+``FAILED`` photos back in the queue with a fresh attempt budget.
+
+Analysis never gated points, so a photo can be activated by a bin scan while
+it is still ``ANALYZING``. Completion only writes the analysis columns, never
+``status``, so a photo activated mid-analysis stays ACTIVE.
+"""
+import asyncio
+import io
+import logging
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import anyio
+from PIL import Image
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from .db import commit_with_retry, get_db, now
+from .detections import encode_detections
+from .imaging import MODEL_INPUT_EDGE, open_normalized, scale_detections
+from .inference import INFERENCE_MAX_BATCH_SIZE
+from .models import AnalysisJob, TrashPhoto
+from .yolo_utils import image_to_array
+
+ANALYSIS_ANALYZING = "ANALYZING"
+ANALYSIS_DONE = "DONE"
+ANALYSIS_FAILED = "FAILED"
+
+ANALYSIS_BATCH_SIZE = int(os.getenv("ANALYSIS_BATCH_SIZE", str(INFERENCE_MAX_BATCH_SIZE)))
+ANALYSIS_MAX_ATTEMPTS = int(os.getenv("ANALYSIS_MAX_ATTEMPTS", "5"))
+ANALYSIS_RETRY_BASE_SECONDS = float(os.getenv("ANALYSIS_RETRY_BASE_SECONDS", "5"))
+# Longer than a batch can take; a claimed job is invisible to other workers until then.
+ANALYSIS_LEASE_SECONDS = float(os.getenv("ANALYSIS_LEASE_SECONDS", "120"))
+# Fallback poll for retries and jobs written by other processes; local uploads wake the worker.
+ANALYSIS_POLL_SECONDS = float(os.getenv("ANALYSIS_POLL_SECONDS", "2"))
+
+logger = logging.getLogger("cashup.analysis")
+
+Analyzer = Callable[[Any], Awaitable[Dict[str, Any]]]
+
+
+@dataclass
+class ClaimedJob:
+    photo_id: str
+    attempts: int
+    image_url: Optional[str]
+
+
+@dataclass
+class JobOutcome:
+    job: ClaimedJob
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    # Retrying cannot help (e.g. the stored image is gone).
+    permanent: bool = False
+    # The model is unavailable: hand the job back without counting the attempt.
+    deferred: bool = False
+
+
+def enqueue_analysis(db: Session, photo_id: str) -> None:
+    db.add(AnalysisJob(photo_id=photo_id))
+
+
+def claim_jobs(
+    db: Session, limit: int, moment: datetime, lease_seconds: float = ANALYSIS_LEASE_SECONDS
+) -> List[ClaimedJob]:
+    """Lease up to ``limit`` due jobs in one statement; concurrent claimers never share a job."""
+    due = (
+        select(AnalysisJob.photo_id)
+        .where(AnalysisJob.available_at <= moment)
+        .order_by(AnalysisJob.available_at, AnalysisJob.photo_id)
+        .limit(limit)
+    )
+    claimed = db.execute(
+        update(AnalysisJob)
+        .where(AnalysisJob.photo_id.in_(due))
+        .values(available_at=moment + timedelta(seconds=lease_seconds), attempts=AnalysisJob.attempts + 1)
+        .returning(AnalysisJob.photo_id, AnalysisJob.attempts)
+        .execution_options(synchronize_session=False)
+    ).all()
+    if not claimed:
+        return []
+    ids = [row.photo_id for row in claimed]
+    urls = dict(db.execute(select(TrashPhoto.id, TrashPhoto.image_url).where(TrashPhoto.id.in_(ids))).all())
+    return [ClaimedJob(photo_id, attempts, urls.get(photo_id)) for photo_id, attempts in claimed]
+
+
+def load_analysis_input(path: Path) -> Tuple[Any, float]:
+    """The model-input array for a stored image and the stored-pixels-per-input-pixel scale."""
+    data = path.read_bytes()
+    with Image.open(io.BytesIO(data)) as src:
+        stored_width = src.width
+    model_input = open_normalized(data, MODEL_INPUT_EDGE)
+    return image_to_array(model_input), stored_width / model_input.width
+
+
+def complete_job(db: Session, photo_id: str, result: Dict[str, Any]) -> None:
+    db.execute(
+        update(TrashPhoto)
+        # Only the first completion counts if an expired lease let two workers run the job.
+        .where(TrashPhoto.id == photo_id, TrashPhoto.analysis_status == ANALYSIS_ANALYZING)
+        .values(
+            analysis_status=ANALYSIS_DONE,
+            has_trash=result.get("has_trash"),
+            trash_count=result.get("trash_count"),
+            max_trash_confidence=result.get("max_trash_confidence"),
+            detections=encode_detections(result.get("raw_detections")),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(delete(AnalysisJob).where(AnalysisJob.photo_id == photo_id))
+
+
+def fail_job(db: Session, photo_id: str) -> None:
+    db.execute(
+        update(TrashPhoto)
+        .where(TrashPhoto.id == photo_id, TrashPhoto.analysis_status == ANALYSIS_ANALYZING)
+        .values(analysis_status=ANALYSIS_FAILED)
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(delete(AnalysisJob).where(AnalysisJob.photo_id == photo_id))
+
+
+def retry_job(db: Session, job: ClaimedJob, error: str, moment: datetime) -> None:
+    delay = ANALYSIS_RETRY_BASE_SECONDS * 2 ** (job.attempts - 1)
+    db.execute(
+        update(AnalysisJob)
+        .where(AnalysisJob.photo_id == job.photo_id)
+        .values(available_at=moment + timedelta(seconds=delay), last_error=error[:500])
+        .execution_options(synchronize_session=False)
+    )
+
+
+def defer_job(db: Session, job: ClaimedJob, error: str, moment: datetime) -> None:
+    db.execute(
+        update(AnalysisJob)
+        .where(AnalysisJob.photo_id == job.photo_id)
+        .values(
+            available_at=moment + timedelta(seconds=ANALYSIS_RETRY_BASE_SECONDS),
+            attempts=AnalysisJob.attempts - 1,
+            last_error=error[:500],
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def requeue_failed(db: Session, moment: datetime, festival_id: Optional[str] = None) -> int:
+    """Put ``FAILED`` photos back to ``ANALYZING`` with a new job; returns how many."""
+    requeue = update(TrashPhoto).where(TrashPhoto.analysis_status == ANALYSIS_FAILED)
+    if festival_id is not None:
+        requeue = requeue.where(TrashPhoto.festival_id == festival_id)
+    photo_ids = (
+        db.execute(
+            requeue.values(analysis_status=ANALYSIS_ANALYZING)
+            .returning(TrashPhoto.id)
+            .execution_options(synchronize_session=False)
+        )
+        .scalars()
+        .all()
+    )
+    if photo_ids:
+        db.execute(
+            sqlite_insert(AnalysisJob).on_conflict_do_nothing(index_elements=["photo_id"]),
+            [
+                {"photo_id": photo_id, "attempts": 0, "available_at": moment, "created_at": moment}
+                for photo_id in photo_ids
+            ],
+        )
+    return len(photo_ids)
+
+
+class AnalysisWorker:
+    def __init__(
+        self,
+        analyze: Analyzer,
+        upload_dir: Path,
+        batch_size: int = ANALYSIS_BATCH_SIZE,
+        max_attempts: int = ANALYSIS_MAX_ATTEMPTS,
+        poll_seconds: float = ANALYSIS_POLL_SECONDS,
+        clock: Callable[[], datetime] = now,
+        model_available: Callable[[], bool] = lambda: True,
+    ):
+        self.analyze = analyze
+        self.upload_dir = upload_dir
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.poll_seconds = poll_seconds
+        self.clock = clock
+        self.model_available = model_available
+        self.completed = 0
+        self.retried = 0
+        self.failed = 0
+        self.deferred = 0
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        self._loop = None
+
+    def notify(self) -> None:
+        """Wake the worker after an upload commits; safe to call from any thread."""
+        loop, wake = self._loop, self._wake
+        if loop is not None and wake is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(wake.set)
+
+    async def run_once(self) -> int:
+        """Claim and process one batch of due jobs. Returns the number claimed."""
+        if not self.model_available():
+            # Leave the jobs to an instance that can run them (or to this one after a fix and restart).
+            return 0
+        jobs = await anyio.to_thread.run_sync(self._claim)
+        if jobs:
+            outcomes = await asyncio.gather(*(self._process(job) for job in jobs))
+            await anyio.to_thread.run_sync(self._record, outcomes)
+        return len(jobs)
+
+    def _claim(self) -> List[ClaimedJob]:
+        with get_db() as db:
+            return commit_with_retry(db, lambda: claim_jobs(db, self.batch_size, self.clock()))
+
+    async def _process(self, job: ClaimedJob) -> JobOutcome:
+        if job.image_url is None:
+            return JobOutcome(job, error="photo not found", permanent=True)
+        if job.attempts > self.max_attempts:
+            # Claimed again after a crash on the last attempt.
+            return JobOutcome(job, error="too many attempts", permanent=True)
+        try:
+            image, scale = await anyio.to_thread.run_sync(
+                load_analysis_input, self.upload_dir / Path(job.image_url).name
+            )
+        except Exception as exc:
+            return JobOutcome(job, error=f"{type(exc).__name__}: {exc}", permanent=isinstance(exc, OSError))
+        result = await self.analyze(image)
+        # The batcher reports model errors and a full queue as an empty result.
+        if not isinstance(result, dict) or result.get("has_trash") is None:
+            if not self.model_available():
+                return JobOutcome(job, error="model unavailable", deferred=True)
+            return JobOutcome(job, error="inference returned no result")
+        return JobOutcome(job, result=scale_detections(result, scale))
+
+    def _record(self, outcomes: List[JobOutcome]) -> None:
+        moment = self.clock()
+        done: List[JobOutcome] = []
+        failed: List[JobOutcome] = []
+        retry: List[JobOutcome] = []
+        deferred: List[JobOutcome] = []
+        for outcome in outcomes:
+            if outcome.result is not None:
+                done.append(outcome)
+            elif outcome.deferred:
+                deferred.append(outcome)
+            elif outcome.permanent or outcome.job.attempts >= self.max_attempts:
+                failed.append(outcome)
+            else:
+                retry.append(outcome)
+
+        def write(db: Session) -> None:
+            for outcome in done:
+                complete_job(db, outcome.job.photo_id, outcome.result)
+            for outcome in failed:
+                fail_job(db, outcome.job.photo_id)
+            for outcome in retry:
+                retry_job(db, outcome.job, outcome.error or "", moment)
+            for outcome in deferred:
+                defer_job(db, outcome.job, outcome.error or "", moment)
+
+        with get_db() as db:
+            commit_with_retry(db, lambda: write(db))
+        self.completed += len(done)
+        self.failed += len(failed)
+        self.retried += len(retry)
+        self.deferred += len(deferred)
+        for outcome in failed:
+            logger.warning("analysis of photo %s failed for good: %s", outcome.job.photo_id, outcome.error)
+
+    async def _run(self) -> None:
+        while True:
+            self._wake.clear()
+            try:
+                claimed = await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("analysis batch failed")
+                claimed = 0
+            if claimed >= self.batch_size:
+                # A full batch: more jobs are probably due.
+                continue
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "modelAvailable": self.model_available(),
+            "completed": self.completed,
+            "retried": self.retried,
+            "failed": self.failed,
+            "deferred": self.deferred,
+        }
@@ -0,0 +1,176 @@
+"""Bulk trash-bin provisioning.
+
+Bin numbers come from a per-festival counter (``festivals.bin_sequence``):
+one ``UPDATE ... RETURNING`` reserves a whole block, so two admins
+provisioning at once get disjoint codes, and the ``(festival_id, code)``
+unique constraint backs it up. Each batch is written with a single
+executemany insert instead of one ORM object, flush and refresh per bin.
+"""
+import csv
+import io
+import math
+import os
+import re
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Sequence
+
+from sqlalchemy import func, insert, select, tuple_, update
+from sqlalchemy.orm import Session
+
+from .config_cache import BinSnapshot
+from .db import generate_id, get_read_db, now
+from .models import Festival, TrashBin
+
+BIN_CODE_PREFIX = "TRASH_BIN_"
+# Largest batch accepted by generate/import in one request.
+BIN_BATCH_MAX_SIZE = int(os.getenv("BIN_BATCH_MAX_SIZE", "5000"))
+BIN_IMPORT_MAX_BYTES = 2 * 1024 * 1024
+BIN_EXPORT_PAGE_SIZE = 200
+
+CSV_COLUMNS = {
+    "name": "name",
+    "이름": "name",
+    "description": "description",
+    "설명": "description",
+    "latitude": "latitude",
+    "lat": "latitude",
+    "위도": "latitude",
+    "longitude": "longitude",
+    "lng": "longitude",
+    "lon": "longitude",
+    "경도": "longitude",
+}
+
+
+@dataclass(frozen=True)
+class BinSpec:
+    name: Optional[str] = None
+    description: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+
+
+def format_bin_code(seq: int) -> str:
+    return f"{BIN_CODE_PREFIX}{seq:02d}"
+
+
+def bin_code_number(code: str) -> Optional[int]:
+    match = re.fullmatch(rf"{BIN_CODE_PREFIX}(\d+)", code or "")
+    return int(match.group(1)) if match else None
+
+
+def allocate_bin_numbers(db: Session, festival_id: str, count: int) -> Optional[int]:
+    """Reserve ``count`` consecutive bin numbers and return the first (None if no festival)."""
+    end = db.execute(
+        update(Festival)
+        .where(Festival.id == festival_id)
+        .values(bin_sequence=Festival.bin_sequence + count)
+        .returning(Festival.bin_sequence)
+        .execution_options(synchronize_session=False)
+    ).scalar_one_or_none()
+    return None if end is None else end - count + 1
+
+
+def create_bins(db: Session, festival_id: str, specs: Sequence[BinSpec]) -> List[BinSnapshot]:
+    first = allocate_bin_numbers(db, festival_id, len(specs))
+    if first is None:
+        raise LookupError(festival_id)
+    created_at = now()
+    rows = []
+    for offset, spec in enumerate(specs):
+        seq = first + offset
+        rows.append(
+            {
+                "id": generate_id(),
+                "festival_id": festival_id,
+                "code": format_bin_code(seq),
+                "name": spec.name or f"공식 수거함 #{seq}",
+                "description": spec.description,
+                "latitude": spec.latitude,
+                "longitude": spec.longitude,
+                "created_at": created_at,
+            }
+        )
+    db.execute(insert(TrashBin), rows)
+    return [
+        BinSnapshot(
+            id=row["id"],
+            festival_id=festival_id,
+            code=row["code"],
+            name=row["name"],
+            description=row["description"],
+            latitude=row["latitude"],
+            longitude=row["longitude"],
+        )
+        for row in rows
+    ]
+
+
+def _coordinate(value: str, low: float, high: float) -> Optional[float]:
+    if not value:
+        return None
+    parsed = float(value)
+    if not math.isfinite(parsed) or not low <= parsed <= high:
+        raise ValueError(value)
+    return parsed
+
+
+def parse_bins_csv(data: bytes) -> List[BinSpec]:
+    """Parse a header-row CSV of bins (name, description, latitude, longitude).
+
+    Korean headers and lat/lng aliases are accepted. Raises ValueError with a
+    message for the admin, naming the offending line.
+    """
+    try:
+        text = data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise ValueError("CSV는 UTF-8로 저장해 주세요.")
+    reader = csv.reader(io.StringIO(text))
+    header = next(reader, None)
+    if not header:
+        raise ValueError("CSV가 비어 있습니다.")
+    columns = [CSV_COLUMNS.get(h.strip().lower()) for h in header]
+    if "name" not in columns:
+        raise ValueError("CSV 첫 줄에 name 열이 필요합니다.")
+
+    specs = []
+    for row in reader:
+        if not any(cell.strip() for cell in row):
+            continue
+        fields = {col: cell.strip() for col, cell in zip(columns, row) if col}
+        line = reader.line_num
+        if not fields.get("name"):
+            raise ValueError(f"CSV {line}행: name이 비어 있습니다.")
+        try:
+            latitude = _coordinate(fields.get("latitude", ""), -90, 90)
+            longitude = _coordinate(fields.get("longitude", ""), -180, 180)
+        except ValueError:
+            raise ValueError(f"CSV {line}행: 위도/경도 값이 올바르지 않습니다.")
+        if (latitude is None) != (longitude is None):
+            raise ValueError(f"CSV {line}행: 위도와 경도를 함께 입력해 주세요.")
+        specs.append(BinSpec(fields["name"], fields.get("description") or None, latitude, longitude))
+        if len(specs) > BIN_BATCH_MAX_SIZE:
+            raise ValueError(f"한 번에 최대 {BIN_BATCH_MAX_SIZE}개까지 등록할 수 있습니다.")
+    if not specs:
+        raise ValueError("CSV에 등록할 수거함이 없습니다.")
+    return specs
+
+
+def iter_bin_codes(festival_id: str, page_size: int = BIN_EXPORT_PAGE_SIZE) -> Iterator[str]:
+    """Yield the festival's bin codes in number order, one short read per page.
+
+    Ordered by (length, code) so TRASH_BIN_100 follows TRASH_BIN_99.
+    """
+    code_length = func.length(TrashBin.code)
+    after = None
+    while True:
+        stmt = select(code_length, TrashBin.code).where(TrashBin.festival_id == festival_id)
+        if after is not None:
+            stmt = stmt.where(tuple_(code_length, TrashBin.code) > tuple_(*after))
+        with get_read_db() as db:
+            rows = db.execute(stmt.order_by(code_length, TrashBin.code).limit(page_size)).all()
+        for _, code in rows:
+            yield code
+        if len(rows) < page_size:
+            return
+        after = tuple(rows[-1])
@@ -0,0 +1,68 @@
+"""Materialized per-festival budget counters.
+
+``festival_budgets.used`` mirrors ``SUM(trash_photos.points) + SUM(coupons.amount)``
+and is updated in the same transaction as every photo or coupon insert, so
+budget checks read or update one row instead of aggregating history.
+"""
+from typing import Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from .db import now
+from .models import Coupon, Festival, FestivalBudget, TrashPhoto
+
+
+def compute_budget_usage(db: Session, festival_id: str) -> int:
+    """Aggregate usage from the raw tables. Only used to (re)build the counter."""
+    photo_points = (
+        db.execute(
+            select(func.coalesce(func.sum(TrashPhoto.points), 0)).where(TrashPhoto.festival_id == festival_id)
+        ).scalar_one()
+        or 0
+    )
+    coupon_points = (
+        db.execute(select(func.coalesce(func.sum(Coupon.amount), 0)).where(Coupon.festival_id == festival_id)).scalar_one()
+        or 0
+    )
+    return int(photo_points + coupon_points)
+
+
+def rebuild_budget_counters(db: Session, festival_id: Optional[str] = None, only_missing: bool = False) -> int:
+    """Recompute counters from the raw tables. Returns the number of festivals written."""
+    query = select(Festival.id)
+    if festival_id:
+        query = query.where(Festival.id == festival_id)
+    if only_missing:
+        query = query.where(~select(FestivalBudget.festival_id).where(FestivalBudget.festival_id == Festival.id).exists())
+    festival_ids = db.execute(query).scalars().all()
+    for fid in festival_ids:
+        db.merge(FestivalBudget(festival_id=fid, used=compute_budget_usage(db, fid), updated_at=now()))
+    db.flush()
+    return len(festival_ids)
+
+
+def get_budget_usage(db: Session, festival_id: str) -> int:
+    used = db.execute(
+        select(FestivalBudget.used).where(FestivalBudget.festival_id == festival_id)
+    ).scalar_one_or_none()
+    if used is None:
+        # No counter yet (created on the next reservation); stay read-only here.
+        return compute_budget_usage(db, festival_id)
+    return int(used)
+
+
+def reserve_budget(db: Session, festival_id: str, amount: int) -> bool:
+    """Atomically add ``amount`` to the festival's usage if it still fits under the budget."""
+    festival_budget = select(Festival.budget).where(Festival.id == FestivalBudget.festival_id).scalar_subquery()
+    stmt = (
+        update(FestivalBudget)
+        .where(FestivalBudget.festival_id == festival_id, FestivalBudget.used + amount <= festival_budget)
+        .values(used=FestivalBudget.used + amount, updated_at=now())
+        .execution_options(synchronize_session=False)
+    )
+    if db.execute(stmt).rowcount == 1:
+        return True
+    if rebuild_budget_counters(db, festival_id, only_missing=True):
+        return db.execute(stmt).rowcount == 1
+    return False
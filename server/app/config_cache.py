@@ -0,0 +1,185 @@
+"""In-process cache of festival configuration and trash bins.
+
+Festivals and bins only change through the admin endpoints, yet almost
+every request looks them up. Entries are immutable snapshots with a TTL and
+an LRU size bound; admin writes invalidate them explicitly after commit, and
+the TTL bounds staleness across uvicorn workers. The festival and bin-list
+response bodies, the geofence zones and the bin spatial index are built once
+per entry.
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .geo import BinIndex, FestivalArea, Polygon, build_area, parse_geofence
+from .models import Festival, TrashBin
+
+FESTIVAL_CACHE_TTL_SECONDS = float(os.getenv("FESTIVAL_CACHE_TTL_SECONDS", "60"))
+FESTIVAL_CACHE_MAX_ENTRIES = int(os.getenv("FESTIVAL_CACHE_MAX_ENTRIES", "128"))
+
+
+@dataclass(frozen=True)
+class FestivalSnapshot:
+    id: str
+    name: str
+    budget: int
+    per_user_daily_cap: int
+    per_photo_point: int
+    center_lat: Optional[float]
+    center_lng: Optional[float]
+    radius_meters: Optional[int]
+    geofence: Optional[Tuple[Polygon, ...]] = None
+    # None when the festival has no geofence, so the common check is a single test.
+    area: Optional[FestivalArea] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        area = build_area(self.center_lat, self.center_lng, self.radius_meters, self.geofence)
+        object.__setattr__(self, "area", area if area.restricted else None)
+
+    @classmethod
+    def from_model(cls, festival: Festival) -> "FestivalSnapshot":
+        return cls(
+            id=festival.id,
+            name=festival.name,
+            budget=festival.budget,
+            per_user_daily_cap=festival.per_user_daily_cap,
+            per_photo_point=festival.per_photo_point,
+            center_lat=festival.center_lat,
+            center_lng=festival.center_lng,
+            radius_meters=festival.radius_meters,
+            geofence=parse_geofence(festival.geofence),
+        )
+
+
+@dataclass(frozen=True)
+class BinSnapshot:
+    id: str
+    festival_id: str
+    code: str
+    name: str
+    description: Optional[str]
+    latitude: Optional[float]
+    longitude: Optional[float]
+
+    @classmethod
+    def from_model(cls, bin_obj: TrashBin) -> "BinSnapshot":
+        return cls(
+            id=bin_obj.id,
+            festival_id=bin_obj.festival_id,
+            code=bin_obj.code,
+            name=bin_obj.name,
+            description=bin_obj.description,
+            latitude=bin_obj.latitude,
+            longitude=bin_obj.longitude,
+        )
+
+
+def render_json(content: Any) -> bytes:
+    """Same encoding as FastAPI's JSONResponse."""
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+@dataclass(frozen=True)
+class FestivalEntry:
+    festival: FestivalSnapshot
+    bins: Tuple[BinSnapshot, ...]
+    bins_by_code: Dict[str, BinSnapshot]
+    bins_by_id: Dict[str, BinSnapshot]
+    bin_index: BinIndex[BinSnapshot]
+    festival_body: bytes
+    bins_body: bytes
+
+
+class FestivalConfigCache:
+    def __init__(self, ttl_seconds: float = FESTIVAL_CACHE_TTL_SECONDS, max_entries: int = FESTIVAL_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[str, Tuple[float, FestivalEntry]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self, db: Session, festival_id: str) -> Optional[FestivalEntry]:
+        # Imported lazily: the serializers live next to the endpoints.
+        from .main import serialize_bin, serialize_festival
+
+        festival = db.get(Festival, festival_id)
+        if festival is None:
+            return None
+        bins = tuple(
+            BinSnapshot.from_model(b)
+            for b in db.execute(
+                select(TrashBin).where(TrashBin.festival_id == festival_id).order_by(TrashBin.code.asc())
+            ).scalars()
+        )
+        snapshot = FestivalSnapshot.from_model(festival)
+        serialized_bins = [serialize_bin(b) for b in bins]
+        return FestivalEntry(
+            festival=snapshot,
+            bins=bins,
+            bins_by_code={b.code: b for b in bins},
+            bins_by_id={b.id: b for b in bins},
+            bin_index=BinIndex(
+                [(b.latitude, b.longitude, b) for b in bins if b.latitude is not None and b.longitude is not None]
+            ),
+            festival_body=render_json({"festival": serialize_festival(snapshot), "bins": serialized_bins}),
+            bins_body=render_json({"bins": serialized_bins}),
+        )
+
+    def get(self, db: Session, festival_id: Optional[str]) -> Optional[FestivalEntry]:
+        if not festival_id:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            cached = self._entries.get(festival_id)
+            if cached is not None and cached[0] > now:
+                self._entries.move_to_end(festival_id)
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+            generation = self._generation
+
+        entry = self._load(db, festival_id)
+        if entry is None:
+            return None
+        with self._lock:
+            # Skip the store if an invalidation raced with this load.
+            if generation == self._generation:
+                self._entries[festival_id] = (now + self.ttl_seconds, entry)
+                self._entries.move_to_end(festival_id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return entry
+
+    def get_festival(self, db: Session, festival_id: Optional[str]) -> Optional[FestivalSnapshot]:
+        entry = self.get(db, festival_id)
+        return entry.festival if entry is not None else None
+
+    def get_bin(self, db: Session, festival_id: str, code: Optional[str]) -> Optional[BinSnapshot]:
+        entry = self.get(db, festival_id)
+        if entry is None or not code:
+            return None
+        return entry.bins_by_code.get(code)
+
+    def invalidate(self, festival_id: Optional[str] = None) -> None:
+        with self._lock:
+            self._generation += 1
+            if festival_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(festival_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+festival_cache = FestivalConfigCache()
@@ -1,12 +1,17 @@
 import os
+import random
 import secrets
+import time
 from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
+from typing import Callable, TypeVar
 
 from dotenv import load_dotenv
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
 
 load_dotenv()
 
@@ -14,13 +19,63 @@ load_dotenv()
 BASE_DIR = Path(__file__).resolve().parent.parent
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./dev.db")
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {},
-    future=True,
-)
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+IS_SQLITE_MEMORY = IS_SQLITE and make_url(DATABASE_URL).database in (None, "", ":memory:")
+# "production": WAL + tuned pragmas + sized pool; "basic": SQLite defaults.
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "production")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+# Match the default AnyIO threadpool (40 tokens) that runs sync endpoints.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "40"))
+DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", str(DB_POOL_SIZE)))
+DB_BUSY_RETRIES = int(os.getenv("DB_BUSY_RETRIES", "5"))
+
+T = TypeVar("T")
+
+
+def _engine_kwargs(pool_size: int) -> dict:
+    kwargs = {"future": True}
+    if IS_SQLITE:
+        kwargs["connect_args"] = {"check_same_thread": False}
+        if SQLITE_PROFILE == "production" and not IS_SQLITE_MEMORY:
+            kwargs.update(pool_size=pool_size, max_overflow=0, pool_timeout=30, pool_pre_ping=False)
+    return kwargs
+
+
+def _install_sqlite_pragmas(target_engine, read_only: bool = False) -> None:
+    if not IS_SQLITE or SQLITE_PROFILE != "production" or IS_SQLITE_MEMORY:
+        return
+
+    @event.listens_for(target_engine, "connect")
+    def _set_pragmas(dbapi_conn, _record):
+        cursor = dbapi_conn.cursor()
+        try:
+            if not read_only:
+                cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+            cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+            cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+            cursor.execute("PRAGMA temp_store=MEMORY")
+            if read_only:
+                cursor.execute("PRAGMA query_only=ON")
+        finally:
+            cursor.close()
+
+
+engine = create_engine(DATABASE_URL, **_engine_kwargs(DB_POOL_SIZE))
+_install_sqlite_pragmas(engine)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
 
+# GET endpoints read through their own pool; under WAL they never wait on a writer's commit.
+if IS_SQLITE and SQLITE_PROFILE == "production" and not IS_SQLITE_MEMORY:
+    read_engine = create_engine(DATABASE_URL, **_engine_kwargs(DB_READ_POOL_SIZE))
+    _install_sqlite_pragmas(read_engine, read_only=True)
+else:
+    read_engine = engine
+ReadSessionLocal = sessionmaker(bind=read_engine, autoflush=False, autocommit=False, future=True)
+
 Base = declarative_base()
 
 
@@ -35,30 +90,61 @@ def now() -> datetime:
 
 def create_db_and_tables() -> None:
     from . import models  # noqa: F401
+    from .migrations import run_migrations
 
     Base.metadata.create_all(bind=engine)
-    ensure_trash_photo_columns()
-
-
-def ensure_trash_photo_columns() -> None:
-    """SQLite helper to add newly introduced columns when existing DB already exists."""
-    with engine.connect() as conn:
-        existing_cols = {
-            row[1] for row in conn.execute(text("PRAGMA table_info('trash_photos')"))
-        }
-        migrations = []
-        if "has_trash" not in existing_cols:
-            migrations.append("ALTER TABLE trash_photos ADD COLUMN has_trash BOOLEAN")
-        if "trash_count" not in existing_cols:
-            migrations.append("ALTER TABLE trash_photos ADD COLUMN trash_count INTEGER")
-        if "max_trash_confidence" not in existing_cols:
-            migrations.append("ALTER TABLE trash_photos ADD COLUMN max_trash_confidence FLOAT")
-        if "yolo_raw" not in existing_cols:
-            migrations.append("ALTER TABLE trash_photos ADD COLUMN yolo_raw JSON")
-        if migrations:
-            for sql in migrations:
-                conn.execute(text(sql))
-            conn.commit()
+    run_migrations(engine)
+
+
+def after_commit(db: Session, callback: Callable[[], None]) -> None:
+    """Run ``callback`` once the session's current transaction commits (dropped on rollback)."""
+    db.info.setdefault("after_commit", []).append(callback)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _run_after_commit(session: Session) -> None:
+    for callback in session.info.pop("after_commit", []):
+        callback()
+
+
+@event.listens_for(SessionLocal, "after_soft_rollback")
+def _drop_after_commit(session: Session, _previous_transaction) -> None:
+    session.info.pop("after_commit", None)
+
+
+def is_busy_error(exc: BaseException) -> bool:
+    """True for SQLITE_BUSY / SQLITE_LOCKED surfaced through SQLAlchemy."""
+    if not isinstance(exc, OperationalError):
+        return False
+    message = str(exc.orig).lower() if exc.orig is not None else str(exc).lower()
+    return "database is locked" in message or "database is busy" in message or "database table is locked" in message
+
+
+def retry_on_busy(fn: Callable[[], T], retries: int = DB_BUSY_RETRIES) -> T:
+    """Call ``fn`` again with jittered exponential backoff while SQLite reports it is busy."""
+    for attempt in range(retries + 1):
+        try:
+            return fn()
+        except OperationalError as exc:
+            if attempt >= retries or not is_busy_error(exc):
+                raise
+            time.sleep(min(1.0, 0.02 * (2**attempt)) * (0.5 + random.random()))
+    raise AssertionError("unreachable")
+
+
+def commit_with_retry(db: Session, work: Callable[[], T], retries: int = DB_BUSY_RETRIES) -> T:
+    """Run ``work`` and commit; if SQLite is busy, roll back and run the whole unit again."""
+
+    def attempt() -> T:
+        try:
+            result = work()
+            db.commit()
+            return result
+        except OperationalError:
+            db.rollback()
+            raise
+
+    return retry_on_busy(attempt, retries)
 
 
 @contextmanager
@@ -72,3 +158,14 @@ def get_db():
         raise
     finally:
         db.close()
+
+
+@contextmanager
+def get_read_db():
+    """Session for read-only work; nothing is committed."""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.rollback()
+        db.close()
@@ -0,0 +1,208 @@
+"""Bulk festival data exports for settlement and analytics.
+
+``trash_photos``, ``bin_scans``, ``coupons`` and ``user_daily_summaries`` are
+streamed as CSV, NDJSON or Parquet. Rows come from a single read-engine cursor
+with ``yield_per``, so only one batch is in memory at a time and each batch is
+encoded and handed to the response as one chunk. The export holds one read
+transaction for its whole run (a consistent snapshot; in WAL mode this does
+not block writers).
+
+Exports are ordered by ``(created_at, id)`` on a ``(festival_id, created_at,
+id)`` index. Before streaming, the export pins its upper bound to the newest
+matching row and returns that key as an opaque cursor; passing it back as
+``since`` exports only rows after it, so consecutive incremental exports
+neither miss nor repeat rows. Summaries are keyed by their creation time, so
+later changes to a day's totals need a full re-export of that range.
+"""
+import csv
+import importlib.util
+import io
+import json
+import os
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import BigInteger, Boolean, DateTime, Float, Integer, false, select, tuple_
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from .db import get_read_db
+from .detections import decode_detections
+from .models import BinScan, Coupon, TrashPhoto, UserDailySummary
+from .pagination import decode_cursor, encode_cursor
+from .points import KST
+from .streams import StreamSink
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+EXPORT_TABLES = {
+    "trash_photos": TrashPhoto,
+    "bin_scans": BinScan,
+    "coupons": Coupon,
+    "user_daily_summaries": UserDailySummary,
+}
+# Columns stored packed in the database, exported decoded (as JSON in CSV/Parquet).
+EXPORT_DECODERS = {"trash_photos": {"detections": decode_detections}}
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def parquet_available() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def parse_bound(value: str, end: bool = False) -> datetime:
+    """Parse a ``from``/``to`` bound into the naive UTC used by ``created_at``.
+
+    ``YYYY-MM-DD`` is a KST day; as an end bound the whole day is included.
+    Datetimes without an offset are taken as UTC. Raises ValueError.
+    """
+    if len(value) == 10:
+        day = date.fromisoformat(value) + timedelta(days=1 if end else 0)
+        moment = datetime.combine(day, time(), tzinfo=KST)
+    else:
+        moment = datetime.fromisoformat(value)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def prepare_export(
+    db: Session,
+    table: str,
+    festival_id: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    since: Optional[str] = None,
+) -> Tuple[Select, Optional[str]]:
+    """Build the export query and the cursor for the next incremental export.
+
+    ``start`` is inclusive, ``end`` exclusive. Raises ValueError on a bad
+    ``since`` cursor. With no matching rows the cursor is ``since`` unchanged.
+    """
+    model = EXPORT_TABLES[table]
+    key = tuple_(model.created_at, model.id)
+    conditions = [model.festival_id == festival_id]
+    if start is not None:
+        conditions.append(model.created_at >= start)
+    if end is not None:
+        conditions.append(model.created_at < end)
+    if since:
+        conditions.append(key > tuple_(*decode_cursor(since)))
+    newest = db.execute(
+        select(model.created_at, model.id)
+        .where(*conditions)
+        .order_by(model.created_at.desc(), model.id.desc())
+        .limit(1)
+    ).first()
+    # Pin the upper bound so rows written during the export wait for the next one.
+    conditions.append(false() if newest is None else key <= tuple_(*newest))
+    stmt = select(*model.__table__.columns).where(*conditions).order_by(model.created_at, model.id)
+    return stmt, since if newest is None else encode_cursor(*newest)
+
+
+def iter_batches(stmt: Select, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[Sequence]:
+    with get_read_db() as db:
+        result = db.execute(stmt.execution_options(yield_per=batch_size))
+        for batch in result.partitions():
+            yield batch
+
+
+def decode_batches(table: str, batches: Iterable[Sequence]) -> Iterator[Sequence]:
+    decoders = EXPORT_DECODERS.get(table)
+    if not decoders:
+        yield from batches
+        return
+    names = [column.name for column in EXPORT_TABLES[table].__table__.columns]
+    by_index = [(names.index(name), decode) for name, decode in decoders.items()]
+    for batch in batches:
+        rows = [list(row) for row in batch]
+        for row in rows:
+            for index, decode in by_index:
+                row[index] = decode(row[index])
+        yield rows
+
+
+def _text(value):
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def stream_csv(columns: List[str], batches: Iterable[Sequence]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM so spreadsheet apps open Korean shop names and display names as UTF-8.
+    buffer.write("\ufeff")
+    writer.writerow(columns)
+    yield buffer.getvalue().encode("utf-8")
+    for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_text(value) for value in row] for row in batch)
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def stream_ndjson(columns: List[str], batches: Iterable[Sequence]) -> Iterator[bytes]:
+    for batch in batches:
+        lines = [json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=_json_default) for row in batch]
+        yield ("\n".join(lines) + "\n").encode("utf-8") if lines else b""
+
+
+def _arrow_type(pa, column):
+    if isinstance(column.type, Boolean):
+        return pa.bool_()
+    if isinstance(column.type, (Integer, BigInteger)):
+        return pa.int64()
+    if isinstance(column.type, Float):
+        return pa.float64()
+    if isinstance(column.type, DateTime):
+        return pa.timestamp("us")
+    # Strings, and JSON as its text form.
+    return pa.string()
+
+
+def stream_parquet(table: str, batches: Iterable[Sequence]) -> Iterator[bytes]:
+    """One row group per batch; requires the optional ``pyarrow`` package."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    columns = list(EXPORT_TABLES[table].__table__.columns)
+    schema = pa.schema([(column.name, _arrow_type(pa, column)) for column in columns])
+    as_text = [i for i, column in enumerate(columns) if pa.types.is_string(schema.field(i).type)]
+    sink = StreamSink()
+    with pq.ParquetWriter(sink, schema, compression="zstd") as writer:
+        for batch in batches:
+            values = [list(column) for column in zip(*batch)] or [[] for _ in columns]
+            for index in as_text:
+                values[index] = [
+                    v if v is None or isinstance(v, str) else json.dumps(v, ensure_ascii=False) for v in values[index]
+                ]
+            writer.write_batch(pa.record_batch(values, schema=schema))
+            yield sink.drain()
+    yield sink.drain()
+
+
+def export_stream(table: str, fmt: str, stmt: Select) -> Iterator[bytes]:
+    batches = decode_batches(table, iter_batches(stmt))
+    if fmt == "parquet":
+        return stream_parquet(table, batches)
+    columns = [column.name for column in EXPORT_TABLES[table].__table__.columns]
+    if fmt == "ndjson":
+        return stream_ndjson(columns, batches)
+    return stream_csv(columns, batches)
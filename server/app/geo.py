@@ -0,0 +1,256 @@
+"""Festival geofences and the per-festival bin index.
+
+A festival's area is a set of zones: the legacy center/radius circle, or one
+or more polygons (a beach strip, several disjoint sites). Every zone carries a
+precomputed lat/lng bounding box, so most points far outside are rejected with
+four comparisons. Circles then use an equirectangular distance, which at
+festival scale is within centimetres of haversine, and only fall back to
+haversine right at the boundary. Polygons use ray casting on their vertices.
+
+Bins with coordinates are kept in a 2-d tree over a local metric projection,
+so the nearest bin to a point is found in O(log n) for a festival's bins.
+"""
+import math
+from dataclasses import dataclass
+from typing import Any, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+EARTH_RADIUS_METERS = 6371_000
+DEFAULT_RADIUS_METERS = 1500
+
+# |equirectangular - radius| below this many metres is settled with haversine.
+CIRCLE_EXACT_MARGIN_METERS = 1.0
+
+LatLng = Tuple[float, float]
+Polygon = Tuple[LatLng, ...]
+
+_TO_RAD = math.pi / 180
+
+
+def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1 = lat1 * _TO_RAD
+    phi2 = lat2 * _TO_RAD
+    dphi = (lat2 - lat1) * _TO_RAD
+    dlambda = (lon2 - lon1) * _TO_RAD
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    return EARTH_RADIUS_METERS * c
+
+
+@dataclass(frozen=True)
+class LocalProjection:
+    """Equirectangular projection to metres around a reference latitude."""
+
+    origin_lat: float
+    origin_lng: float
+    meters_per_deg_lat: float
+    meters_per_deg_lng: float
+
+    @classmethod
+    def around(cls, lat: float, lng: float) -> "LocalProjection":
+        meters_per_deg = EARTH_RADIUS_METERS * _TO_RAD
+        return cls(lat, lng, meters_per_deg, meters_per_deg * math.cos(lat * _TO_RAD))
+
+    def project(self, lat: float, lng: float) -> Tuple[float, float]:
+        return (lng - self.origin_lng) * self.meters_per_deg_lng, (lat - self.origin_lat) * self.meters_per_deg_lat
+
+
+@dataclass(frozen=True)
+class BoundingBox:
+    min_lat: float
+    min_lng: float
+    max_lat: float
+    max_lng: float
+
+    def contains(self, lat: float, lng: float) -> bool:
+        return self.min_lat <= lat <= self.max_lat and self.min_lng <= lng <= self.max_lng
+
+    @classmethod
+    def union(cls, boxes: Sequence["BoundingBox"]) -> "BoundingBox":
+        return cls(
+            min(b.min_lat for b in boxes),
+            min(b.min_lng for b in boxes),
+            max(b.max_lat for b in boxes),
+            max(b.max_lng for b in boxes),
+        )
+
+
+class CircleZone:
+    def __init__(self, center_lat: float, center_lng: float, radius_meters: float):
+        self.center_lat = center_lat
+        self.center_lng = center_lng
+        self.radius = radius_meters
+        self.projection = LocalProjection.around(center_lat, center_lng)
+        # Pad the box slightly so rounding never rejects a point haversine would accept.
+        pad_lat = radius_meters / self.projection.meters_per_deg_lat * 1.01
+        pad_lng = radius_meters / max(self.projection.meters_per_deg_lng, 1e-9) * 1.01
+        self.bbox = BoundingBox(center_lat - pad_lat, center_lng - pad_lng, center_lat + pad_lat, center_lng + pad_lng)
+        self._exact_margin = CIRCLE_EXACT_MARGIN_METERS + radius_meters * 1e-3
+
+    def contains(self, lat: float, lng: float) -> bool:
+        box = self.bbox
+        if not (box.min_lat <= lat <= box.max_lat and box.min_lng <= lng <= box.max_lng):
+            return False
+        dy = (lat - self.center_lat) * self.projection.meters_per_deg_lat
+        dx = (lng - self.center_lng) * self.projection.meters_per_deg_lng
+        approx = math.sqrt(dx * dx + dy * dy)
+        if abs(approx - self.radius) > self._exact_margin:
+            return approx <= self.radius
+        return haversine_distance(lat, lng, self.center_lat, self.center_lng) <= self.radius
+
+
+class PolygonZone:
+    def __init__(self, vertices: Polygon):
+        self.vertices = vertices
+        self.bbox = BoundingBox(
+            min(v[0] for v in vertices),
+            min(v[1] for v in vertices),
+            max(v[0] for v in vertices),
+            max(v[1] for v in vertices),
+        )
+        # Edges as (lat1, lng1, lat2, lng2) so the hot loop only unpacks tuples.
+        self._edges = tuple((*vertices[i - 1], *vertices[i]) for i in range(len(vertices)))
+
+    def contains(self, lat: float, lng: float) -> bool:
+        box = self.bbox
+        if not (box.min_lat <= lat <= box.max_lat and box.min_lng <= lng <= box.max_lng):
+            return False
+        inside = False
+        for lat1, lng1, lat2, lng2 in self._edges:
+            if (lat1 > lat) != (lat2 > lat):
+                crossing = lng1 + (lat - lat1) * (lng2 - lng1) / (lat2 - lat1)
+                if lng < crossing:
+                    inside = not inside
+        return inside
+
+
+class FestivalArea:
+    """Union of a festival's zones; a festival without zones is unrestricted."""
+
+    def __init__(self, zones: Sequence[Any] = ()):
+        self.zones = tuple(zones)
+        self.bbox = BoundingBox.union([z.bbox for z in self.zones]) if self.zones else None
+
+    @property
+    def restricted(self) -> bool:
+        return bool(self.zones)
+
+    def contains(self, lat: Optional[float], lng: Optional[float]) -> bool:
+        if not self.zones:
+            return True
+        if lat is None or lng is None:
+            return False
+        if len(self.zones) > 1 and not self.bbox.contains(lat, lng):
+            return False
+        for zone in self.zones:
+            if zone.contains(lat, lng):
+                return True
+        return False
+
+
+def parse_geofence(value: Any) -> Optional[Tuple[Polygon, ...]]:
+    """Validate ``[[[lat, lng], ...], ...]`` (one ring per zone) into tuples.
+
+    Raises ValueError on anything else. An empty or missing value means "no polygons".
+    """
+    if value is None:
+        return None
+    if not isinstance(value, (list, tuple)):
+        raise ValueError("geofence must be a list of polygons")
+    polygons = []
+    for ring in value:
+        if not isinstance(ring, (list, tuple)):
+            raise ValueError("polygon must be a list of [lat, lng] points")
+        points = []
+        for point in ring:
+            if not isinstance(point, (list, tuple)) or len(point) != 2:
+                raise ValueError("point must be [lat, lng]")
+            lat, lng = float(point[0]), float(point[1])
+            if not (-90 <= lat <= 90 and -180 <= lng <= 180) or math.isnan(lat) or math.isnan(lng):
+                raise ValueError("point out of range")
+            points.append((lat, lng))
+        if len(points) > 1 and points[0] == points[-1]:
+            # Closed GeoJSON-style ring; the closing edge is implicit here.
+            points.pop()
+        if len(points) < 3:
+            raise ValueError("polygon needs at least 3 points")
+        polygons.append(tuple(points))
+    return tuple(polygons) or None
+
+
+def build_area(
+    center_lat: Optional[float],
+    center_lng: Optional[float],
+    radius_meters: Optional[int],
+    geofence: Optional[Sequence[Polygon]] = None,
+) -> FestivalArea:
+    """Polygons take precedence over the center/radius circle when both are set."""
+    if geofence:
+        return FestivalArea([PolygonZone(tuple(tuple(p) for p in ring)) for ring in geofence])
+    if center_lat is None or center_lng is None:
+        return FestivalArea()
+    return FestivalArea([CircleZone(center_lat, center_lng, radius_meters or DEFAULT_RADIUS_METERS)])
+
+
+T = TypeVar("T")
+
+
+class BinIndex(Generic[T]):
+    """2-d tree of located items (bins) for nearest-neighbour lookup.
+
+    ``items`` are ``(lat, lng, item)``; the tree is immutable, so it is rebuilt
+    whenever the festival's bins change (the config cache reloads them).
+    """
+
+    def __init__(self, items: Sequence[Tuple[float, float, T]]):
+        self.size = len(items)
+        self.projection: Optional[LocalProjection] = None
+        # Flat array tree: node i holds (x, y, lat, lng, item); children are in the halves.
+        self._nodes: List[Tuple[float, float, float, float, T]] = []
+        if not items:
+            return
+        self.projection = LocalProjection.around(
+            sum(i[0] for i in items) / len(items), sum(i[1] for i in items) / len(items)
+        )
+        points = [(*self.projection.project(lat, lng), lat, lng, item) for lat, lng, item in items]
+        self._nodes = [None] * len(points)  # type: ignore[list-item]
+        self._build(points, 0, len(points), 0)
+
+    def _build(self, points: list, lo: int, hi: int, depth: int) -> None:
+        # Nodes are laid out in-order: [lo, mid) left subtree, mid root, (mid, hi) right.
+        if lo >= hi:
+            return
+        axis = depth % 2
+        segment = sorted(points[lo:hi], key=lambda p: p[axis])
+        points[lo:hi] = segment
+        mid = (lo + hi) // 2
+        self._nodes[mid] = points[mid]
+        self._build(points, lo, mid, depth + 1)
+        self._build(points, mid + 1, hi, depth + 1)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def nearest(self, lat: float, lng: float) -> Optional[Tuple[T, float]]:
+        """Closest item to ``(lat, lng)`` and its haversine distance in metres."""
+        if not self._nodes:
+            return None
+        qx, qy = self.projection.project(lat, lng)
+        best: List[Any] = [None, math.inf]
+
+        def search(lo: int, hi: int, depth: int) -> None:
+            if lo >= hi:
+                return
+            mid = (lo + hi) // 2
+            node = self._nodes[mid]
+            d2 = (node[0] - qx) ** 2 + (node[1] - qy) ** 2
+            if d2 < best[1]:
+                best[0], best[1] = node, d2
+            diff = (qx if depth % 2 == 0 else qy) - node[depth % 2]
+            near, far = ((lo, mid), (mid + 1, hi)) if diff < 0 else ((mid + 1, hi), (lo, mid))
+            search(near[0], near[1], depth + 1)
+            if diff * diff < best[1]:
+                search(far[0], far[1], depth + 1)
+
+        search(0, len(self._nodes), 0)
+        node = best[0]
+        return node[4], haversine_distance(lat, lng, node[2], node[3])
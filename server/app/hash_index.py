@@ -0,0 +1,197 @@
+"""Festival-wide near-duplicate index over 64-bit perceptual hashes.
+
+Uses multi-index hashing: every hash is split into ``max_distance + 1``
+disjoint bit chunks. Two hashes within ``max_distance`` bits of each other
+must agree exactly on at least one chunk (pigeonhole), so a lookup only
+compares against hashes sharing a chunk value instead of scanning every
+photo of the festival.
+
+The index lives in process memory. With several uvicorn workers each one
+accepts uploads the others have not seen, so before a duplicate check the
+index merges rows committed since its rowid watermark (SQLite assigns rowids
+under the write lock, so they follow commit order). ``HASH_INDEX_SYNC_SECONDS``
+throttles that query. Two near-identical uploads handled by different workers
+at the same moment can still both pass, since neither is committed when the
+other checks.
+"""
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+HASH_BITS = 64
+DUPLICATE_MAX_DISTANCE = 5
+_SIGN_BIT = 1 << (HASH_BITS - 1)
+_MASK = (1 << HASH_BITS) - 1
+
+# Minimum seconds between syncs with rows committed by other workers; 0 syncs before every check.
+HASH_INDEX_SYNC_SECONDS = float(os.getenv("HASH_INDEX_SYNC_SECONDS", "0"))
+
+
+def hash_to_int(value: Optional[str]) -> Optional[int]:
+    """Convert a stored hash string (16 hex chars or 64 binary chars) to an unsigned int."""
+    if not value:
+        return None
+    try:
+        if len(value) == HASH_BITS and set(value).issubset({"0", "1"}):
+            return int(value, 2)
+        if len(value) == HASH_BITS // 4:
+            return int(value, 16)
+    except ValueError:
+        return None
+    return None
+
+
+def to_signed64(value: int) -> int:
+    """SQLite INTEGER is signed 64-bit; store the top bit as the sign."""
+    return value - (1 << HASH_BITS) if value & _SIGN_BIT else value
+
+
+def from_signed64(value: int) -> int:
+    return value & _MASK
+
+
+class MultiIndexHash:
+    """Hamming-radius index for a single festival. Not thread-safe on its own."""
+
+    def __init__(self, max_distance: int = DUPLICATE_MAX_DISTANCE, bits: int = HASH_BITS):
+        self.max_distance = max_distance
+        chunk_count = max_distance + 1
+        base, extra = divmod(bits, chunk_count)
+        self._chunks: List[Tuple[int, int]] = []
+        shift = 0
+        for idx in range(chunk_count):
+            width = base + (1 if idx < extra else 0)
+            self._chunks.append((shift, (1 << width) - 1))
+            shift += width
+        self._tables: List[Dict[int, Set[int]]] = [{} for _ in self._chunks]
+        self._counts: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return sum(self._counts.values())
+
+    def add(self, value: int) -> None:
+        count = self._counts.get(value, 0)
+        self._counts[value] = count + 1
+        if count:
+            return
+        for table, (shift, mask) in zip(self._tables, self._chunks):
+            table.setdefault((value >> shift) & mask, set()).add(value)
+
+    def remove(self, value: int) -> None:
+        count = self._counts.get(value, 0)
+        if count > 1:
+            self._counts[value] = count - 1
+            return
+        if not count:
+            return
+        del self._counts[value]
+        for table, (shift, mask) in zip(self._tables, self._chunks):
+            key = (value >> shift) & mask
+            bucket = table.get(key)
+            if bucket is not None:
+                bucket.discard(value)
+                if not bucket:
+                    del table[key]
+
+    def find_within(self, value: int) -> Optional[int]:
+        """Return any stored hash within ``max_distance`` bits of ``value``."""
+        if value in self._counts:
+            return value
+        limit = self.max_distance
+        for table, (shift, mask) in zip(self._tables, self._chunks):
+            bucket = table.get((value >> shift) & mask)
+            if not bucket:
+                continue
+            for candidate in bucket:
+                if (candidate ^ value).bit_count() <= limit:
+                    return candidate
+        return None
+
+
+class FestivalHashIndex:
+    """Per-festival registry of :class:`MultiIndexHash` guarded by a single lock."""
+
+    def __init__(self, max_distance: int = DUPLICATE_MAX_DISTANCE, sync_seconds: float = HASH_INDEX_SYNC_SECONDS):
+        self.max_distance = max_distance
+        self.sync_seconds = sync_seconds
+        # Highest trash_photos rowid merged so far.
+        self.watermark = 0
+        self._synced_at = 0.0
+        self._indexes: Dict[str, MultiIndexHash] = {}
+        self._lock = threading.Lock()
+
+    def _index(self, festival_id: str) -> MultiIndexHash:
+        index = self._indexes.get(festival_id)
+        if index is None:
+            index = self._indexes[festival_id] = MultiIndexHash(self.max_distance)
+        return index
+
+    def load(self, rows: Iterable[Tuple[int, str, int]]) -> int:
+        """Rebuild from ``(rowid, festival_id, unsigned hash)`` rows. Returns number loaded."""
+        indexes: Dict[str, MultiIndexHash] = {}
+        loaded = 0
+        watermark = 0
+        for rowid, festival_id, value in rows:
+            index = indexes.get(festival_id)
+            if index is None:
+                index = indexes[festival_id] = MultiIndexHash(self.max_distance)
+            index.add(value)
+            watermark = max(watermark, rowid)
+            loaded += 1
+        with self._lock:
+            self._indexes = indexes
+            self.watermark = watermark
+            self._synced_at = time.monotonic()
+        return loaded
+
+    def needs_sync(self) -> bool:
+        return self.sync_seconds <= 0 or time.monotonic() - self._synced_at >= self.sync_seconds
+
+    def merge(self, rows: Iterable[Tuple[int, str, int]]) -> int:
+        """Add rows committed after the watermark, in rowid order. Returns number added.
+
+        Rows at or below the watermark were already merged by a concurrent sync.
+        A worker's own uploads are merged as well; the extra count keeps them
+        indexed if an in-flight claim of the same hash is released later.
+        """
+        added = 0
+        with self._lock:
+            for rowid, festival_id, value in rows:
+                if rowid <= self.watermark:
+                    continue
+                self._index(festival_id).add(value)
+                self.watermark = rowid
+                added += 1
+            self._synced_at = time.monotonic()
+        return added
+
+    def find_within(self, festival_id: str, value: int) -> Optional[int]:
+        with self._lock:
+            index = self._indexes.get(festival_id)
+            return index.find_within(value) if index is not None else None
+
+    def claim(self, festival_id: str, value: int) -> bool:
+        """Atomically insert ``value`` unless a near-duplicate already exists."""
+        with self._lock:
+            index = self._index(festival_id)
+            if index.find_within(value) is not None:
+                return False
+            index.add(value)
+            return True
+
+    def release(self, festival_id: str, value: int) -> None:
+        """Undo a :meth:`claim` for an upload that was rejected afterwards."""
+        with self._lock:
+            index = self._indexes.get(festival_id)
+            if index is not None:
+                index.remove(value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._indexes = {}
+            self.watermark = 0
+            self._synced_at = 0.0
+
+
+photo_hash_index = FestivalHashIndex()
@@ -0,0 +1,96 @@
+"""Upload-time image normalization and derivatives.
+
+Phone photos arrive as large JPEGs with an EXIF orientation flag. Each upload
+is decoded once, at reduced scale when the format allows it, and turned into:
+
+- the stored image: orientation applied, metadata stripped, longest edge at
+  most ``UPLOAD_MAX_EDGE`` (JPEGs may land up to 25% under it), re-encoded as JPEG at ``UPLOAD_JPEG_QUALITY``;
+- a WebP thumbnail for the activity timeline (``THUMBNAIL_EDGE``);
+- a model-input copy (``MODEL_INPUT_EDGE``, the YOLO ``imgsz``), kept in memory
+  for hashing and inference so neither has to start from full resolution.
+"""
+import io
+import os
+from typing import Any, Dict, Optional, Tuple
+
+from PIL import Image, ImageOps
+
+UPLOAD_MAX_EDGE = int(os.getenv("UPLOAD_MAX_EDGE", "2048"))
+UPLOAD_JPEG_QUALITY = int(os.getenv("UPLOAD_JPEG_QUALITY", "85"))
+THUMBNAIL_EDGE = int(os.getenv("THUMBNAIL_EDGE", "320"))
+THUMBNAIL_WEBP_QUALITY = int(os.getenv("THUMBNAIL_WEBP_QUALITY", "70"))
+MODEL_INPUT_EDGE = int(os.getenv("MODEL_INPUT_EDGE", "640"))
+
+DRAFT_MIN_FRACTION = 0.75
+
+NORMALIZED_EXTENSION = ".jpg"
+THUMBNAIL_SUFFIX = "_thumb.webp"
+
+
+def fit_within(size: Tuple[int, int], max_edge: int) -> Tuple[int, int]:
+    width, height = size
+    longest = max(width, height)
+    if max_edge <= 0 or longest <= max_edge:
+        return width, height
+    scale = max_edge / longest
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def open_normalized(data: bytes, max_edge: int = UPLOAD_MAX_EDGE) -> Image.Image:
+    """Decode ``data`` upright, in RGB, with the longest edge at most ``max_edge``.
+
+    JPEG is decoded with libjpeg's DCT scaling (``Image.draft``), so a 12MP photo
+    is never materialized at full size when the target is much smaller.
+    """
+    with Image.open(io.BytesIO(data)) as src:
+        # draft() picks the smallest DCT scale still >= the requested size (rotation does
+        # not matter). Allowing it to land a little under max_edge lets a 4000px phone
+        # photo decode straight to 2000px instead of decoding full size and resizing.
+        target = fit_within(src.size, max_edge)
+        src.draft("RGB", (int(target[0] * DRAFT_MIN_FRACTION), int(target[1] * DRAFT_MIN_FRACTION)))
+        img = ImageOps.exif_transpose(src)
+        if img is src:
+            img = src.copy()
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    target = fit_within(img.size, max_edge)
+    if target != img.size:
+        img = img.resize(target, Image.BICUBIC, reducing_gap=2.0)
+    return img
+
+
+def resized(img: Image.Image, max_edge: int) -> Image.Image:
+    target = fit_within(img.size, max_edge)
+    if target == img.size:
+        return img
+    return img.resize(target, Image.BILINEAR, reducing_gap=2.0)
+
+
+def encode(img: Image.Image, fmt: str, quality: int) -> bytes:
+    buffer = io.BytesIO()
+    # Pillow only writes EXIF when it is passed to save(), so metadata is dropped.
+    img.save(buffer, format=fmt, quality=quality)
+    return buffer.getvalue()
+
+
+def model_input_copy(img: Image.Image) -> Image.Image:
+    return resized(img, MODEL_INPUT_EDGE)
+
+
+def encode_derivatives(img: Image.Image, model_input: Image.Image) -> Tuple[bytes, bytes]:
+    """Return the stored JPEG and the WebP thumbnail for a normalized image."""
+    image = encode(img, "JPEG", UPLOAD_JPEG_QUALITY)
+    thumbnail = encode(resized(model_input, THUMBNAIL_EDGE), "WEBP", THUMBNAIL_WEBP_QUALITY)
+    return image, thumbnail
+
+
+def scale_detections(result: Dict[str, Any], factor: float) -> Dict[str, Any]:
+    """Map boxes detected on the model-input copy back to stored-image pixels."""
+    detections: Optional[list] = result.get("raw_detections") if isinstance(result, dict) else None
+    if not detections or factor == 1:
+        return result
+    scaled = [
+        {**det, "bbox": [round(v * factor, 1) for v in det["bbox"]]} if det.get("bbox") else det
+        for det in detections
+    ]
+    return {**result, "raw_detections": scaled}
@@ -0,0 +1,191 @@
+"""In-process micro-batching front-end for YOLO inference.
+
+Uploads put decoded images on an asyncio queue and await a future. A single
+worker task drains the queue into batches of up to ``max_batch_size`` images,
+waiting at most ``max_wait_ms`` for a batch to fill, and runs one batched
+model call off the event loop so no request thread is held during inference.
+"""
+import asyncio
+import os
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Set, Tuple
+
+from .yolo_utils import analyze_batch, empty_result
+
+INFERENCE_MAX_BATCH_SIZE = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "8"))
+INFERENCE_MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", "10"))
+INFERENCE_MAX_QUEUE_DEPTH = int(os.getenv("INFERENCE_MAX_QUEUE_DEPTH", "64"))
+
+LATENCY_WINDOW = 1000
+
+BatchRunner = Callable[[Sequence[Any]], List[Dict[str, Any]]]
+
+
+def _percentile(values: Sequence[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+class InferenceBatcher:
+    def __init__(
+        self,
+        runner: BatchRunner = analyze_batch,
+        max_batch_size: int = INFERENCE_MAX_BATCH_SIZE,
+        max_wait_ms: float = INFERENCE_MAX_WAIT_MS,
+        max_queue_depth: int = INFERENCE_MAX_QUEUE_DEPTH,
+        concurrency: int = 1,
+    ):
+        self.runner = runner
+        self.concurrency = max(1, concurrency)
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max(0.0, max_wait_ms)
+        self.max_queue_depth = max(1, max_queue_depth)
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._inflight: Set[asyncio.Task] = set()
+        self.batch_sizes: Counter = Counter()
+        self.latencies_ms: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.processed = 0
+        self.rejected = 0
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def in_flight_batches(self) -> int:
+        return len(self._inflight)
+
+    def use_runner(self, runner: BatchRunner, concurrency: int = 1) -> None:
+        """Swap the batch runner, e.g. for a process pool that can take several batches at once."""
+        self.runner = runner
+        self.concurrency = max(1, concurrency)
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.max_queue_depth)
+        # One thread per batch in flight; with the in-process model that is a single call at a time.
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="yolo")
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._worker is not None and self._loop is asyncio.get_running_loop():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            for task in list(self._inflight):
+                task.cancel()
+            if self._inflight:
+                await asyncio.gather(*self._inflight, return_exceptions=True)
+        self._worker = None
+        self._inflight = set()
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, future, _ = self._queue.get_nowait()
+                if not future.done():
+                    future.set_result(empty_result())
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def submit(self, image: Any) -> Dict[str, Any]:
+        """Queue one decoded image and wait for its detection summary. Never raises."""
+        if image is None:
+            return empty_result()
+        if not self.running or self._loop is not asyncio.get_running_loop():
+            await self.stop()
+            await self.start()
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((image, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return empty_result()
+        try:
+            return await future
+        except Exception:
+            return empty_result()
+
+    async def _collect(self) -> List[Tuple[Any, asyncio.Future, float]]:
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        slots = asyncio.Semaphore(self.concurrency)
+        while True:
+            await slots.acquire()
+            try:
+                batch = await self._collect()
+            except BaseException:
+                slots.release()
+                raise
+            task = asyncio.create_task(self._dispatch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+            task.add_done_callback(lambda _: slots.release())
+
+    async def _dispatch(self, batch: List[Tuple[Any, asyncio.Future, float]]) -> None:
+        loop = asyncio.get_running_loop()
+        images = [image for image, _, _ in batch]
+        results: List[Dict[str, Any]] = []
+        try:
+            results = await loop.run_in_executor(self._executor, self.runner, images)
+        except Exception:
+            pass
+        finally:
+            if len(results) != len(batch):
+                results = [empty_result() for _ in batch]
+            finished = time.perf_counter()
+            self.batch_sizes[len(batch)] += 1
+            for (_, future, enqueued), result in zip(batch, results):
+                self.latencies_ms.append((finished - enqueued) * 1000)
+                if not future.done():
+                    future.set_result(result)
+            self.processed += len(batch)
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = list(self.latencies_ms)
+        return {
+            "running": self.running,
+            "queueDepth": self.queue_depth(),
+            "maxQueueDepth": self.max_queue_depth,
+            "maxBatchSize": self.max_batch_size,
+            "maxWaitMs": self.max_wait_ms,
+            "concurrency": self.concurrency,
+            "inFlightBatches": self.in_flight_batches(),
+            "processed": self.processed,
+            "rejected": self.rejected,
+            "batchSizeHistogram": {str(size): count for size, count in sorted(self.batch_sizes.items())},
+            "latencyMs": {
+                "p50": _percentile(latencies, 50),
+                "p95": _percentile(latencies, 95),
+                "p99": _percentile(latencies, 99),
+                "max": max(latencies) if latencies else None,
+            },
+        }
+
+
+inference_batcher = InferenceBatcher()
@@ -0,0 +1,119 @@
+"""Multi-process YOLO workers fed through shared memory.
+
+Each worker process loads its own model and pins torch to a fixed number of
+threads, so inference scales across cores instead of sharing one GIL-bound
+interpreter. Decoded images are copied once into ``multiprocessing``
+shared-memory blocks; only the block names, shapes and dtypes are pickled.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .yolo_utils import analyze_batch, empty_result, model_state, warm_up
+
+INFERENCE_PROCESSES = int(os.getenv("INFERENCE_PROCESSES", "0"))
+INFERENCE_TORCH_THREADS = int(os.getenv("INFERENCE_TORCH_THREADS", "0"))
+
+ShmSpec = Tuple[str, Tuple[int, ...], str]
+
+
+def _init_worker(torch_threads: int) -> None:
+    try:
+        import torch
+
+        torch.set_num_threads(torch_threads)
+        torch.set_num_interop_threads(1)
+    except Exception:
+        pass
+    # Load weights up front so the first batch does not pay for it.
+    warm_up()
+
+
+def _infer_shared(specs: Sequence[ShmSpec]) -> List[Dict[str, Any]]:
+    blocks = []
+    images = []
+    try:
+        for name, shape, dtype in specs:
+            # Spawned workers share the parent's resource tracker, so attaching does not
+            # take ownership; the parent unlinks the block once the batch returns.
+            block = shared_memory.SharedMemory(name=name)
+            blocks.append(block)
+            images.append(np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf))
+        return analyze_batch(images)
+    finally:
+        del images
+        for block in blocks:
+            try:
+                block.close()
+            except BufferError:
+                pass  # a lingering view keeps the mapping alive until it is collected
+
+
+class YoloProcessPool:
+    def __init__(self, workers: int = INFERENCE_PROCESSES, torch_threads: int = INFERENCE_TORCH_THREADS):
+        self.workers = max(1, workers)
+        cpu_count = os.cpu_count() or 1
+        self.torch_threads = torch_threads or max(1, cpu_count // self.workers)
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def running(self) -> bool:
+        return self._executor is not None
+
+    def start(self) -> None:
+        if self._executor is not None:
+            return
+        # spawn: torch and forked OpenMP thread pools do not mix.
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.torch_threads,),
+        )
+
+    def stop(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def warm_up(self) -> Dict[str, Any]:
+        """Spawn every worker (each warms its model in the initializer) and return a worker's model_state()."""
+        dummy = np.zeros((32, 32, 3), dtype=np.uint8)
+        # Workers are spawned on demand, one per submission that finds none idle.
+        with ThreadPoolExecutor(max_workers=self.workers) as threads:
+            list(threads.map(lambda _: self.run([dummy]), range(self.workers)))
+        if self._executor is None:
+            return {"state": "not_loaded"}
+        try:
+            # Workers share one configuration, so any worker's state speaks for all of them.
+            return self._executor.submit(model_state).result()
+        except Exception as exc:
+            return {"state": "unavailable", "error": f"{type(exc).__name__}: {exc}"}
+
+    def run(self, images: Sequence[Any]) -> List[Dict[str, Any]]:
+        """Blocking batch call; safe to use as an :class:`InferenceBatcher` runner."""
+        if self._executor is None:
+            return [empty_result() for _ in images]
+        blocks: List[shared_memory.SharedMemory] = []
+        try:
+            specs: List[ShmSpec] = []
+            for image in images:
+                array = np.ascontiguousarray(image)
+                block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+                blocks.append(block)
+                np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+                specs.append((block.name, array.shape, array.dtype.str))
+            return self._executor.submit(_infer_shared, specs).result()
+        except Exception:
+            return [empty_result() for _ in images]
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+
+
+inference_pool = YoloProcessPool()
@@ -0,0 +1,193 @@
+"""In-memory admin dashboard aggregates and change notification.
+
+Each festival's dashboard numbers (photo points by status, scans per bin,
+distinct participants, budget used) are seeded from the database once and then
+kept current by the write endpoints, which report their changes after commit.
+The summary endpoint and the SSE stream read these aggregates, so operators
+watching the dashboard put no query load on the database.
+
+Aggregates are per process: with several uvicorn workers each one only sees
+its own writes, so an aggregate is re-seeded once it is older than
+``LIVE_SUMMARY_RESYNC_SECONDS``. The resync also bounds the small error a
+write can cause when it commits while a seed is being read.
+"""
+import asyncio
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from .budget import get_budget_usage
+from .models import BinScan, TrashPhoto
+
+LIVE_SUMMARY_RESYNC_SECONDS = float(os.getenv("LIVE_SUMMARY_RESYNC_SECONDS", "60"))
+
+STATUS_PENDING = "PENDING"
+STATUS_ACTIVE = "ACTIVE"
+
+
+@dataclass
+class FestivalAggregate:
+    pending_points: int = 0
+    active_points: int = 0
+    bin_scans: Dict[str, int] = field(default_factory=dict)
+    participants: Set[str] = field(default_factory=set)
+    budget_used: int = 0
+    seeded_at: float = 0.0
+
+
+@dataclass(frozen=True)
+class AggregateView:
+    pending_points: int
+    active_points: int
+    bin_scans: Dict[str, int]
+    participants: int
+    budget_used: int
+
+
+def load_aggregate(db: Session, festival_id: str) -> FestivalAggregate:
+    """Build a festival's aggregate from the raw tables."""
+    aggregate = FestivalAggregate(seeded_at=time.monotonic())
+    for status, total in db.execute(
+        select(TrashPhoto.status, func.sum(TrashPhoto.points))
+        .where(TrashPhoto.festival_id == festival_id)
+        .group_by(TrashPhoto.status)
+    ):
+        if status == STATUS_PENDING:
+            aggregate.pending_points = int(total or 0)
+        elif status == STATUS_ACTIVE:
+            aggregate.active_points = int(total or 0)
+    aggregate.bin_scans = {
+        bin_id: int(count)
+        for bin_id, count in db.execute(
+            select(BinScan.bin_id, func.count(BinScan.bin_id))
+            .where(BinScan.festival_id == festival_id)
+            .group_by(BinScan.bin_id)
+        )
+    }
+    aggregate.participants = set(
+        db.execute(select(TrashPhoto.user_id).where(TrashPhoto.festival_id == festival_id).distinct()).scalars()
+    )
+    aggregate.budget_used = get_budget_usage(db, festival_id)
+    return aggregate
+
+
+class LiveSummaryHub:
+    def __init__(self, resync_seconds: float = LIVE_SUMMARY_RESYNC_SECONDS):
+        self.resync_seconds = resync_seconds
+        self._aggregates: Dict[str, FestivalAggregate] = {}
+        self._listeners: Dict[str, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = {}
+        self._lock = threading.Lock()
+        self.seeds = 0
+
+    def _fresh(self, aggregate: Optional[FestivalAggregate], now: float) -> bool:
+        return aggregate is not None and (self.resync_seconds <= 0 or now - aggregate.seeded_at < self.resync_seconds)
+
+    def needs_seed(self, festival_id: str) -> bool:
+        with self._lock:
+            return not self._fresh(self._aggregates.get(festival_id), time.monotonic())
+
+    def view(self, db: Session, festival_id: str) -> AggregateView:
+        """Current numbers for ``festival_id``, seeding from ``db`` if missing or stale."""
+        with self._lock:
+            aggregate = self._aggregates.get(festival_id)
+            fresh = self._fresh(aggregate, time.monotonic())
+        if not fresh:
+            aggregate = load_aggregate(db, festival_id)
+            with self._lock:
+                self._aggregates[festival_id] = aggregate
+                self.seeds += 1
+            self._notify(festival_id)
+        with self._lock:
+            return AggregateView(
+                pending_points=aggregate.pending_points,
+                active_points=aggregate.active_points,
+                bin_scans=dict(aggregate.bin_scans),
+                participants=len(aggregate.participants),
+                budget_used=aggregate.budget_used,
+            )
+
+    def _apply(self, festival_id: str, update) -> None:
+        with self._lock:
+            aggregate = self._aggregates.get(festival_id)
+            if aggregate is None:
+                # Not seeded yet; the seed will read this write from the database.
+                return
+            update(aggregate)
+        self._notify(festival_id)
+
+    def record_upload(self, festival_id: str, user_id: str, points: int) -> None:
+        def update(aggregate: FestivalAggregate) -> None:
+            aggregate.pending_points += points
+            aggregate.budget_used += points
+            aggregate.participants.add(user_id)
+
+        self._apply(festival_id, update)
+
+    def record_scan(self, festival_id: str, bin_id: str, activated_points: int) -> None:
+        def update(aggregate: FestivalAggregate) -> None:
+            aggregate.pending_points -= activated_points
+            aggregate.active_points += activated_points
+            aggregate.bin_scans[bin_id] = aggregate.bin_scans.get(bin_id, 0) + 1
+
+        self._apply(festival_id, update)
+
+    def record_coupon(self, festival_id: str, amount: int) -> None:
+        def update(aggregate: FestivalAggregate) -> None:
+            aggregate.budget_used += amount
+
+        self._apply(festival_id, update)
+
+    def invalidate(self, festival_id: Optional[str] = None) -> None:
+        with self._lock:
+            if festival_id is None:
+                self._aggregates.clear()
+            else:
+                self._aggregates.pop(festival_id, None)
+
+    @contextmanager
+    def subscribe(self, festival_id: str) -> Iterator[asyncio.Event]:
+        """Register an event that is set whenever ``festival_id``'s aggregate changes.
+
+        Must be entered on the event loop; writers on other threads wake it safely.
+        """
+        listener = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._listeners.setdefault(festival_id, set()).add(listener)
+        try:
+            yield listener[1]
+        finally:
+            with self._lock:
+                listeners = self._listeners.get(festival_id)
+                if listeners is not None:
+                    listeners.discard(listener)
+                    if not listeners:
+                        del self._listeners[festival_id]
+
+    def _notify(self, festival_id: str) -> None:
+        with self._lock:
+            listeners: List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = list(
+                self._listeners.get(festival_id, ())
+            )
+        for loop, event in listeners:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # Loop already closed (shutdown); the subscriber is going away.
+                pass
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "festivals": len(self._aggregates),
+                "subscribers": sum(len(v) for v in self._listeners.values()),
+                "seeds": self.seeds,
+            }
+
+
+live_summary = LiveSummaryHub()
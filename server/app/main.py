@@ -1,34 +1,80 @@
+import asyncio
 import base64
+import functools
+import hashlib
 import hmac
+import json
 import math
 import os
 import re
-import shutil
+import secrets
 import time
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional
-from zoneinfo import ZoneInfo
+from typing import Any, Optional, Tuple, Union
 
+import anyio
 import imagehash
 from dotenv import load_dotenv
-from fastapi import Depends, FastAPI, File, Form, Header, HTTPException, UploadFile
+from fastapi import Depends, FastAPI, File, Form, Header, HTTPException, Query, Request, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from PIL import Image
-from sqlalchemy import func, select
-from sqlalchemy.orm import Session
-
-from .db import BASE_DIR, create_db_and_tables, get_db
-from .yolo_utils import analyze_trash
+from sqlalchemy import Integer, literal_column, select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, defer
+
+from .analysis import ANALYSIS_ANALYZING, AnalysisWorker, enqueue_analysis, requeue_failed
+from .bins import BIN_BATCH_MAX_SIZE, BIN_IMPORT_MAX_BYTES, BinSpec, create_bins, iter_bin_codes, parse_bins_csv
+from .budget import get_budget_usage, rebuild_budget_counters, reserve_budget
+from .config_cache import BinSnapshot, FestivalSnapshot, festival_cache
+from .db import (
+    BASE_DIR,
+    after_commit,
+    commit_with_retry,
+    create_db_and_tables,
+    engine,
+    generate_id,
+    get_db,
+    get_read_db,
+    is_busy_error,
+    now,
+    read_engine,
+)
+from .detections import decode_detections
+from .exports import EXPORT_FORMATS, EXPORT_TABLES, export_stream, parquet_available, parse_bound, prepare_export
+from .geo import haversine_distance, parse_geofence
+from .hash_index import from_signed64, hash_to_int, photo_hash_index, to_signed64
+from .inference import inference_batcher
+from .imaging import (
+    NORMALIZED_EXTENSION,
+    THUMBNAIL_SUFFIX,
+    encode_derivatives,
+    model_input_copy,
+    open_normalized,
+)
+from .inference_pool import INFERENCE_PROCESSES, inference_pool
+from .live_summary import AggregateView, live_summary
+from .metrics import MetricsMiddleware, registry as metrics_registry, span
+from .pagination import keyset_page
+from .points import KST, activate_pending_photos, add_to_summary, read_summary, spend_active_points
+from .qr_export import stream_pdf, stream_zip
+from .rate_limit import rate_limiter
+from .readiness import YOLO_WARMUP_ON_STARTUP, startup_state
+from .summary_prewarm import summary_prewarmer
+from .token_cache import token_cache
+from .yolo_utils import model_state, warmup_image
 from .models import (
     BinScan,
     Coupon,
     Festival,
+    FestivalBudget,
     TrashBin,
     TrashPhoto,
     User,
-    UserDailySummary,
 )
 
 load_dotenv()
@@ -37,18 +83,47 @@ PHOTO_STATUS_PENDING = "PENDING"
 PHOTO_STATUS_ACTIVE = "ACTIVE"
 
 COUPON_STATUS_ISSUED = "ISSUED"
+COUPON_CODE_ALPHABET = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
 
 ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "admin123")
 ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "admin123")
 DEFAULT_FESTIVAL_ID = os.getenv("FESTIVAL_ID")
 SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret-key")
+TOKEN_TTL_SECONDS = 60 * 60 * 24 * 30
+# Lifetime of a ?token= minted for one admin download or stream URL.
+ADMIN_LINK_TOKEN_TTL_SECONDS = int(os.getenv("ADMIN_LINK_TOKEN_TTL_SECONDS", "60"))
+# Admin URLs opened without headers (download links, EventSource) that accept a link token.
+ADMIN_LINK_PATHS = re.compile(r"^/api/admin/festivals/[^/]+/(trash-bins/qr-codes|exports/\w+|summary/stream)$")
 
-KST = ZoneInfo("Asia/Seoul")
 PENDING_ACTIVATION_MINUTES = 30
+# Photo IDs one analysis poll may ask about (the activity page polls its visible uploads).
+ANALYSIS_POLL_MAX_IDS = 100
+
+# A scan must come from within this distance of a bin that has coordinates; 0 disables the check.
+BIN_SCAN_MAX_DISTANCE_METERS = float(os.getenv("BIN_SCAN_MAX_DISTANCE_METERS", "50"))
 
-UPLOAD_DIR = BASE_DIR / "uploads"
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(15 * 1024 * 1024)))
+UPLOAD_CHUNK_BYTES = 64 * 1024
+
+SUMMARY_STREAM_HEARTBEAT_SECONDS = 15
+# Bursts of writes within this window reach operators as one update.
+SUMMARY_STREAM_MIN_INTERVAL_SECONDS = float(os.getenv("SUMMARY_STREAM_MIN_INTERVAL_SECONDS", "0.5"))
+
+UPLOAD_DIR = Path(os.getenv("UPLOAD_DIR", str(BASE_DIR / "uploads")))
 UPLOAD_DIR.mkdir(exist_ok=True, parents=True)
 
+
+def analysis_model_available() -> bool:
+    """False once the model failed to load, so the analysis worker stops claiming jobs."""
+    if inference_pool.running:
+        state = startup_state.model_state or {}
+    else:
+        state = model_state()
+    return state.get("state") != "unavailable"
+
+
+analysis_worker = AnalysisWorker(inference_batcher.submit, UPLOAD_DIR, model_available=analysis_model_available)
+
 app = FastAPI(title="Cash Up API", version="2.0")
 
 app.add_middleware(
@@ -57,7 +132,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Export-Cursor"],
 )
+app.add_middleware(MetricsMiddleware)
 
 app.mount("/uploads", StaticFiles(directory=UPLOAD_DIR), name="uploads")
 
@@ -66,69 +143,44 @@ def get_today() -> str:
     return datetime.now(KST).strftime("%Y-%m-%d")
 
 
-def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    to_rad = math.pi / 180
-    r = 6371_000
-    phi1 = lat1 * to_rad
-    phi2 = lat2 * to_rad
-    dphi = (lat2 - lat1) * to_rad
-    dlambda = (lon2 - lon1) * to_rad
-    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    return r * c
-
-
 def is_inside_festival(
-    festival: Festival, lat: Optional[float] = None, lng: Optional[float] = None
+    festival: FestivalSnapshot, lat: Optional[float] = None, lng: Optional[float] = None
 ) -> bool:
-    if festival.center_lat is None or festival.center_lng is None:
+    area = festival.area
+    return area is None or area.contains(lat, lng)
+
+
+def is_near_bin(bin_obj: BinSnapshot, lat: Optional[float], lng: Optional[float]) -> bool:
+    if BIN_SCAN_MAX_DISTANCE_METERS <= 0 or bin_obj.latitude is None or bin_obj.longitude is None:
         return True
     if lat is None or lng is None:
         return False
-    distance = haversine_distance(lat, lng, festival.center_lat, festival.center_lng)
-    radius = festival.radius_meters or 1500
-    return distance <= radius
+    return haversine_distance(lat, lng, bin_obj.latitude, bin_obj.longitude) <= BIN_SCAN_MAX_DISTANCE_METERS
 
 
-def ensure_summary(db: Session, user_id: str, festival_id: str) -> UserDailySummary:
-    today = get_today()
-    summary = (
-        db.execute(
-            select(UserDailySummary).where(
-                UserDailySummary.user_id == user_id,
-                UserDailySummary.festival_id == festival_id,
-                UserDailySummary.date == today,
-            )
-        )
-        .scalars()
-        .first()
-    )
-    if summary:
-        return summary
-    summary = UserDailySummary(user_id=user_id, festival_id=festival_id, date=today)
-    db.add(summary)
-    db.commit()
-    db.refresh(summary)
-    return summary
+def parse_coordinate(value: Any) -> Optional[float]:
+    if value is None or value == "":
+        return None
+    try:
+        parsed = float(value)
+    except (TypeError, ValueError):
+        http_error(400, "위치 값이 올바르지 않습니다.")
+    if not math.isfinite(parsed):
+        http_error(400, "위치 값이 올바르지 않습니다.")
+    return parsed
 
 
-def get_budget_usage(db: Session, festival_id: str) -> int:
-    photo_points = (
-        db.execute(
-            select(func.coalesce(func.sum(TrashPhoto.points), 0)).where(TrashPhoto.festival_id == festival_id)
-        ).scalar_one()
-        or 0
-    )
-    coupon_points = (
-        db.execute(select(func.coalesce(func.sum(Coupon.amount), 0)).where(Coupon.festival_id == festival_id)).scalar_one()
-        or 0
-    )
-    return int(photo_points + coupon_points)
+def ensure_budget_room(db: Session, festival: FestivalSnapshot, needed: int):
+    with span("budget"):
+        used = get_budget_usage(db, festival.id)
+    if used + needed > festival.budget:
+        raise HTTPException(status_code=400, detail={"message": "오늘 리워드 예산이 모두 소진되었습니다."})
 
 
-def ensure_budget_room(db: Session, festival: Festival, needed: int):
-    used = get_budget_usage(db, festival.id)
-    if used + needed > festival.budget:
+def reserve_budget_or_fail(db: Session, festival: FestivalSnapshot, amount: int):
+    with span("budget"):
+        reserved = reserve_budget(db, festival.id, amount)
+    if not reserved:
         raise HTTPException(status_code=400, detail={"message": "오늘 리워드 예산이 모두 소진되었습니다."})
 
 
@@ -138,12 +190,38 @@ def hamming_distance(a: str, b: str) -> int:
     return sum(ch1 != ch2 for ch1, ch2 in zip(a, b))
 
 
-def compute_image_hash(file_path: Path) -> str:
-    with Image.open(file_path) as img:
+def compute_image_hash(source: Union[Path, Image.Image]) -> str:
+    if isinstance(source, Image.Image):
+        return str(imagehash.average_hash(source))
+    with Image.open(source) as img:
         hash_val = imagehash.average_hash(img)
     return str(hash_val)
 
 
+def read_upload(image: UploadFile, max_bytes: int = MAX_UPLOAD_BYTES) -> Tuple[bytes, str]:
+    """Read the upload in chunks, enforcing ``max_bytes`` and hashing the exact bytes as they arrive."""
+    digest = hashlib.sha256()
+    buffer = bytearray()
+    while True:
+        chunk = image.file.read(UPLOAD_CHUNK_BYTES)
+        if not chunk:
+            break
+        buffer.extend(chunk)
+        if len(buffer) > max_bytes:
+            http_error(413, "사진 용량이 너무 커요.")
+        digest.update(chunk)
+    return bytes(buffer), digest.hexdigest()
+
+
+def decode_image(data: bytes) -> Image.Image:
+    """Decode an upload upright, in RGB and capped at ``UPLOAD_MAX_EDGE``."""
+    try:
+        img = open_normalized(data)
+    except Exception:
+        http_error(400, "사진을 읽을 수 없어요.")
+    return img
+
+
 def parse_hash(value: str):
     """Return imagehash.ImageHash or None for stored string formats."""
     if not value:
@@ -167,9 +245,16 @@ def create_token(user_id: str) -> str:
     return token
 
 
-def verify_token(token: Optional[str]) -> Optional[str]:
+def verify_token(token: Optional[str], cache_key: Optional[str] = None) -> Optional[str]:
+    """User ID for a valid, unexpired token. Verified tokens are cached under ``cache_key`` (default: the token)."""
     if not token:
         return None
+    now_ts = int(time.time())
+    token_cache.bind_secret(SECRET_KEY)
+    cache_key = cache_key or token
+    cached_user_id = token_cache.get(cache_key, now_ts)
+    if cached_user_id is not None:
+        return cached_user_id
     try:
         raw = base64.urlsafe_b64decode(token.encode()).decode()
         user_id, issued_at, signature = raw.split(":")
@@ -178,28 +263,94 @@ def verify_token(token: Optional[str]) -> Optional[str]:
         if not hmac.compare_digest(expected, signature):
             return None
         # 30일 만료
-        if int(time.time()) - int(issued_at) > 60 * 60 * 24 * 30:
+        expires_at = int(issued_at) + TOKEN_TTL_SECONDS
+        if now_ts > expires_at:
             return None
+        token_cache.put(cache_key, user_id, expires_at)
         return user_id
     except Exception:
         return None
 
 
 def get_current_user_id(authorization: Optional[str] = Header(None)) -> str:
+    # Hit path: the whole header is the cache key, so a repeat request skips parsing and the HMAC.
+    if authorization:
+        user_id = token_cache.get(authorization, time.time(), SECRET_KEY)
+        if user_id is not None:
+            return user_id
     if not authorization or not authorization.lower().startswith("bearer "):
         http_error(401, "인증이 필요합니다.")
-    token = authorization.split(" ", 1)[1]
-    user_id = verify_token(token)
+    user_id = verify_token(authorization.split(" ", 1)[1], cache_key=authorization)
     if not user_id:
         http_error(401, "토큰이 유효하지 않습니다.")
     return user_id
 
 
+def client_ip(request: Request) -> str:
+    # nginx forwards the peer address as X-Real-IP.
+    return request.headers.get("x-real-ip") or (request.client.host if request.client else "unknown")
+
+
+async def enforce_rate_limit(scope: str, key: str) -> None:
+    allowed, retry_after = await rate_limiter.hit(scope, key)
+    if not allowed:
+        raise HTTPException(
+            status_code=429,
+            detail={"message": "조금 쉬었다가 다시 시도해주세요."},
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+
+def limit_per_user(scope: str):
+    async def dependency(user_id: str = Depends(get_current_user_id)):
+        await enforce_rate_limit(scope, user_id)
+
+    return Depends(dependency)
+
+
+def limit_per_client(scope: str):
+    async def dependency(request: Request):
+        await enforce_rate_limit(scope, client_ip(request))
+
+    return Depends(dependency)
+
+
 def require_admin(token: Optional[str]):
     if token != ADMIN_TOKEN:
         http_error(401, "관리자 인증이 필요합니다.")
 
 
+def _link_signature(path: str, expires_at: int) -> str:
+    # Keyed on the admin token too, so rotating it revokes outstanding links.
+    key = f"{SECRET_KEY}:{ADMIN_TOKEN}".encode()
+    return hmac.new(key, f"admin-link:{path}:{expires_at}".encode(), "sha256").hexdigest()
+
+
+def create_link_token(path: str) -> Tuple[str, int]:
+    """A short-lived token valid for the single URL path ``path``."""
+    expires_at = int(time.time()) + ADMIN_LINK_TOKEN_TTL_SECONDS
+    return f"{expires_at}.{_link_signature(path, expires_at)}", expires_at
+
+
+def verify_link_token(token: str, path: str) -> bool:
+    expires_at, _, signature = token.partition(".")
+    if not expires_at.isdigit() or int(expires_at) < time.time():
+        return False
+    return hmac.compare_digest(_link_signature(path, int(expires_at)), signature)
+
+
+def require_admin_link(request: Request, x_admin_token: Optional[str], token: Optional[str]):
+    """Admin header, or a ``?token=`` minted by ``/api/admin/link-tokens`` for this exact path.
+
+    The admin token itself is never accepted in the query string, where it would
+    end up in access logs and browser history.
+    """
+    if x_admin_token is not None or token is None:
+        require_admin(x_admin_token)
+    elif not verify_link_token(token, request.url.path):
+        http_error(401, "링크가 만료되었거나 올바르지 않습니다.")
+
+
 def http_error(status: int, message: str):
     raise HTTPException(status_code=status, detail={"message": message})
 
@@ -214,7 +365,7 @@ def normalize_bin_code(bin_code: Optional[str]) -> Optional[str]:
     return code
 
 
-def serialize_festival(festival: Festival):
+def serialize_festival(festival: Union[Festival, FestivalSnapshot]):
     return {
         "id": festival.id,
         "name": festival.name,
@@ -224,10 +375,11 @@ def serialize_festival(festival: Festival):
         "centerLat": festival.center_lat,
         "centerLng": festival.center_lng,
         "radiusMeters": festival.radius_meters,
+        "geofence": [[list(point) for point in ring] for ring in festival.geofence] if festival.geofence else None,
     }
 
 
-def serialize_bin(bin_obj: TrashBin):
+def serialize_bin(bin_obj: Union[TrashBin, BinSnapshot]):
     return {
         "id": bin_obj.id,
         "code": bin_obj.code,
@@ -238,20 +390,25 @@ def serialize_bin(bin_obj: TrashBin):
     }
 
 
-def serialize_photo(photo: TrashPhoto):
-    return {
+def serialize_photo(photo: TrashPhoto, include_detections: bool = True):
+    data = {
         "id": photo.id,
         "userId": photo.user_id,
         "festivalId": photo.festival_id,
         "imageUrl": photo.image_url,
+        # Photos from before thumbnails existed fall back to the full image.
+        "thumbnailUrl": photo.thumbnail_url or photo.image_url,
         "status": photo.status,
         "points": photo.points,
         "hasTrash": photo.has_trash,
         "trashCount": photo.trash_count,
         "maxTrashConfidence": photo.max_trash_confidence,
-        "yoloRaw": photo.yolo_raw,
+        "analysisStatus": photo.analysis_status,
         "createdAt": photo.created_at.isoformat(),
     }
+    if include_detections:
+        data["yoloRaw"] = decode_detections(photo.detections)
+    return data
 
 
 def serialize_coupon(coupon: Coupon):
@@ -265,9 +422,102 @@ def serialize_coupon(coupon: Coupon):
     }
 
 
+def parse_include(include: Optional[str]) -> set:
+    return {part.strip() for part in (include or "").split(",") if part.strip()}
+
+
+def fetch_page(db: Session, stmt, model, limit: Optional[int], cursor: Optional[str]):
+    try:
+        return keyset_page(db, stmt, model.created_at, model.id, limit=limit, cursor=cursor)
+    except ValueError:
+        http_error(400, "잘못된 cursor 값입니다.")
+
+
+def hash_index_rows(db: Session, after: int):
+    """``(rowid, festival_id, unsigned hash)`` for photos inserted after rowid ``after``."""
+    rowid = literal_column("trash_photos.rowid", Integer)
+    rows = db.execute(
+        select(rowid, TrashPhoto.festival_id, TrashPhoto.hash_value)
+        .where(rowid > after, TrashPhoto.hash_value.is_not(None))
+        .order_by(rowid)
+        .execution_options(yield_per=5000)
+    )
+    return ((row_id, festival_id, from_signed64(value)) for row_id, festival_id, value in rows)
+
+
+def load_photo_hash_index() -> int:
+    with get_db() as db:
+        return photo_hash_index.load(hash_index_rows(db, 0))
+
+
+def sync_photo_hash_index(db: Session) -> int:
+    """Merge hashes other workers committed since the last load or sync."""
+    if not photo_hash_index.needs_sync():
+        return 0
+    return photo_hash_index.merge(hash_index_rows(db, photo_hash_index.watermark))
+
+
 @app.on_event("startup")
 def on_startup():
-    create_db_and_tables()
+    startup_state.mark_imported()
+    with startup_state.phase("database"):
+        create_db_and_tables()
+    with startup_state.phase("budget_counters"):
+        with get_db() as db:
+            rebuild_budget_counters(db, only_missing=True)
+    with startup_state.phase("hash_index"):
+        load_photo_hash_index()
+    with startup_state.phase("festival_cache"):
+        preload_festival_cache()
+    startup_state.caches_ready = True
+
+
+@app.on_event("startup")
+async def start_inference():
+    startup_state.reset_model()
+    with startup_state.phase("inference"):
+        if INFERENCE_PROCESSES > 0:
+            inference_pool.start()
+            inference_batcher.use_runner(inference_pool.run, concurrency=inference_pool.workers)
+        await inference_batcher.start()
+        await analysis_worker.start()
+    await summary_prewarmer.start()
+    startup_state.log_breakdown()
+    if YOLO_WARMUP_ON_STARTUP:
+        # In the background: the port opens now and /api/ready turns green once the model is warm.
+        startup_state.model_task = asyncio.create_task(warm_up_model())
+    else:
+        startup_state.model_ready = True
+
+
+async def warm_up_model():
+    started = time.perf_counter()
+    if inference_pool.running:
+        state = await run_in_threadpool(inference_pool.warm_up)
+        label = f"process_pool x{inference_pool.workers}"
+    else:
+        # Through the batcher, so warm-up never runs at the same time as a real batch.
+        await inference_batcher.submit(warmup_image())
+        state = model_state()
+        label = None
+    startup_state.mark_model_warm(time.perf_counter() - started, state, label)
+
+
+@app.on_event("shutdown")
+async def stop_inference():
+    if startup_state.model_task is not None:
+        startup_state.model_task.cancel()
+    await summary_prewarmer.stop()
+    await analysis_worker.stop()
+    await inference_batcher.stop()
+    await run_in_threadpool(inference_pool.stop)
+
+
+def preload_festival_cache() -> None:
+    with get_read_db() as db:
+        festival_ids = db.execute(select(Festival.id).limit(festival_cache.max_entries)).scalars().all()
+        for festival_id in festival_ids:
+            festival_cache.get(db, festival_id)
 
 
 def get_db_dep():
@@ -275,12 +525,75 @@ def get_db_dep():
         yield db
 
 
+def get_read_db_dep():
+    with get_read_db() as db:
+        yield db
+
+
+def invalidate_festival_cache(db: Session, festival_id: str) -> None:
+    # Drop now and again after commit, so a read racing the transaction cannot re-cache old rows.
+    festival_cache.invalidate(festival_id)
+    after_commit(db, lambda: festival_cache.invalidate(festival_id))
+
+
+def busy_retry(endpoint):
+    """Commit a sync write endpoint's work itself, re-running it if SQLite stays busy."""
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        return commit_with_retry(kwargs["db"], lambda: endpoint(*args, **kwargs))
+
+    return wrapper
+
+
+@app.exception_handler(OperationalError)
+async def handle_operational_error(request: Request, exc: OperationalError):
+    if not is_busy_error(exc):
+        raise exc
+    return JSONResponse(
+        status_code=503,
+        content={"detail": {"message": "요청이 몰리고 있어요. 잠시 후 다시 시도해주세요."}},
+        headers={"Retry-After": "1"},
+    )
+
+
 @app.get("/api/health")
 def health():
     return {"ok": True}
 
 
-@app.post("/api/auth/mock-login")
+def database_ready() -> bool:
+    try:
+        for db_engine in {engine, read_engine}:
+            with db_engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+    except Exception:
+        return False
+    return True
+
+
+@app.get("/api/ready")
+def ready():
+    """Readiness for the load balancer: 503 until the DB, caches and model are ready."""
+    if inference_pool.running:
+        model = {"state": "process_pool", "workers": inference_pool.workers, "worker": startup_state.model_state}
+    else:
+        model = model_state()
+    checks = {
+        "database": database_ready(),
+        "caches": startup_state.caches_ready,
+        # Without a warm-up the model loads on first use; a failed load still takes the instance out.
+        "model": startup_state.model_ready and model["state"] != "unavailable",
+    }
+    is_ready = all(checks.values())
+    return JSONResponse(
+        status_code=200 if is_ready else 503,
+        content={"ready": is_ready, "checks": checks, "model": model, "startup": startup_state.report()},
+    )
+
+
+@app.post("/api/auth/mock-login", dependencies=[limit_per_client("mock-login")])
+@busy_retry
 def mock_login(payload: dict, db: Session = Depends(get_db_dep)):
     nickname = payload.get("nickname")
     if not nickname:
@@ -294,7 +607,7 @@ def mock_login(payload: dict, db: Session = Depends(get_db_dep)):
 
 
 @app.get("/api/festivals")
-def list_festivals(db: Session = Depends(get_db_dep)):
+def list_festivals(db: Session = Depends(get_read_db_dep)):
     festivals = (
         db.execute(select(Festival).order_by(Festival.created_at.desc())).scalars().all()
     )
@@ -302,37 +615,42 @@ def list_festivals(db: Session = Depends(get_db_dep)):
 
 
 @app.get("/api/festivals/{festival_id}")
-def get_festival(festival_id: str, db: Session = Depends(get_db_dep)):
-    festival = db.get(Festival, festival_id)
-    if not festival:
+def get_festival(festival_id: str, db: Session = Depends(get_read_db_dep)):
+    entry = festival_cache.get(db, festival_id)
+    if not entry:
         http_error(404, "축제를 찾을 수 없습니다.")
-    bins = (
-        db.execute(
-            select(TrashBin).where(TrashBin.festival_id == festival_id).order_by(TrashBin.code.asc())
-        )
-        .scalars()
-        .all()
-    )
-    return {"festival": serialize_festival(festival), "bins": [serialize_bin(b) for b in bins]}
+    return Response(content=entry.festival_body, media_type="application/json")
 
 
 @app.get("/api/festivals/{festival_id}/trash-bins")
-def list_bins(festival_id: str, db: Session = Depends(get_db_dep)):
-    bins = (
-        db.execute(
-            select(TrashBin).where(TrashBin.festival_id == festival_id).order_by(TrashBin.code.asc())
-        )
-        .scalars()
-        .all()
-    )
-    return {"bins": [serialize_bin(b) for b in bins]}
+def list_bins(festival_id: str, db: Session = Depends(get_read_db_dep)):
+    entry = festival_cache.get(db, festival_id)
+    if not entry:
+        return {"bins": []}
+    return Response(content=entry.bins_body, media_type="application/json")
+
+
+@app.get("/api/festivals/{festival_id}/trash-bins/nearest")
+def nearest_bin(festival_id: str, lat: str, lng: str, db: Session = Depends(get_read_db_dep)):
+    entry = festival_cache.get(db, festival_id)
+    if not entry:
+        http_error(404, "축제를 찾을 수 없습니다.")
+    latitude = parse_coordinate(lat)
+    longitude = parse_coordinate(lng)
+    if latitude is None or longitude is None:
+        http_error(400, "lat와 lng가 필요합니다.")
+    found = entry.bin_index.nearest(latitude, longitude)
+    if found is None:
+        return {"bin": None, "distanceMeters": None}
+    bin_obj, distance = found
+    return {"bin": serialize_bin(bin_obj), "distanceMeters": round(distance, 1)}
 
 
 @app.get("/api/users/{user_id}/summary")
 def get_summary(
     user_id: str,
     festivalId: Optional[str] = None,
-    db: Session = Depends(get_db_dep),
+    db: Session = Depends(get_read_db_dep),
     current_user_id: str = Depends(get_current_user_id),
 ):
     if current_user_id != user_id:
@@ -340,13 +658,13 @@ def get_summary(
     festival_id = festivalId or DEFAULT_FESTIVAL_ID
     if not festival_id:
         http_error(400, "festivalId가 필요합니다.")
-    festival = db.get(Festival, festival_id)
+    festival = festival_cache.get_festival(db, festival_id)
     user = db.get(User, user_id)
     if not festival:
         http_error(404, "축제를 찾을 수 없습니다.")
     if not user:
         http_error(404, "유저를 찾을 수 없습니다.")
-    summary = ensure_summary(db, user_id, festival_id)
+    summary = read_summary(db, user_id, festival_id, get_today())
     return {"festival": serialize_festival(festival), "summary": {
         "totalPending": summary.total_pending,
         "totalActive": summary.total_active,
@@ -355,11 +673,50 @@ def get_summary(
     }}
 
 
+@app.get("/api/users/{user_id}/photos/analysis")
+def photo_analysis(
+    user_id: str,
+    ids: str = "",
+    db: Session = Depends(get_read_db_dep),
+    current_user_id: str = Depends(get_current_user_id),
+):
+    """Poll the analysis of recent uploads: ``?ids=a,b,c`` (up to ``ANALYSIS_POLL_MAX_IDS``)."""
+    if current_user_id != user_id:
+        http_error(403, "본인 정보만 조회할 수 있습니다.")
+    photo_ids = [photo_id for photo_id in ids.split(",") if photo_id]
+    if not photo_ids or len(photo_ids) > ANALYSIS_POLL_MAX_IDS:
+        http_error(400, f"ids는 1~{ANALYSIS_POLL_MAX_IDS}개여야 합니다.")
+    rows = db.execute(
+        select(
+            TrashPhoto.id,
+            TrashPhoto.analysis_status,
+            TrashPhoto.has_trash,
+            TrashPhoto.trash_count,
+            TrashPhoto.max_trash_confidence,
+        ).where(TrashPhoto.id.in_(photo_ids), TrashPhoto.user_id == user_id)
+    ).all()
+    return {
+        "photos": [
+            {
+                "id": row.id,
+                "analysisStatus": row.analysis_status,
+                "hasTrash": row.has_trash,
+                "trashCount": row.trash_count,
+                "maxTrashConfidence": row.max_trash_confidence,
+            }
+            for row in rows
+        ]
+    }
+
+
 @app.get("/api/users/{user_id}/photos")
 def list_photos(
     user_id: str,
     festivalId: Optional[str] = None,
-    db: Session = Depends(get_db_dep),
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    include: Optional[str] = None,
+    db: Session = Depends(get_read_db_dep),
     current_user_id: str = Depends(get_current_user_id),
 ):
     if current_user_id != user_id:
@@ -367,115 +724,137 @@ def list_photos(
     festival_id = festivalId or DEFAULT_FESTIVAL_ID
     if not festival_id:
         http_error(400, "festivalId가 필요합니다.")
-    photos = (
-        db.execute(
-            select(TrashPhoto)
-            .where(TrashPhoto.user_id == user_id, TrashPhoto.festival_id == festival_id)
-            .order_by(TrashPhoto.created_at.desc())
-        )
-        .scalars()
-        .all()
-    )
-    return {"photos": [serialize_photo(p) for p in photos]}
+    include_detections = "detections" in parse_include(include)
+    stmt = select(TrashPhoto).where(TrashPhoto.user_id == user_id, TrashPhoto.festival_id == festival_id)
+    if not include_detections:
+        stmt = stmt.options(defer(TrashPhoto.detections, raiseload=True))
+    photos, next_cursor = fetch_page(db, stmt, TrashPhoto, limit, cursor)
+    return {
+        "photos": [serialize_photo(p, include_detections=include_detections) for p in photos],
+        "nextCursor": next_cursor,
+    }
+
 
+@dataclass
+class PreparedUpload:
+    festival: FestivalSnapshot
+    user_id: str
+    content_sha256: str
+    hash: str
+    hash_value: Optional[int]
+    data: bytes = b""
+    thumbnail: bytes = b""
+    save_paths: Tuple[Path, ...] = ()
+    # Chosen up front so a commit retry rewrites the same files.
+    photo_id: str = field(default_factory=generate_id)
 
-@app.post("/api/festivals/{festival_id}/trash-photos")
-def upload_photo(
+
+def discard_upload(prepared: PreparedUpload) -> None:
+    for path in prepared.save_paths:
+        path.unlink(missing_ok=True)
+    if prepared.hash_value is not None:
+        photo_hash_index.release(prepared.festival.id, prepared.hash_value)
+
+
+def prepare_upload(
+    db: Session,
     festival_id: str,
-    userId: str = Form(None),
-    lat: Optional[str] = Form(None),
-    lng: Optional[str] = Form(None),
-    image: UploadFile = File(...),
-    db: Session = Depends(get_db_dep),
-    current_user_id: str = Depends(get_current_user_id),
-):
-    user_id = userId or current_user_id
+    user_id: str,
+    current_user_id: str,
+    lat: Optional[str],
+    lng: Optional[str],
+    image: UploadFile,
+) -> PreparedUpload:
+    """Validate and hash the upload in memory; nothing touches disk until it is accepted."""
     if user_id != current_user_id:
         http_error(403, "본인 계정으로만 업로드할 수 있습니다.")
     user = db.get(User, user_id)
-    festival = db.get(Festival, festival_id)
+    festival = festival_cache.get_festival(db, festival_id)
     if not user:
         http_error(404, "유저를 찾을 수 없습니다.")
     if not festival:
         http_error(404, "축제를 찾을 수 없습니다.")
 
-    latitude = float(lat) if lat is not None else None
-    longitude = float(lng) if lng is not None else None
+    latitude = parse_coordinate(lat)
+    longitude = parse_coordinate(lng)
     if not is_inside_festival(festival, latitude, longitude):
         http_error(400, "축제장 안에서만 참여할 수 있어요.")
 
-    one_minute_ago = datetime.utcnow() - timedelta(minutes=1)
-    recent_count = (
-        db.execute(
-            select(func.count(TrashPhoto.id)).where(
-                TrashPhoto.user_id == user_id,
-                TrashPhoto.created_at >= one_minute_ago,
-            )
-        )
-        .scalar_one()
-    )
-    if recent_count >= 5:
-        http_error(429, "조금 쉬었다가 다시 시도해주세요.")
-
-    extension = Path(image.filename or "").suffix or ".jpg"
-    file_name = f"{int(time.time())}-{int(time.time_ns() % 1e6)}{extension}"
-    save_path = UPLOAD_DIR / file_name
-    with save_path.open("wb") as buffer:
-        shutil.copyfileobj(image.file, buffer)
-
-    new_hash = compute_image_hash(save_path)
-    new_hash_obj = parse_hash(new_hash)
-    recent_photos = (
-        db.execute(
-            select(TrashPhoto)
-            .where(TrashPhoto.user_id == user_id)
-            .order_by(TrashPhoto.created_at.desc())
-            .limit(20)
-        )
-        .scalars()
-        .all()
+    with span("read"):
+        data, content_sha256 = read_upload(image)
+    with span("decode"):
+        img = decode_image(data)
+        del data
+        # Hashing and inference start from the small model-input copy.
+        model_input = model_input_copy(img)
+    with span("hash"):
+        new_hash = compute_image_hash(model_input)
+
+    new_hash_value = hash_to_int(new_hash)
+    sync_photo_hash_index(db)
+    # Festival-wide, cross-account check; the claim is released if the upload is rejected later.
+    if new_hash_value is not None and not photo_hash_index.claim(festival_id, new_hash_value):
+        http_error(400, "같은 사진으로는 다시 적립할 수 없어요.")
+
+    prepared = PreparedUpload(
+        festival=festival,
+        user_id=user_id,
+        content_sha256=content_sha256,
+        hash=new_hash,
+        hash_value=new_hash_value,
     )
-    for photo in recent_photos:
-        existing_hash = parse_hash(photo.hash) if photo.hash else None
-        if existing_hash and new_hash_obj:
-            distance = new_hash_obj - existing_hash
-        else:
-            distance = hamming_distance(photo.hash, new_hash)
-        if distance <= 5:
-            save_path.unlink(missing_ok=True)
-            http_error(400, "같은 사진으로는 다시 적립할 수 없어요.")
-
-    yolo_result = analyze_trash(str(save_path))
-
-    summary = ensure_summary(db, user_id, festival_id)
-    today_total = summary.total_pending + summary.total_active + summary.total_consumed
-    if today_total >= festival.per_user_daily_cap:
-        save_path.unlink(missing_ok=True)
-        http_error(400, "오늘 한도가 모두 사용되었습니다.")
-
     try:
+        summary = read_summary(db, user_id, festival_id, get_today())
+        today_total = summary.total_pending + summary.total_active + summary.total_consumed
+        if today_total >= festival.per_user_daily_cap:
+            http_error(400, "오늘 한도가 모두 사용되었습니다.")
+
         ensure_budget_room(db, festival, festival.per_photo_point)
-    except HTTPException:
-        save_path.unlink(missing_ok=True)
+        # Encoded only once the cheap checks pass.
+        with span("encode"):
+            prepared.data, prepared.thumbnail = encode_derivatives(img, model_input)
+    except BaseException:
+        discard_upload(prepared)
         raise
+    return prepared
+
+
+def finalize_upload(db: Session, prepared: PreparedUpload):
+    """Reserve budget, write the accepted image to disk and record the PENDING photo.
+
+    YOLO analysis is queued in the same transaction and runs after the response.
+    """
+    festival = prepared.festival
+    reserve_budget_or_fail(db, festival, festival.per_photo_point)
+    # The photo ID keeps names unique: the same bytes can be accepted once per festival, and
+    # discard_upload must never unlink another photo's file.
+    stem = f"{prepared.content_sha256[:32]}_{prepared.photo_id}"
+    file_name = f"{stem}{NORMALIZED_EXTENSION}"
+    thumbnail_name = f"{stem}{THUMBNAIL_SUFFIX}"
+    prepared.save_paths = (UPLOAD_DIR / file_name, UPLOAD_DIR / thumbnail_name)
+    with span("file_write"):
+        prepared.save_paths[0].write_bytes(prepared.data)
+        prepared.save_paths[1].write_bytes(prepared.thumbnail)
 
     photo = TrashPhoto(
-        user_id=user_id,
-        festival_id=festival_id,
+        id=prepared.photo_id,
+        user_id=prepared.user_id,
+        festival_id=festival.id,
         image_url=f"/uploads/{file_name}",
-        hash=new_hash,
+        thumbnail_url=f"/uploads/{thumbnail_name}",
+        hash=prepared.hash,
+        hash_value=to_signed64(prepared.hash_value) if prepared.hash_value is not None else None,
+        content_sha256=prepared.content_sha256,
         status=PHOTO_STATUS_PENDING,
         points=festival.per_photo_point,
-        has_trash=yolo_result.get("has_trash") if isinstance(yolo_result, dict) else None,
-        trash_count=yolo_result.get("trash_count") if isinstance(yolo_result, dict) else None,
-        max_trash_confidence=yolo_result.get("max_trash_confidence") if isinstance(yolo_result, dict) else None,
-        yolo_raw=yolo_result.get("raw_detections") if isinstance(yolo_result, dict) else None,
+        analysis_status=ANALYSIS_ANALYZING,
     )
     db.add(photo)
-    summary.total_pending += festival.per_photo_point
     db.flush()
-    db.refresh(photo)
-    db.refresh(summary)
+    enqueue_analysis(db, photo.id)
+    after_commit(db, analysis_worker.notify)
+    summary = add_to_summary(db, prepared.user_id, festival.id, get_today(), pending=festival.per_photo_point)
+    after_commit(db, lambda: live_summary.record_upload(festival.id, prepared.user_id, festival.per_photo_point))
 
     return {
         "photo": serialize_photo(photo),
@@ -488,7 +867,29 @@ def upload_photo(
     }
 
 
-@app.post("/api/festivals/{festival_id}/trash-bins/scan")
+@app.post("/api/festivals/{festival_id}/trash-photos", dependencies=[limit_per_user("upload")])
+async def upload_photo(
+    festival_id: str,
+    userId: str = Form(None),
+    lat: Optional[str] = Form(None),
+    lng: Optional[str] = Form(None),
+    image: UploadFile = File(...),
+    db: Session = Depends(get_db_dep),
+    current_user_id: str = Depends(get_current_user_id),
+):
+    # DB and file work run in the threadpool. Analysis is queued, so the response never waits on the model.
+    prepared = await run_in_threadpool(
+        prepare_upload, db, festival_id, userId or current_user_id, current_user_id, lat, lng, image
+    )
+    try:
+        return await run_in_threadpool(commit_with_retry, db, lambda: finalize_upload(db, prepared))
+    except BaseException:
+        discard_upload(prepared)
+        raise
+
+
+@app.post("/api/festivals/{festival_id}/trash-bins/scan", dependencies=[limit_per_user("scan")])
+@busy_retry
 def scan_bin(
     festival_id: str,
     payload: dict,
@@ -504,14 +905,8 @@ def scan_bin(
     if not user_id or not bin_code:
         http_error(400, "userId와 binCode가 필요합니다.")
 
-    festival = db.get(Festival, festival_id)
-    bin_obj = (
-        db.execute(
-            select(TrashBin).where(TrashBin.festival_id == festival_id, TrashBin.code == bin_code)
-        )
-        .scalars()
-        .first()
-    )
+    festival = festival_cache.get_festival(db, festival_id)
+    bin_obj = festival_cache.get_bin(db, festival_id, bin_code)
     user = db.get(User, user_id)
     if not festival:
         http_error(404, "축제를 찾을 수 없습니다.")
@@ -520,72 +915,63 @@ def scan_bin(
     if not user:
         http_error(404, "유저를 찾을 수 없습니다.")
 
-    latitude = float(lat) if lat is not None else None
-    longitude = float(lng) if lng is not None else None
+    latitude = parse_coordinate(lat)
+    longitude = parse_coordinate(lng)
     if not is_inside_festival(festival, latitude, longitude):
         http_error(400, "축제장 안에서만 참여할 수 있어요.")
+    if not is_near_bin(bin_obj, latitude, longitude):
+        http_error(400, "수거함 가까이에서 QR을 스캔해 주세요.")
 
-    if get_budget_usage(db, festival_id) >= festival.budget:
+    with span("budget"):
+        budget_used = get_budget_usage(db, festival_id)
+    if budget_used >= festival.budget:
         http_error(400, "오늘 리워드 예산이 모두 소진되었습니다.")
 
-    summary = ensure_summary(db, user_id, festival_id)
-    remaining_cap = max(0, festival.per_user_daily_cap - (summary.total_active + summary.total_consumed))
-    if remaining_cap <= 0:
-        http_error(400, "오늘 한도가 모두 사용되었습니다.")
-
+    today = get_today()
     cutoff = datetime.utcnow() - timedelta(minutes=PENDING_ACTIVATION_MINUTES)
-    pending_photos = (
-        db.execute(
-            select(TrashPhoto)
-            .where(
-                TrashPhoto.user_id == user_id,
-                TrashPhoto.festival_id == festival_id,
-                TrashPhoto.status == PHOTO_STATUS_PENDING,
-                TrashPhoto.created_at >= cutoff,
-            )
-            .order_by(TrashPhoto.created_at.asc())
-        )
-        .scalars()
-        .all()
+    activated, converted, totals = activate_pending_photos(
+        db, user_id, festival_id, today, festival.per_user_daily_cap, cutoff
     )
-    if not pending_photos:
-        http_error(400, "최근 30분 내 지급 대기 포인트가 없습니다.")
+    if not activated:
+        explain_nothing_activated(db, festival, user_id, today, cutoff)
 
-    activated = 0
-    ids_to_activate = []
-    for photo in pending_photos:
-        if activated + photo.points > remaining_cap:
-            break
-        activated += photo.points
-        ids_to_activate.append(photo.id)
-
-    if not ids_to_activate:
-        http_error(400, "오늘 한도를 모두 사용했습니다.")
-
-    db.execute(
-        TrashPhoto.__table__.update()
-        .where(TrashPhoto.id.in_(ids_to_activate))
-        .values(status=PHOTO_STATUS_ACTIVE)
-    )
-    summary.total_pending -= activated
-    summary.total_active += activated
     db.add(BinScan(festival_id=festival_id, bin_id=bin_obj.id, user_id=user_id))
     db.flush()
-    db.refresh(summary)
+    after_commit(db, lambda: live_summary.record_scan(festival_id, bin_obj.id, activated))
 
     return {
         "activated": activated,
-        "convertedCount": len(ids_to_activate),
+        "convertedCount": converted,
         "binName": bin_obj.name,
         "summary": {
-            "totalPending": summary.total_pending,
-            "totalActive": summary.total_active,
-            "totalConsumed": summary.total_consumed,
+            "totalPending": totals.total_pending,
+            "totalActive": totals.total_active,
+            "totalConsumed": totals.total_consumed,
             "cap": festival.per_user_daily_cap,
         },
     }
 
 
+def explain_nothing_activated(db: Session, festival: FestivalSnapshot, user_id: str, today: str, since: datetime):
+    """Only on the failure path: work out why no pending photo could be activated."""
+    summary = read_summary(db, user_id, festival.id, today)
+    if festival.per_user_daily_cap - (summary.total_active + summary.total_consumed) <= 0:
+        http_error(400, "오늘 한도가 모두 사용되었습니다.")
+    has_pending = db.execute(
+        select(TrashPhoto.id)
+        .where(
+            TrashPhoto.user_id == user_id,
+            TrashPhoto.festival_id == festival.id,
+            TrashPhoto.status == PHOTO_STATUS_PENDING,
+            TrashPhoto.created_at >= since,
+        )
+        .limit(1)
+    ).first()
+    if not has_pending:
+        http_error(400, "최근 30분 내 지급 대기 포인트가 없습니다.")
+    http_error(400, "오늘 한도를 모두 사용했습니다.")
+
+
 @app.get("/api/festivals/{festival_id}/shops")
 def list_shops(festival_id: str):
     shops = [
@@ -596,7 +982,8 @@ def list_shops(festival_id: str):
     return {"shops": shops}
 
 
-@app.post("/api/festivals/{festival_id}/coupons")
+@app.post("/api/festivals/{festival_id}/coupons", dependencies=[limit_per_user("coupon")])
+@busy_retry
 def issue_coupon(
     festival_id: str,
     payload: dict,
@@ -608,55 +995,52 @@ def issue_coupon(
         http_error(403, "본인 계정으로만 쿠폰을 발급할 수 있습니다.")
     shop_name = payload.get("shopName")
     amount = payload.get("amount")
-    amount_int = int(amount) if amount is not None else None
+    try:
+        amount_int = int(amount) if amount is not None else None
+    except (TypeError, ValueError):
+        amount_int = None
     if not user_id or not shop_name or amount_int is None:
         http_error(400, "요청 파라미터가 부족합니다.")
+    if amount_int <= 0:
+        http_error(400, "쿠폰 금액이 올바르지 않습니다.")
 
-    festival = db.get(Festival, festival_id)
+    festival = festival_cache.get_festival(db, festival_id)
     if not festival:
         http_error(404, "축제를 찾을 수 없습니다.")
 
-    ensure_summary(db, user_id, festival_id)
-    summary = (
-        db.execute(
-            select(UserDailySummary).where(
-                UserDailySummary.user_id == user_id,
-                UserDailySummary.festival_id == festival_id,
-                UserDailySummary.date == get_today(),
-            )
-        )
-        .scalars()
-        .first()
-    )
-    if not summary:
-        http_error(400, "요약 정보를 찾을 수 없습니다.")
-    if summary.total_active < amount_int:
+    # Conditional UPDATE: points are spent only if they are still there.
+    if spend_active_points(db, user_id, festival_id, get_today(), amount_int) is None:
         http_error(400, "사용 가능 포인트가 부족합니다.")
+    # Also conditional; a failure rolls the spend back with the request's transaction.
+    reserve_budget_or_fail(db, festival, amount_int)
 
-    ensure_budget_room(db, festival, amount_int)
-
-    code = f"HDFEST-{amount_int}-{str(int(time.time_ns()))[-6:]}".upper()
-    summary.total_active -= amount_int
-    summary.total_consumed += amount_int
     coupon = Coupon(
         user_id=user_id,
         festival_id=festival_id,
         shop_name=shop_name,
         amount=amount_int,
-        code=code,
+        code=coupon_code(amount_int),
         status=COUPON_STATUS_ISSUED,
     )
     db.add(coupon)
     db.flush()
-    db.refresh(coupon)
+    after_commit(db, lambda: live_summary.record_coupon(festival_id, amount_int))
     return {"coupon": serialize_coupon(coupon)}
 
 
+def coupon_code(amount: int) -> str:
+    # Random suffix: a clock-derived one collides when many coupons are issued at once.
+    suffix = "".join(secrets.choice(COUPON_CODE_ALPHABET) for _ in range(6))
+    return f"HDFEST-{amount}-{suffix}"
+
+
 @app.get("/api/users/{user_id}/coupons")
 def list_coupons(
     user_id: str,
     festivalId: Optional[str] = None,
-    db: Session = Depends(get_db_dep),
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db_dep),
     current_user_id: str = Depends(get_current_user_id),
 ):
     if current_user_id != user_id:
@@ -664,16 +1048,9 @@ def list_coupons(
     festival_id = festivalId or DEFAULT_FESTIVAL_ID
     if not festival_id:
         http_error(400, "festivalId가 필요합니다.")
-    coupons = (
-        db.execute(
-            select(Coupon)
-            .where(Coupon.user_id == user_id, Coupon.festival_id == festival_id)
-            .order_by(Coupon.created_at.desc())
-        )
-        .scalars()
-        .all()
-    )
-    return {"coupons": [serialize_coupon(c) for c in coupons]}
+    stmt = select(Coupon).where(Coupon.user_id == user_id, Coupon.festival_id == festival_id)
+    coupons, next_cursor = fetch_page(db, stmt, Coupon, limit, cursor)
+    return {"coupons": [serialize_coupon(c) for c in coupons], "nextCursor": next_cursor}
 
 
 @app.post("/api/admin/login")
@@ -684,7 +1061,19 @@ def admin_login(payload: dict):
     return {"token": ADMIN_TOKEN}
 
 
+@app.post("/api/admin/link-tokens")
+def admin_link_token(payload: dict, x_admin_token: Optional[str] = Header(None)):
+    """Mint a ``?token=`` for one download or stream URL (``{"path": "/api/admin/..."}``)."""
+    require_admin(x_admin_token)
+    path = str(payload.get("path") or "")
+    if not ADMIN_LINK_PATHS.match(path):
+        http_error(400, "링크 토큰을 발급할 수 없는 경로입니다.")
+    token, expires_at = create_link_token(path)
+    return {"token": token, "expiresAt": expires_at}
+
+
 @app.post("/api/admin/festivals")
+@busy_retry
 def create_festival(
     payload: dict, x_admin_token: Optional[str] = Header(None), db: Session = Depends(get_db_dep)
 ):
@@ -698,6 +1087,10 @@ def create_festival(
     radius_meters = int(payload.get("radiusMeters")) if payload.get("radiusMeters") is not None else None
     if not name or budget is None or per_user_daily_cap is None or per_photo_point is None:
         http_error(400, "필수 필드가 누락되었습니다.")
+    try:
+        geofence = parse_geofence(payload.get("geofence"))
+    except (TypeError, ValueError):
+        http_error(400, "geofence는 [[[lat, lng], ...], ...] 형식의 다각형 목록이어야 합니다.")
     festival = Festival(
         name=name,
         budget=int(budget),
@@ -706,14 +1099,19 @@ def create_festival(
         center_lat=center_lat,
         center_lng=center_lng,
         radius_meters=radius_meters,
+        geofence=[[list(point) for point in ring] for ring in geofence] if geofence else None,
     )
     db.add(festival)
     db.flush()
+    db.add(FestivalBudget(festival_id=festival.id, used=0))
+    db.flush()
     db.refresh(festival)
+    invalidate_festival_cache(db, festival.id)
     return {"festival": serialize_festival(festival)}
 
 
 @app.post("/api/admin/festivals/{festival_id}/trash-bins/generate")
+@busy_retry
 def generate_bins(
     festival_id: str,
     payload: dict,
@@ -722,88 +1120,277 @@ def generate_bins(
 ):
     require_admin(x_admin_token or payload.get("token"))
     count = payload.get("count")
-    parsed_count = int(count) if count is not None else None
+    locations = payload.get("locations") or []
+    parsed_count = int(count) if count is not None else len(locations)
     if not parsed_count or parsed_count <= 0:
         http_error(400, "생성할 수거함 수를 입력해 주세요.")
-    festival = db.get(Festival, festival_id)
-    if not festival:
-        http_error(404, "축제를 찾을 수 없습니다.")
-    existing = (
-        db.execute(select(func.count(TrashBin.id)).where(TrashBin.festival_id == festival_id)).scalar_one()
-    )
-    bins = []
-    for idx in range(parsed_count):
-        seq = existing + idx + 1
-        code = f"TRASH_BIN_{str(seq).zfill(2)}"
-        bin_obj = TrashBin(
-            festival_id=festival_id,
-            code=code,
-            name=f"공식 수거함 #{seq}",
+    if locations and len(locations) != parsed_count:
+        http_error(400, "locations 개수가 count와 다릅니다.")
+    coordinates = []
+    for location in locations:
+        if not isinstance(location, dict):
+            http_error(400, "locations는 {lat, lng} 목록이어야 합니다.")
+        coordinates.append((parse_coordinate(location.get("lat")), parse_coordinate(location.get("lng"))))
+    if parsed_count > BIN_BATCH_MAX_SIZE:
+        http_error(400, f"한 번에 최대 {BIN_BATCH_MAX_SIZE}개까지 만들 수 있습니다.")
+    specs = [
+        BinSpec(
             description="축제 운영팀 배치",
+            latitude=coordinates[idx][0] if coordinates else None,
+            longitude=coordinates[idx][1] if coordinates else None,
         )
-        db.add(bin_obj)
-        bins.append(bin_obj)
-    db.flush()
-    for bin_obj in bins:
-        db.refresh(bin_obj)
-    return {"bins": [serialize_bin(b) for b in bins]}
+        for idx in range(parsed_count)
+    ]
+    return {"bins": provision_bins(db, festival_id, specs)}
 
 
-@app.get("/api/admin/festivals/{festival_id}/summary")
-def admin_summary(
-    festival_id: str, x_admin_token: Optional[str] = Header(None), db: Session = Depends(get_db_dep)
+@app.post("/api/admin/festivals/{festival_id}/trash-bins/import")
+@busy_retry
+def import_bins(
+    festival_id: str,
+    file: UploadFile = File(...),
+    token: Optional[str] = Form(None),
+    x_admin_token: Optional[str] = Header(None),
+    db: Session = Depends(get_db_dep),
 ):
-    require_admin(x_admin_token)
-    festival = db.get(Festival, festival_id)
-    if not festival:
+    require_admin(x_admin_token or token)
+    # busy_retry may run this again; read the upload from the start each time.
+    file.file.seek(0)
+    data = file.file.read(BIN_IMPORT_MAX_BYTES + 1)
+    if len(data) > BIN_IMPORT_MAX_BYTES:
+        http_error(413, "CSV 파일이 너무 커요.")
+    try:
+        specs = parse_bins_csv(data)
+    except ValueError as exc:
+        http_error(400, str(exc))
+    return {"bins": provision_bins(db, festival_id, specs)}
+
+
+def provision_bins(db: Session, festival_id: str, specs):
+    try:
+        bins = create_bins(db, festival_id, specs)
+    except LookupError:
         http_error(404, "축제를 찾을 수 없습니다.")
+    invalidate_festival_cache(db, festival_id)
+    return [serialize_bin(b) for b in bins]
 
-    photos_group = (
-        db.execute(
-            select(TrashPhoto.status, func.sum(TrashPhoto.points)).where(TrashPhoto.festival_id == festival_id).group_by(
-                TrashPhoto.status
-            )
-        )
-        .all()
-    )
-    bin_usage = (
-        db.execute(
-            select(BinScan.bin_id, func.count(BinScan.bin_id))
-            .where(BinScan.festival_id == festival_id)
-            .group_by(BinScan.bin_id)
-        )
-        .all()
-    )
-    distinct_users = (
-        db.execute(
-            select(func.count(func.distinct(TrashPhoto.user_id))).where(TrashPhoto.festival_id == festival_id)
-        ).scalar_one()
-    )
 
-    bins = (
-        db.execute(select(TrashBin).where(TrashBin.festival_id == festival_id)).scalars().all()
+QR_EXPORT_FORMATS = {
+    "zip": (stream_zip, "application/zip"),
+    "pdf": (stream_pdf, "application/pdf"),
+}
+
+
+@app.get("/api/admin/festivals/{festival_id}/trash-bins/qr-codes")
+def export_bin_qr_codes(
+    festival_id: str,
+    request: Request,
+    format: str = "zip",
+    token: Optional[str] = None,
+    x_admin_token: Optional[str] = Header(None),
+):
+    # Opened as a plain download link, so a link token may come as ?token=.
+    require_admin_link(request, x_admin_token, token)
+    if format not in QR_EXPORT_FORMATS:
+        http_error(400, "format은 zip 또는 pdf만 가능합니다.")
+    with get_read_db() as db:
+        if festival_cache.get_festival(db, festival_id) is None:
+            http_error(404, "축제를 찾을 수 없습니다.")
+    render, media_type = QR_EXPORT_FORMATS[format]
+    # Starlette iterates the sync generator in the threadpool, one label or page at a time.
+    return StreamingResponse(
+        render(iter_bin_codes(festival_id)),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="trash-bins-{festival_id}.{format}"'},
     )
-    bin_lookup = {b.id: b for b in bins}
 
-    total_pending = 0
-    total_active = 0
-    for status, total in photos_group:
-        if status == PHOTO_STATUS_PENDING:
-            total_pending = total or 0
-        if status == PHOTO_STATUS_ACTIVE:
-            total_active = total or 0
 
-    usage = [
-        {"binId": bin_id, "count": count, "code": bin_lookup.get(bin_id).code if bin_lookup.get(bin_id) else None}
-        for bin_id, count in bin_usage
+@app.get("/api/admin/festivals/{festival_id}/exports/{table}")
+def export_festival_data(
+    festival_id: str,
+    table: str,
+    request: Request,
+    format: str = "csv",
+    start: Optional[str] = Query(None, alias="from"),
+    end: Optional[str] = Query(None, alias="to"),
+    since: Optional[str] = None,
+    token: Optional[str] = None,
+    x_admin_token: Optional[str] = Header(None),
+):
+    # Download links cannot set headers, so a link token may come as ?token=.
+    require_admin_link(request, x_admin_token, token)
+    if table not in EXPORT_TABLES:
+        http_error(404, "내보낼 수 없는 데이터입니다.")
+    if format not in EXPORT_FORMATS:
+        http_error(400, "format은 csv, ndjson, parquet 중 하나여야 합니다.")
+    if format == "parquet" and not parquet_available():
+        http_error(501, "Parquet 내보내기에는 pyarrow 설치가 필요합니다.")
+    try:
+        start_at = parse_bound(start) if start else None
+        end_at = parse_bound(end, end=True) if end else None
+    except ValueError:
+        http_error(400, "날짜 형식이 올바르지 않습니다.")
+    with get_read_db() as db:
+        if festival_cache.get_festival(db, festival_id) is None:
+            http_error(404, "축제를 찾을 수 없습니다.")
+        try:
+            stmt, next_cursor = prepare_export(db, table, festival_id, start_at, end_at, since)
+        except ValueError:
+            http_error(400, "잘못된 cursor 값입니다.")
+    headers = {"Content-Disposition": f'attachment; filename="{table}-{festival_id}.{format}"'}
+    if next_cursor:
+        headers["X-Export-Cursor"] = next_cursor
+    # Starlette iterates the sync generator in the threadpool, one batch per chunk.
+    return StreamingResponse(export_stream(table, format, stmt), media_type=EXPORT_FORMATS[format], headers=headers)
+
+
+def threadpool_usage():
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    return [
+        (("busy",), limiter.borrowed_tokens),
+        (("limit",), limiter.total_tokens),
+        (("waiting",), limiter.statistics().tasks_waiting),
     ]
 
+
+def db_pool_usage():
+    pools = {"write": engine.pool} if read_engine is engine else {"write": engine.pool, "read": read_engine.pool}
+    return [((name,), pool.checkedout()) for name, pool in pools.items() if hasattr(pool, "checkedout")]
+
+
+# Read on the event loop at scrape time (the metrics endpoint is async).
+metrics_registry.gauge(
+    "cashup_threadpool_threads", "AnyIO worker threads running sync endpoints.", threadpool_usage, ("state",)
+)
+metrics_registry.gauge("cashup_db_pool_connections_in_use", "Checked-out DB connections.", db_pool_usage, ("pool",))
+metrics_registry.gauge(
+    "cashup_inference_queue_depth", "Images waiting for a YOLO batch.", lambda: [((), inference_batcher.queue_depth())]
+)
+metrics_registry.gauge(
+    "cashup_inference_batches_in_flight",
+    "YOLO batches currently running.",
+    lambda: [((), inference_batcher.in_flight_batches())],
+)
+metrics_registry.gauge(
+    "cashup_analysis_jobs_total",
+    "Background analysis attempts, by outcome.",
+    lambda: [
+        (("completed",), analysis_worker.completed),
+        (("retried",), analysis_worker.retried),
+        (("failed",), analysis_worker.failed),
+        (("deferred",), analysis_worker.deferred),
+    ],
+    ("outcome",),
+    kind="counter",
+)
+metrics_registry.gauge(
+    "cashup_inference_images_total",
+    "Images through the inference batcher, by outcome.",
+    lambda: [(("processed",), inference_batcher.processed), (("rejected",), inference_batcher.rejected)],
+    ("outcome",),
+    kind="counter",
+)
+
+
+@app.get("/api/admin/metrics")
+async def metrics(x_admin_token: Optional[str] = Header(None), authorization: Optional[str] = Header(None)):
+    # Prometheus scrape configs send credentials as "Authorization: Bearer <token>".
+    bearer = authorization[7:] if authorization and authorization.startswith("Bearer ") else None
+    require_admin(x_admin_token or bearer)
+    return Response(content=metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/api/admin/inference/stats")
+def inference_stats(x_admin_token: Optional[str] = Header(None)):
+    require_admin(x_admin_token)
+    return {"inference": inference_batcher.stats(), "analysis": analysis_worker.stats()}
+
+
+@app.post("/api/admin/analysis/requeue")
+@busy_retry
+def requeue_analysis(
+    payload: Optional[dict] = None, x_admin_token: Optional[str] = Header(None), db: Session = Depends(get_db_dep)
+):
+    """Queue ``FAILED`` analyses again (``{"festivalId": ...}`` narrows it to one festival)."""
+    require_admin(x_admin_token)
+    requeued = requeue_failed(db, now(), (payload or {}).get("festivalId"))
+    if requeued:
+        after_commit(db, analysis_worker.notify)
+    return {"requeued": requeued}
+
+
+def render_admin_summary(festival: FestivalSnapshot, bins_by_id: dict, view: AggregateView) -> dict:
+    usage = [
+        {"binId": bin_id, "count": count, "code": bins_by_id[bin_id].code if bin_id in bins_by_id else None}
+        for bin_id, count in view.bin_scans.items()
+    ]
     return {
         "festival": serialize_festival(festival),
-        "totalParticipants": int(distinct_users or 0),
-        "totalPending": int(total_pending or 0),
-        "totalActive": int(total_active or 0),
-        "budgetUsed": get_budget_usage(db, festival_id),
-        "budgetRemaining": max(0, festival.budget - get_budget_usage(db, festival_id)),
+        "totalParticipants": view.participants,
+        "totalPending": view.pending_points,
+        "totalActive": view.active_points,
+        "budgetUsed": view.budget_used,
+        "budgetRemaining": max(0, festival.budget - view.budget_used),
         "binUsage": usage,
     }
+
+
+def load_admin_summary(festival_id: str) -> Optional[dict]:
+    """Dashboard numbers from the in-memory aggregates; queries only to (re)seed them."""
+    with get_read_db() as db:
+        entry = festival_cache.get(db, festival_id)
+        if entry is None:
+            return None
+        return render_admin_summary(entry.festival, entry.bins_by_id, live_summary.view(db, festival_id))
+
+
+@app.get("/api/admin/festivals/{festival_id}/summary")
+def admin_summary(festival_id: str, x_admin_token: Optional[str] = Header(None)):
+    require_admin(x_admin_token)
+    summary = load_admin_summary(festival_id)
+    if summary is None:
+        http_error(404, "축제를 찾을 수 없습니다.")
+    return summary
+
+
+def sse_event(event: str, data: Any) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
+
+
+async def summary_events(request: Request, festival_id: str, first: dict):
+    """Yield the full summary once, then only the fields that changed."""
+    last = first
+    yield sse_event("summary", first)
+    with live_summary.subscribe(festival_id) as changed:
+        while not await request.is_disconnected():
+            try:
+                await asyncio.wait_for(changed.wait(), timeout=SUMMARY_STREAM_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield b": keep-alive\n\n"
+                if not live_summary.needs_seed(festival_id):
+                    continue
+            await asyncio.sleep(SUMMARY_STREAM_MIN_INTERVAL_SECONDS)
+            changed.clear()
+            summary = await run_in_threadpool(load_admin_summary, festival_id)
+            if summary is None:
+                return
+            delta = {key: value for key, value in summary.items() if last.get(key) != value}
+            if delta:
+                yield sse_event("delta", delta)
+            last = summary
+
+
+@app.get("/api/admin/festivals/{festival_id}/summary/stream")
+async def admin_summary_stream(
+    festival_id: str, request: Request, token: Optional[str] = None, x_admin_token: Optional[str] = Header(None)
+):
+    # EventSource cannot send headers, so a link token may come as ?token=.
+    require_admin_link(request, x_admin_token, token)
+    first = await run_in_threadpool(load_admin_summary, festival_id)
+    if first is None:
+        http_error(404, "축제를 찾을 수 없습니다.")
+    return StreamingResponse(
+        summary_events(request, festival_id, first),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
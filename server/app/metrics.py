@@ -0,0 +1,326 @@
+"""Request instrumentation in Prometheus text format.
+
+``MetricsMiddleware`` times every request per route template and opens a
+``RequestTrace`` in a context variable. Work done for the request, including
+sync endpoints and helpers running in the threadpool (AnyIO copies the
+context), adds to that trace:
+
+- every SQL statement, through engine-wide cursor hooks (count and time,
+  which includes waiting on SQLite locks);
+- named ``span()`` blocks around the expensive steps (decode, hashing,
+  encoding, file writes, budget checks).
+
+Totals are kept in a small in-process registry and rendered at
+``/api/admin/metrics``; gauges (threadpool, inference queue, DB pools) are read
+at scrape time. Requests slower than ``SLOW_REQUEST_LOG_MS`` are logged with
+their span breakdown. Metrics are per process, like the other in-memory state.
+"""
+import logging
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+SLOW_REQUEST_LOG_MS = float(os.getenv("SLOW_REQUEST_LOG_MS", "0"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+logger = logging.getLogger("cashup.metrics")
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values: str) -> float:
+        with self._lock:
+            return self._values.get(label_values, 0)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for values, total in items:
+            yield f"{self.name}{_format_labels(self.labels, values)} {_format_value(total)}"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts (non-cumulative, +Inf last), sum, count]
+        self._series: Dict[LabelValues, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, *label_values: str) -> int:
+        with self._lock:
+            series = self._series.get(label_values)
+            return series[2] if series else 0
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            items = sorted((values, (list(s[0]), s[1], s[2])) for values, s in self._series.items())
+        for values, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labels, values, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labels, values)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.labels, values)} {count}"
+
+
+class Gauge:
+    """Read at scrape time from ``collect``, which returns ``[(label values, value)]``.
+
+    ``kind="counter"`` exposes totals another component already keeps.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        collect: Callable[[], Iterable[Tuple[LabelValues, float]]],
+        labels: Sequence[str] = (),
+        kind: str = "gauge",
+    ):
+        self.kind = kind
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.collect = collect
+
+    def samples(self) -> Iterator[str]:
+        try:
+            items = list(self.collect())
+        except Exception:
+            # A broken collector must not take the whole scrape down.
+            return
+        for values, value in items:
+            yield f"{self.name}{_format_labels(self.labels, values)} {_format_value(value)}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"metric {metric.name} already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labels))
+
+    def histogram(
+        self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, help_text, labels, buckets))
+
+    def gauge(self, name: str, help_text: str, collect, labels: Sequence[str] = (), kind: str = "gauge") -> Gauge:
+        return self.register(Gauge(name, help_text, collect, labels, kind))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_requests = registry.counter(
+    "cashup_http_requests_total", "HTTP requests by route and status.", ("method", "route", "status")
+)
+http_latency = registry.histogram(
+    "cashup_http_request_duration_seconds", "HTTP request latency by route.", ("method", "route")
+)
+db_queries = registry.counter("cashup_db_queries_total", "SQL statements executed, by route.", ("route",))
+db_query_seconds = registry.counter(
+    "cashup_db_query_seconds_total", "Time spent in SQL statements (including lock waits), by route.", ("route",)
+)
+db_queries_per_request = registry.histogram(
+    "cashup_http_request_db_queries", "SQL statements per request.", ("route",), QUERY_COUNT_BUCKETS
+)
+span_seconds = registry.histogram("cashup_span_seconds", "Time spent in named request steps.", ("span",))
+
+
+@dataclass
+class RequestTrace:
+    method: str
+    path: str
+    route: str = "unmatched"
+    started: float = field(default_factory=time.perf_counter)
+    db_queries: int = 0
+    db_seconds: float = 0.0
+    spans: Dict[str, float] = field(default_factory=dict)
+
+    def add_span(self, name: str, seconds: float) -> None:
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+
+_current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("cashup_request_trace", default=None)
+
+
+def current_trace() -> Optional[RequestTrace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time a block into ``cashup_span_seconds`` and the current request's breakdown."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        span_seconds.observe(elapsed, name)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add_span(name, elapsed)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("cashup_query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("cashup_query_started")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.db_queries += 1
+        trace.db_seconds += elapsed
+    else:
+        # Startup, background jobs and other work outside a request.
+        db_queries.inc("background")
+        db_query_seconds.inc("background", amount=elapsed)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute; drop its start time.
+    if context.connection is not None:
+        starts = context.connection.info.get("cashup_query_started")
+        if starts:
+            starts.pop()
+
+
+def format_trace(trace: RequestTrace, status: int, elapsed: float) -> str:
+    spans = " ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in sorted(trace.spans.items()))
+    return (
+        f"slow request {trace.method} {trace.path} route={trace.route} status={status} "
+        f"total={elapsed * 1000:.1f}ms db={trace.db_queries}q/{trace.db_seconds * 1000:.1f}ms"
+        + (f" {spans}" if spans else "")
+    )
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, so streaming responses (SSE) pass through untouched."""
+
+    def __init__(self, app, slow_request_ms: float = SLOW_REQUEST_LOG_MS):
+        self.app = app
+        self.slow_request_ms = slow_request_ms
+        self.in_flight = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        trace = RequestTrace(method=scope["method"], path=scope["path"])
+        token = _current_trace.set(trace)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.in_flight -= 1
+            _current_trace.reset(token)
+            elapsed = time.perf_counter() - trace.started
+            route = scope.get("route")
+            # Route templates, never raw paths, so ids do not blow up label cardinality.
+            trace.route = getattr(route, "path", None) or "unmatched"
+            self.record(trace, status, elapsed)
+
+    def record(self, trace: RequestTrace, status: int, elapsed: float) -> None:
+        http_requests.inc(trace.method, trace.route, str(status))
+        http_latency.observe(elapsed, trace.method, trace.route)
+        db_queries.inc(trace.route, amount=trace.db_queries)
+        db_query_seconds.inc(trace.route, amount=trace.db_seconds)
+        db_queries_per_request.observe(trace.db_queries, trace.route)
+        if self.slow_request_ms > 0 and elapsed * 1000 >= self.slow_request_ms:
+            logger.warning(format_trace(trace, status, elapsed))
+
@@ -0,0 +1,245 @@
+"""Versioned schema migrations applied at startup.
+
+``Base.metadata.create_all`` creates missing tables with the current schema;
+the steps below bring databases created by older releases up to date. Each
+step runs once, in order, and is recorded in ``schema_migrations``. Steps must
+be safe on a fresh database too (e.g. only add a column if it is missing).
+To change the schema, append a new ``(version, name, fn)`` entry; never edit
+or reorder released ones.
+"""
+import json
+import sqlite3
+from typing import Callable, List, Optional, Set, Tuple
+
+from sqlalchemy import MetaData, inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+from .bins import bin_code_number
+from .db import Base, now
+from .models import Festival, TrashBin
+
+Migration = Tuple[int, str, Callable[[Connection], None]]
+
+DETECTIONS_BATCH_SIZE = 1000
+
+# Indexes no longer declared on the models because a later step drops them;
+# earlier steps that created them skip them instead of failing.
+RETIRED_INDEXES = {"ix_trash_photos_user_created", "ix_coupons_user_festival_created"}
+
+
+def _columns(conn: Connection, table: str) -> Set[str]:
+    return {col["name"] for col in inspect(conn).get_columns(table)}
+
+
+def _add_columns(conn: Connection, table: str, columns: List[Tuple[str, str]]) -> None:
+    existing = _columns(conn, table)
+    for name, ddl_type in columns:
+        if name not in existing:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl_type}"))
+
+
+def _create_indexes(conn: Connection, *names: str) -> None:
+    """Create model-declared indexes by name if they do not exist yet."""
+    wanted = set(names) - RETIRED_INDEXES
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            if index.name in wanted:
+                index.create(bind=conn, checkfirst=True)
+                wanted.discard(index.name)
+    if wanted:
+        raise RuntimeError(f"Unknown indexes in migration: {sorted(wanted)}")
+
+
+def _analysis_columns(conn: Connection) -> None:
+    _add_columns(
+        conn,
+        "trash_photos",
+        [
+            ("has_trash", "BOOLEAN"),
+            ("trash_count", "INTEGER"),
+            ("max_trash_confidence", "FLOAT"),
+            ("yolo_raw", "JSON"),
+        ],
+    )
+
+
+def _hash_value_column(conn: Connection) -> None:
+    from .hash_index import hash_to_int, to_signed64
+
+    _add_columns(conn, "trash_photos", [("hash_value", "BIGINT")])
+    rows = conn.execute(
+        text("SELECT id, hash FROM trash_photos WHERE hash_value IS NULL AND hash IS NOT NULL")
+    ).all()
+    updates = []
+    for photo_id, hash_str in rows:
+        value = hash_to_int(hash_str)
+        if value is not None:
+            updates.append({"id": photo_id, "value": to_signed64(value)})
+    if updates:
+        conn.execute(text("UPDATE trash_photos SET hash_value = :value WHERE id = :id"), updates)
+
+
+def _content_sha256_column(conn: Connection) -> None:
+    _add_columns(conn, "trash_photos", [("content_sha256", "VARCHAR")])
+
+
+def _hot_path_indexes(conn: Connection) -> None:
+    _create_indexes(
+        conn,
+        "ix_trash_photos_user_created",
+        "ix_trash_photos_user_festival_status_created",
+        "ix_trash_photos_festival_status",
+        "ix_bin_scans_festival_bin",
+        "ix_coupons_user_festival_created",
+    )
+
+
+def _keyset_indexes(conn: Connection) -> None:
+    # The per-upload COUNT that used (user_id, created_at) is gone, and the
+    # coupon index is a prefix of its replacement.
+    for name in sorted(RETIRED_INDEXES):
+        conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    _create_indexes(conn, "ix_trash_photos_user_festival_created_id", "ix_coupons_user_festival_created_id")
+
+
+def _thumbnail_url_column(conn: Connection) -> None:
+    _add_columns(conn, "trash_photos", [("thumbnail_url", "VARCHAR")])
+
+
+def _geofence_column(conn: Connection) -> None:
+    _add_columns(conn, "festivals", [("geofence", "JSON")])
+
+
+def _bin_code_per_festival(conn: Connection) -> None:
+    _add_columns(conn, "festivals", [("bin_sequence", "INTEGER NOT NULL DEFAULT 0")])
+    # Start each festival's sequence after the bins it already has.
+    highest = {}
+    for festival_id, code in conn.execute(text("SELECT festival_id, code FROM trash_bins")):
+        number = bin_code_number(code)
+        if number is not None:
+            highest[festival_id] = max(highest.get(festival_id, 0), number)
+    for festival_id, number in highest.items():
+        conn.execute(
+            text("UPDATE festivals SET bin_sequence = :n WHERE id = :id AND bin_sequence < :n"),
+            {"n": number, "id": festival_id},
+        )
+
+    # Older tables declare code UNIQUE on its own; SQLite can only drop that by rebuilding.
+    if not any(c["column_names"] == ["code"] for c in inspect(conn).get_unique_constraints("trash_bins")):
+        return
+
+    scratch = MetaData()
+    # The festivals copy only lets the foreign key resolve; it is not created.
+    Festival.__table__.to_metadata(scratch)
+    rebuilt = TrashBin.__table__.to_metadata(scratch, name="trash_bins_rebuild")
+    rebuilt.create(bind=conn)
+    columns = ", ".join(sorted(_columns(conn, "trash_bins") & {c.name for c in rebuilt.columns}))
+    conn.execute(text(f"INSERT INTO trash_bins_rebuild ({columns}) SELECT {columns} FROM trash_bins"))
+    # Drop, then rename the copy, so bin_scans keeps referencing "trash_bins".
+    conn.execute(text("DROP TABLE trash_bins"))
+    conn.execute(text("ALTER TABLE trash_bins_rebuild RENAME TO trash_bins"))
+
+
+def _export_indexes(conn: Connection) -> None:
+    _create_indexes(
+        conn,
+        "ix_trash_photos_festival_created_id",
+        "ix_bin_scans_festival_created_id",
+        "ix_coupons_festival_created_id",
+        "ix_user_daily_summaries_festival_created_id",
+    )
+
+
+def _pack_legacy_detections(raw: Optional[str]) -> Optional[bytes]:
+    """Pack one ``yolo_raw`` value; ValueError if it is not a raw_detections list."""
+    from .detections import encode_detections
+
+    try:
+        return encode_detections(json.loads(raw) if raw else None)
+    except (TypeError, KeyError) as exc:
+        raise ValueError(str(exc)) from exc
+
+
+def _packed_detections(conn: Connection) -> None:
+    _add_columns(conn, "trash_photos", [("detections", "BLOB")])
+    if "yolo_raw" not in _columns(conn, "trash_photos"):
+        return
+    last_id = ""
+    unpacked = 0
+    while True:
+        rows = conn.execute(
+            text(
+                "SELECT id, yolo_raw FROM trash_photos WHERE yolo_raw IS NOT NULL AND id > :last "
+                "ORDER BY id LIMIT :n"
+            ),
+            {"last": last_id, "n": DETECTIONS_BATCH_SIZE},
+        ).all()
+        if not rows:
+            break
+        packed = []
+        for photo_id, raw in rows:
+            try:
+                packed.append({"id": photo_id, "blob": _pack_legacy_detections(raw)})
+            except ValueError:
+                unpacked += 1
+        if packed:
+            conn.execute(
+                text("UPDATE trash_photos SET detections = :blob, yolo_raw = NULL WHERE id = :id"), packed
+            )
+        last_id = rows[-1][0]
+    if unpacked:
+        # Something the packer could not read (e.g. hand-written data): keep the column and those rows.
+        return
+    if sqlite3.sqlite_version_info >= (3, 35):
+        conn.execute(text("ALTER TABLE trash_photos DROP COLUMN yolo_raw"))
+
+
+def _analysis_status_column(conn: Connection) -> None:
+    _add_columns(conn, "trash_photos", [("analysis_status", "VARCHAR")])
+    # Older uploads were analysed synchronously; a NULL has_trash meant the analysis failed.
+    conn.execute(
+        text(
+            "UPDATE trash_photos SET analysis_status = "
+            "CASE WHEN has_trash IS NULL THEN 'FAILED' ELSE 'DONE' END WHERE analysis_status IS NULL"
+        )
+    )
+
+
+MIGRATIONS: List[Migration] = [
+    (1, "trash_photos analysis columns", _analysis_columns),
+    (2, "trash_photos.hash_value with backfill", _hash_value_column),
+    (3, "trash_photos.content_sha256", _content_sha256_column),
+    (4, "hot query indexes", _hot_path_indexes),
+    (5, "(created_at, id) keyset pagination indexes", _keyset_indexes),
+    (6, "trash_photos.thumbnail_url", _thumbnail_url_column),
+    (7, "festivals.geofence polygons", _geofence_column),
+    (8, "per-festival bin codes and festivals.bin_sequence", _bin_code_per_festival),
+    (9, "(festival_id, created_at, id) export indexes", _export_indexes),
+    (10, "trash_photos.detections packed from yolo_raw", _packed_detections),
+    (11, "trash_photos.analysis_status for deferred analysis", _analysis_status_column),
+]
+
+
+def run_migrations(engine: Engine) -> List[int]:
+    """Apply pending migrations, each in its own transaction. Returns applied versions."""
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE IF NOT EXISTS schema_migrations ("
+                "version INTEGER PRIMARY KEY, name VARCHAR NOT NULL, applied_at DATETIME NOT NULL)"
+            )
+        )
+        done = set(conn.execute(text("SELECT version FROM schema_migrations")).scalars())
+
+    applied = []
+    for version, name, migrate in sorted(MIGRATIONS, key=lambda m: m[0]):
+        if version in done:
+            continue
+        with engine.begin() as conn:
+            migrate(conn)
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, name, applied_at) VALUES (:v, :n, :t)"),
+                {"v": version, "n": name, "t": now()},
+            )
+        applied.append(version)
+    return applied
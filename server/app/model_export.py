@@ -0,0 +1,141 @@
+"""Export the YOLO weights to CPU-friendly ONNX / OpenVINO models, optionally INT8.
+
+Exports are dynamic-batch so the inference batcher can keep sending whole
+batches. INT8 quantization is calibrated on stored uploads, so activation
+ranges come from real festival photos rather than a stock dataset:
+
+- ONNX: ONNX Runtime static QDQ quantization (needs ``onnxruntime``), with the
+  detect head's box decoding left in FP32;
+- OpenVINO: ultralytics' NNCF quantization, fed through a throwaway dataset
+  directory that points at the calibration images.
+
+Images go through the same ``model_input_copy`` as uploads, then a square
+letterbox to ``imgsz`` as in ultralytics' preprocessing.
+"""
+import importlib.util
+import tempfile
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence
+
+import numpy as np
+from PIL import Image
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .imaging import model_input_copy
+from .models import TrashPhoto
+
+EXPORT_MODEL_FORMATS = ("onnx", "openvino")
+LETTERBOX_FILL = 114
+# Ops in the detect head that decode boxes and scores; quantizing them costs most of the accuracy.
+HEAD_FP32_OPS = {"Add", "Sub", "Mul", "Div", "Sigmoid", "Softmax", "Concat"}
+
+
+def onnxruntime_available() -> bool:
+    return importlib.util.find_spec("onnxruntime") is not None
+
+
+def calibration_images(db: Session, upload_dir: Path, count: int) -> List[Path]:
+    """Up to ``count`` stored uploads spread evenly over the upload history."""
+    urls = db.execute(select(TrashPhoto.image_url).order_by(TrashPhoto.created_at, TrashPhoto.id)).scalars().all()
+    paths = [upload_dir / Path(url).name for url in urls]
+    paths = [path for path in paths if path.is_file()]
+    if len(paths) <= count:
+        return paths
+    step = len(paths) / count
+    return [paths[int(index * step)] for index in range(count)]
+
+
+def letterbox(img: Image.Image, imgsz: int) -> np.ndarray:
+    """NCHW float32 RGB in [0, 1], resized to fit and padded to ``imgsz`` x ``imgsz``."""
+    scale = imgsz / max(img.size)
+    size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+    canvas = Image.new("RGB", (imgsz, imgsz), (LETTERBOX_FILL,) * 3)
+    canvas.paste(img.convert("RGB").resize(size, Image.BILINEAR), ((imgsz - size[0]) // 2, (imgsz - size[1]) // 2))
+    return (np.asarray(canvas, dtype=np.float32) / 255.0).transpose(2, 0, 1)[None]
+
+
+def load_calibration_image(path: Path) -> Image.Image:
+    with Image.open(path) as img:
+        return model_input_copy(img.convert("RGB"))
+
+
+class OnnxCalibrationReader:
+    """``onnxruntime.quantization.CalibrationDataReader`` over calibration images."""
+
+    def __init__(self, input_name: str, paths: Sequence[Path], imgsz: int):
+        self.input_name = input_name
+        self.paths = list(paths)
+        self.imgsz = imgsz
+        self._batches: Optional[Iterator[dict]] = None
+
+    def _iter(self) -> Iterator[dict]:
+        for path in self.paths:
+            yield {self.input_name: letterbox(load_calibration_image(path), self.imgsz)}
+
+    def get_next(self) -> Optional[dict]:
+        if self._batches is None:
+            self._batches = self._iter()
+        return next(self._batches, None)
+
+    def rewind(self) -> None:
+        self._batches = None
+
+
+def head_nodes_to_exclude(onnx_model, head_index: int) -> List[str]:
+    prefix = f"/model.{head_index}/"
+    return [
+        node.name
+        for node in onnx_model.graph.node
+        if node.name.startswith(prefix) and (node.op_type in HEAD_FP32_OPS or "/dfl/" in node.name)
+    ]
+
+
+def quantize_onnx(fp32_path: Path, output: Path, calibration: Sequence[Path], imgsz: int, head_index: int) -> Path:
+    import onnx
+    from onnxruntime.quantization import QuantFormat, QuantType, quantize_static
+
+    fp32 = onnx.load(str(fp32_path))
+    reader = OnnxCalibrationReader(fp32.graph.input[0].name, calibration, imgsz)
+    quantize_static(
+        str(fp32_path),
+        str(output),
+        reader,
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+        nodes_to_exclude=head_nodes_to_exclude(fp32, head_index),
+    )
+    return output
+
+
+def write_calibration_dataset(directory: Path, calibration: Sequence[Path], names: dict) -> Path:
+    """A minimal ultralytics dataset (images only) for OpenVINO INT8 calibration."""
+    images = directory / "images"
+    images.mkdir(parents=True, exist_ok=True)
+    for index, path in enumerate(calibration):
+        load_calibration_image(path).save(images / f"{index:05d}.jpg", quality=95)
+    lines = [f"path: {directory}", "train: images", "val: images", "names:"]
+    lines += [f"  {cls_id}: {name}" for cls_id, name in sorted(names.items())]
+    data = directory / "data.yaml"
+    data.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return data
+
+
+def export_model(weights: str, fmt: str, imgsz: int, int8: bool = False, calibration: Sequence[Path] = ()) -> Path:
+    """Export ``weights`` (a .pt file) and return the path to set as ``YOLO_MODEL_PATH``."""
+    from ultralytics import YOLO
+
+    model = YOLO(weights)
+    if fmt == "openvino":
+        if not int8:
+            return Path(model.export(format="openvino", imgsz=imgsz, dynamic=True))
+        with tempfile.TemporaryDirectory(prefix="cashup-calibration-") as scratch:
+            data = write_calibration_dataset(Path(scratch), calibration, model.names)
+            return Path(model.export(format="openvino", imgsz=imgsz, dynamic=True, int8=True, data=str(data)))
+    fp32 = Path(model.export(format="onnx", imgsz=imgsz, dynamic=True, simplify=True))
+    if not int8:
+        return fp32
+    head_index = len(model.model.model) - 1
+    return quantize_onnx(fp32, fp32.with_name(f"{fp32.stem}_int8.onnx"), calibration, imgsz, head_index)
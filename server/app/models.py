@@ -1,7 +1,20 @@
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Integer, JSON, String, UniqueConstraint
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    JSON,
+    LargeBinary,
+    String,
+    UniqueConstraint,
+)
 from sqlalchemy.orm import relationship
 
 from .db import Base, generate_id, now
@@ -35,6 +48,10 @@ class Festival(Base):
     center_lat = Column(Float)
     center_lng = Column(Float)
     radius_meters = Column(Integer, default=1000)
+    # [[[lat, lng], ...], ...]: one polygon per zone; replaces the circle when set.
+    geofence = Column(JSON)
+    # Last bin number handed out; bulk provisioning reserves blocks from it.
+    bin_sequence = Column(Integer, default=0, server_default="0", nullable=False)
     created_at = Column(DateTime, default=now, nullable=False)
 
     trash_bins = relationship("TrashBin", back_populates="festival", cascade="all, delete-orphan")
@@ -42,6 +59,19 @@ class Festival(Base):
     summaries = relationship("UserDailySummary", back_populates="festival", cascade="all, delete-orphan")
     coupons = relationship("Coupon", back_populates="festival", cascade="all, delete-orphan")
     bin_scans = relationship("BinScan", back_populates="festival", cascade="all, delete-orphan")
+    budget_ledger = relationship(
+        "FestivalBudget", back_populates="festival", uselist=False, cascade="all, delete-orphan"
+    )
+
+
+class FestivalBudget(Base):
+    __tablename__ = "festival_budgets"
+
+    festival_id = Column(String, ForeignKey("festivals.id"), primary_key=True)
+    used = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=now, nullable=False)
+
+    festival = relationship("Festival", back_populates="budget_ledger")
 
 
 class TrashPhoto(Base):
@@ -51,15 +81,32 @@ class TrashPhoto(Base):
     user_id = Column(String, ForeignKey("users.id"), nullable=False)
     festival_id = Column(String, ForeignKey("festivals.id"), nullable=False)
     image_url = Column(String, nullable=False)
+    thumbnail_url = Column(String)
     hash = Column(String, nullable=False)
+    hash_value = Column(BigInteger)
+    content_sha256 = Column(String)
     status = Column(String, default="PENDING", nullable=False)
     points = Column(Integer, nullable=False)
     has_trash = Column(Boolean)
     trash_count = Column(Integer)
     max_trash_confidence = Column(Float)
-    yolo_raw = Column(JSON)
+    # raw_detections packed by app.detections (decode_detections to read).
+    detections = Column(LargeBinary)
+    # ANALYZING until the background analysis job finishes, then DONE or FAILED (see app.analysis).
+    analysis_status = Column(String, default="DONE")
     created_at = Column(DateTime, default=now, nullable=False)
 
+    __table_args__ = (
+        # activity timeline keyset pagination
+        Index("ix_trash_photos_user_festival_created_id", "user_id", "festival_id", "created_at", "id"),
+        # pending activation in scan_bin
+        Index("ix_trash_photos_user_festival_status_created", "user_id", "festival_id", "status", "created_at"),
+        # admin summary status totals
+        Index("ix_trash_photos_festival_status", "festival_id", "status"),
+        # festival data exports
+        Index("ix_trash_photos_festival_created_id", "festival_id", "created_at", "id"),
+    )
+
     user = relationship("User", back_populates="photos")
     festival = relationship("Festival", back_populates="photos")
 
@@ -69,13 +116,16 @@ class TrashBin(Base):
 
     id = Column(String, primary_key=True, default=generate_id)
     festival_id = Column(String, ForeignKey("festivals.id"), nullable=False)
-    code = Column(String, unique=True, nullable=False)
+    code = Column(String, nullable=False)
     name = Column(String, nullable=False)
     description = Column(String)
     latitude = Column(Float)
     longitude = Column(Float)
     created_at = Column(DateTime, default=now, nullable=False)
 
+    # Codes are printed as TRASH_BIN_NN and scanned per festival, so every festival has its own 01.
+    __table_args__ = (UniqueConstraint("festival_id", "code", name="uq_trash_bins_festival_code"),)
+
     festival = relationship("Festival", back_populates="trash_bins")
     scans = relationship("BinScan", back_populates="bin", cascade="all, delete-orphan")
 
@@ -92,7 +142,11 @@ class UserDailySummary(Base):
     total_consumed = Column(Integer, default=0, nullable=False)
     created_at = Column(DateTime, default=now, nullable=False)
 
-    __table_args__ = (UniqueConstraint("user_id", "festival_id", "date", name="uq_summary_day"),)
+    __table_args__ = (
+        UniqueConstraint("user_id", "festival_id", "date", name="uq_summary_day"),
+        # festival data exports
+        Index("ix_user_daily_summaries_festival_created_id", "festival_id", "created_at", "id"),
+    )
 
     user = relationship("User", back_populates="summaries")
     festival = relationship("Festival", back_populates="summaries")
@@ -110,6 +164,12 @@ class Coupon(Base):
     status = Column(String, default="ISSUED", nullable=False)
     created_at = Column(DateTime, default=now, nullable=False)
 
+    __table_args__ = (
+        Index("ix_coupons_user_festival_created_id", "user_id", "festival_id", "created_at", "id"),
+        # festival data exports
+        Index("ix_coupons_festival_created_id", "festival_id", "created_at", "id"),
+    )
+
     user = relationship("User", back_populates="coupons")
     festival = relationship("Festival", back_populates="coupons")
 
@@ -123,6 +183,29 @@ class BinScan(Base):
     user_id = Column(String, ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime, default=now, nullable=False)
 
+    __table_args__ = (
+        Index("ix_bin_scans_festival_bin", "festival_id", "bin_id"),
+        # festival data exports
+        Index("ix_bin_scans_festival_created_id", "festival_id", "created_at", "id"),
+    )
+
     festival = relationship("Festival", back_populates="bin_scans")
     bin = relationship("TrashBin", back_populates="scans")
     user = relationship("User", back_populates="bin_scans")
+
+
+# A pending YOLO analysis; deleted once the photo's analysis is DONE or FAILED.
+class AnalysisJob(Base):
+    __tablename__ = "analysis_jobs"
+
+    photo_id = Column(String, ForeignKey("trash_photos.id"), primary_key=True)
+    attempts = Column(Integer, default=0, nullable=False)
+    # Next time the job may be claimed: now when queued, a lease while running, a backoff after failing.
+    available_at = Column(DateTime, default=now, nullable=False)
+    last_error = Column(String)
+    created_at = Column(DateTime, default=now, nullable=False)
+
+    __table_args__ = (
+        # due-job claims
+        Index("ix_analysis_jobs_available", "available_at", "photo_id"),
+    )
@@ -0,0 +1,64 @@
+"""Keyset (cursor) pagination over ``(created_at, id)``, newest first.
+
+A cursor is the ``(created_at, id)`` of the last row on the previous page,
+base64url-encoded so clients treat it as opaque. The next page is a range scan
+on a ``(..., created_at, id)`` index that starts right after that row, so a
+fetch costs the same on page 50 as on page 1 and never uses OFFSET.
+"""
+import base64
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+PAGE_DEFAULT_LIMIT = 30
+PAGE_MAX_LIMIT = 100
+
+
+def encode_cursor(created_at: datetime, row_id: str) -> str:
+    raw = f"{created_at.isoformat()}|{row_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Inverse of :func:`encode_cursor`; raises ``ValueError`` on malformed input."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        created_at, row_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), row_id
+    except ValueError as exc:  # also covers binascii.Error and UnicodeDecodeError
+        raise ValueError("invalid cursor") from exc
+
+
+def clamp_limit(limit: Optional[int]) -> int:
+    if limit is None:
+        return PAGE_DEFAULT_LIMIT
+    return max(1, min(int(limit), PAGE_MAX_LIMIT))
+
+
+def keyset_page(
+    db: Session,
+    stmt: Select,
+    created_col: Any,
+    id_col: Any,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+) -> Tuple[List[Any], Optional[str]]:
+    """Run ``stmt`` (already filtered, unordered) one page at a time.
+
+    Returns the rows and the cursor for the next page (``None`` on the last page).
+    ``stmt`` must select a single ORM entity that has ``created_col``/``id_col``.
+    """
+    limit = clamp_limit(limit)
+    if cursor:
+        after_created, after_id = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(created_col, id_col) < tuple_(after_created, after_id))
+    stmt = stmt.order_by(created_col.desc(), id_col.desc()).limit(limit + 1)
+    rows = db.execute(stmt).scalars().all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, created_col.key), getattr(last, id_col.key))
@@ -0,0 +1,174 @@
+"""Set-based point movements on the daily summary.
+
+Coupon issuance and pending activation run as conditional statements instead
+of read, check in Python, then write. SQLite evaluates each statement under
+the write lock, so two concurrent taps cannot both spend the same points or
+activate the same photos, and the lock is held only for those statements.
+
+Summary rows are never created up front: reads treat a missing row as zeros,
+and writes are ``INSERT ... ON CONFLICT DO UPDATE`` upserts in the caller's
+transaction, so the first request of the day neither commits separately nor
+races on ``uq_summary_day``.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from .db import generate_id, now
+from .models import TrashPhoto, UserDailySummary
+
+STATUS_PENDING = "PENDING"
+STATUS_ACTIVE = "ACTIVE"
+
+# Daily caps and summaries roll over at festival-local (KST) midnight.
+KST = ZoneInfo("Asia/Seoul")
+SUMMARY_KEY = ("user_id", "festival_id", "date")
+PREWARM_BATCH_SIZE = 1000
+
+
+@dataclass(frozen=True)
+class SummaryTotals:
+    total_pending: int
+    total_active: int
+    total_consumed: int
+
+
+def _summary_row(user_id: str, festival_id: str, day: str):
+    return (
+        UserDailySummary.user_id == user_id,
+        UserDailySummary.festival_id == festival_id,
+        UserDailySummary.date == day,
+    )
+
+
+def _totals():
+    return UserDailySummary.total_pending, UserDailySummary.total_active, UserDailySummary.total_consumed
+
+
+def _returning_totals(stmt):
+    return stmt.returning(*_totals()).execution_options(synchronize_session=False)
+
+
+def read_summary(db: Session, user_id: str, festival_id: str, day: str) -> SummaryTotals:
+    """The day's totals; zeros if the user has no row yet (nothing is written)."""
+    row = db.execute(select(*_totals()).where(*_summary_row(user_id, festival_id, day))).first()
+    return SummaryTotals(*row) if row else SummaryTotals(0, 0, 0)
+
+
+def add_to_summary(
+    db: Session, user_id: str, festival_id: str, day: str, pending: int = 0, active: int = 0
+) -> SummaryTotals:
+    """Add to the day's pending/active totals, creating the row if needed, in one statement."""
+    stmt = sqlite_insert(UserDailySummary).values(
+        id=generate_id(),
+        user_id=user_id,
+        festival_id=festival_id,
+        date=day,
+        total_pending=pending,
+        total_active=active,
+        total_consumed=0,
+        created_at=now(),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=SUMMARY_KEY,
+        set_={
+            "total_pending": UserDailySummary.total_pending + stmt.excluded.total_pending,
+            "total_active": UserDailySummary.total_active + stmt.excluded.total_active,
+        },
+    )
+    return SummaryTotals(*db.execute(_returning_totals(stmt)).one())
+
+
+def prewarm_summaries(db: Session, day: str, next_day: str) -> int:
+    """Create ``next_day`` rows for everyone with a ``day`` row. Returns rows created."""
+    pairs = db.execute(
+        select(UserDailySummary.user_id, UserDailySummary.festival_id).where(UserDailySummary.date == day)
+    ).all()
+    # The Core table (not the ORM entity) so executemany reports rowcount.
+    insert_missing = sqlite_insert(UserDailySummary.__table__).on_conflict_do_nothing(index_elements=SUMMARY_KEY)
+    created_at = now()
+    created = 0
+    for start in range(0, len(pairs), PREWARM_BATCH_SIZE):
+        rows = [
+            {
+                "id": generate_id(),
+                "user_id": user_id,
+                "festival_id": festival_id,
+                "date": next_day,
+                "total_pending": 0,
+                "total_active": 0,
+                "total_consumed": 0,
+                "created_at": created_at,
+            }
+            for user_id, festival_id in pairs[start : start + PREWARM_BATCH_SIZE]
+        ]
+        created += db.execute(insert_missing, rows).rowcount
+    return created
+
+
+def spend_active_points(
+    db: Session, user_id: str, festival_id: str, day: str, amount: int
+) -> Optional[SummaryTotals]:
+    """Move ``amount`` from active to consumed; None if the user has fewer active points."""
+    row = db.execute(
+        _returning_totals(
+            update(UserDailySummary)
+            .where(*_summary_row(user_id, festival_id, day), UserDailySummary.total_active >= amount)
+            .values(
+                total_active=UserDailySummary.total_active - amount,
+                total_consumed=UserDailySummary.total_consumed + amount,
+            )
+        )
+    ).first()
+    return SummaryTotals(*row) if row else None
+
+
+def activate_pending_photos(
+    db: Session, user_id: str, festival_id: str, day: str, cap: int, since: datetime
+) -> Tuple[int, int, Optional[SummaryTotals]]:
+    """Activate the oldest pending photos that fit under the user's remaining daily cap.
+
+    A running ``SUM(points)`` window over the pending photos picks the longest
+    prefix whose total stays within ``cap - (active + consumed)``. Returns the
+    activated points, the number of photos and the updated totals.
+    """
+    used = (
+        select(UserDailySummary.total_active + UserDailySummary.total_consumed)
+        .where(*_summary_row(user_id, festival_id, day))
+        .scalar_subquery()
+    )
+    pending = (
+        select(
+            TrashPhoto.id,
+            func.sum(TrashPhoto.points).over(order_by=(TrashPhoto.created_at, TrashPhoto.id)).label("running"),
+        )
+        .where(
+            TrashPhoto.user_id == user_id,
+            TrashPhoto.festival_id == festival_id,
+            TrashPhoto.status == STATUS_PENDING,
+            TrashPhoto.created_at >= since,
+        )
+        .subquery()
+    )
+    fitting = select(pending.c.id).where(pending.c.running <= cap - func.coalesce(used, 0))
+    points = (
+        db.execute(
+            update(TrashPhoto)
+            .where(TrashPhoto.id.in_(fitting), TrashPhoto.status == STATUS_PENDING)
+            .values(status=STATUS_ACTIVE)
+            .returning(TrashPhoto.points)
+            .execution_options(synchronize_session=False)
+        )
+        .scalars()
+        .all()
+    )
+    if not points:
+        return 0, 0, None
+    activated = sum(points)
+    totals = add_to_summary(db, user_id, festival_id, day, pending=-activated, active=activated)
+    return activated, len(points), totals
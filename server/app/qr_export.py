@@ -0,0 +1,170 @@
+"""Printable bin QR codes, streamed as a ZIP of PNGs or a multi-page PDF.
+
+Both formats are produced incrementally from an iterator of bin codes:
+each PNG or PDF page is yielded as soon as it is written, so memory stays
+flat however many bins a festival has. The ZIP uses data descriptors (no
+seeking back); the PDF is written object by object and only the page object
+numbers and byte offsets are kept for the final cross-reference table. QR
+modules are drawn as vector rectangles, so the sheet prints sharp at any size.
+"""
+import io
+import zipfile
+import zlib
+from typing import Iterable, Iterator, List, Sequence
+
+import segno
+from PIL import Image, ImageDraw, ImageFont
+
+from .streams import StreamSink
+
+# Quartile error correction survives scuffed or partly dirty outdoor stickers.
+QR_ERROR_LEVEL = "q"
+QR_PNG_SCALE = 12
+QR_QUIET_ZONE = 4
+
+# A4 in points, 3 x 4 labels per page.
+PDF_PAGE_WIDTH = 595
+PDF_PAGE_HEIGHT = 842
+PDF_MARGIN = 36
+PDF_COLUMNS = 3
+PDF_ROWS = 4
+PDF_QR_SIDE = 130
+PDF_CAPTION_SIZE = 11
+
+
+def qr_matrix(code: str) -> Sequence[Sequence[int]]:
+    return segno.make_qr(code, error=QR_ERROR_LEVEL).matrix
+
+
+def qr_png(code: str) -> bytes:
+    """QR with the code printed underneath, as PNG."""
+    buffer = io.BytesIO()
+    segno.make_qr(code, error=QR_ERROR_LEVEL).save(buffer, kind="png", scale=QR_PNG_SCALE, border=QR_QUIET_ZONE)
+    with Image.open(io.BytesIO(buffer.getvalue())) as qr:
+        qr = qr.convert("L")
+    font = ImageFont.load_default(size=QR_PNG_SCALE * 2)
+    caption_height = QR_PNG_SCALE * 4
+    sheet = Image.new("L", (qr.width, qr.height + caption_height), 255)
+    sheet.paste(qr, (0, 0))
+    draw = ImageDraw.Draw(sheet)
+    text_width = draw.textlength(code, font=font)
+    draw.text(((qr.width - text_width) / 2, qr.height - QR_PNG_SCALE), code, fill=0, font=font)
+    out = io.BytesIO()
+    sheet.save(out, format="PNG", optimize=True)
+    return out.getvalue()
+
+
+def stream_zip(codes: Iterable[str]) -> Iterator[bytes]:
+    sink = StreamSink()
+    # PNGs are already compressed; storing them keeps the stream cheap to produce.
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED) as archive:
+        for code in codes:
+            archive.writestr(f"{code}.png", qr_png(code))
+            yield sink.drain()
+    yield sink.drain()
+
+
+def _pdf_text(value: str) -> str:
+    # Helvetica/WinAnsi covers bin codes; anything else is replaced.
+    safe = value.encode("latin-1", "replace").decode("latin-1")
+    return safe.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _label_ops(code: str, x: float, y: float) -> List[str]:
+    """Drawing operators for one QR label whose cell's bottom-left corner is (x, y)."""
+    matrix = qr_matrix(code)
+    size = len(matrix)
+    module = PDF_QR_SIDE / size
+    cell_width = (PDF_PAGE_WIDTH - 2 * PDF_MARGIN) / PDF_COLUMNS
+    left = x + (cell_width - PDF_QR_SIDE) / 2
+    top = y + PDF_CAPTION_SIZE * 2 + PDF_QR_SIDE
+    ops = []
+    for row_index, row in enumerate(matrix):
+        # One rectangle per horizontal run of dark modules.
+        col = 0
+        while col < size:
+            if not row[col]:
+                col += 1
+                continue
+            start = col
+            while col < size and row[col]:
+                col += 1
+            ops.append(
+                f"{left + start * module:.2f} {top - (row_index + 1) * module:.2f} "
+                f"{(col - start) * module:.2f} {module:.2f} re"
+            )
+    ops.append("f")
+    text_width = len(code) * PDF_CAPTION_SIZE * 0.56
+    ops.append(
+        f"BT /F1 {PDF_CAPTION_SIZE} Tf {x + (cell_width - text_width) / 2:.2f} {y + PDF_CAPTION_SIZE / 2:.2f} Td "
+        f"({_pdf_text(code)}) Tj ET"
+    )
+    return ops
+
+
+def _pdf_object(number: int, body: bytes) -> bytes:
+    return b"%d 0 obj\n" % number + body + b"\nendobj\n"
+
+
+def stream_pdf(codes: Iterable[str]) -> Iterator[bytes]:
+    per_page = PDF_COLUMNS * PDF_ROWS
+    cell_width = (PDF_PAGE_WIDTH - 2 * PDF_MARGIN) / PDF_COLUMNS
+    cell_height = (PDF_PAGE_HEIGHT - 2 * PDF_MARGIN) / PDF_ROWS
+    # 1 catalog, 2 page tree, 3 font; pages and their contents follow from 4.
+    offsets = {}
+    position = 0
+    page_numbers: List[int] = []
+    next_number = 4
+
+    def emit(number: int, body: bytes) -> bytes:
+        nonlocal position
+        offsets[number] = position
+        data = _pdf_object(number, body)
+        position += len(data)
+        return data
+
+    header = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+    position = len(header)
+    yield header + emit(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+
+    def page(ops: List[str]) -> bytes:
+        nonlocal next_number
+        content_number, page_number = next_number, next_number + 1
+        next_number += 2
+        page_numbers.append(page_number)
+        stream = zlib.compress("\n".join(ops).encode("latin-1"))
+        content = emit(
+            content_number,
+            b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(stream) + stream + b"\nendstream",
+        )
+        return content + emit(
+            page_number,
+            (
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PDF_PAGE_WIDTH} {PDF_PAGE_HEIGHT}] "
+                f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_number} 0 R >>"
+            ).encode("ascii"),
+        )
+
+    ops: List[str] = ["0 g"]
+    slot = 0
+    for code in codes:
+        column, row = slot % PDF_COLUMNS, slot // PDF_COLUMNS
+        x = PDF_MARGIN + column * cell_width
+        y = PDF_PAGE_HEIGHT - PDF_MARGIN - (row + 1) * cell_height
+        ops.extend(_label_ops(code, x, y))
+        slot += 1
+        if slot == per_page:
+            yield page(ops)
+            ops, slot = ["0 g"], 0
+    if slot or not page_numbers:
+        yield page(ops)
+
+    kids = " ".join(f"{n} 0 R" for n in page_numbers)
+    tail = emit(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(page_numbers)} >>".encode("ascii"))
+    tail += emit(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+    xref_offset = position
+    size = next_number
+    xref = [b"xref\n0 %d\n" % size, b"0000000000 65535 f \n"]
+    xref += [b"%010d 00000 n \n" % offsets[number] for number in range(1, size)]
+    trailer = b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, xref_offset)
+    yield tail + b"".join(xref) + trailer
@@ -0,0 +1,146 @@
+"""Per-key token-bucket rate limiting.
+
+Buckets use GCRA: each key stores a single "theoretical arrival time" (TAT).
+A request is allowed while ``TAT - now`` stays within the burst allowance and
+pushes the TAT forward by one emission interval, which is equivalent to a
+token bucket of ``capacity`` tokens refilled evenly over ``period_seconds``.
+
+Backends:
+
+- ``memory``: a plain dict touched only from the event loop thread (the
+  FastAPI dependency is ``async``), so it needs no locks. Per-process only.
+- ``sqlite``: one atomic UPSERT per check against a small side database, so
+  all uvicorn workers on the host share the same buckets.
+"""
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_SQLITE_PATH = os.getenv("RATE_LIMIT_SQLITE_PATH", "./ratelimit.db")
+
+# "<requests>/<seconds>"; the first value is also the burst size.
+DEFAULT_LIMITS = {
+    "upload": os.getenv("RATE_LIMIT_UPLOAD", "5/60"),
+    "scan": os.getenv("RATE_LIMIT_SCAN", "10/60"),
+    "coupon": os.getenv("RATE_LIMIT_COUPON", "10/60"),
+    # Keyed by client IP; carrier NAT puts many festival-goers behind one address.
+    "mock-login": os.getenv("RATE_LIMIT_MOCK_LOGIN", "30/60"),
+}
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    capacity: int
+    period_seconds: float
+
+    @classmethod
+    def parse(cls, spec: str) -> "RateLimit":
+        count, _, period = spec.partition("/")
+        return cls(capacity=max(1, int(count)), period_seconds=float(period or 60))
+
+    @property
+    def interval(self) -> float:
+        return self.period_seconds / self.capacity
+
+    @property
+    def burst(self) -> float:
+        return self.interval * (self.capacity - 1)
+
+
+class MemoryBackend:
+    """Event-loop-confined GCRA state; callers must stay on one thread."""
+
+    threaded = False
+    SWEEP_EVERY = 10_000
+
+    def __init__(self):
+        self._tat: Dict[str, float] = {}
+        self._calls = 0
+
+    def acquire(self, key: str, limit: RateLimit, now: float) -> Tuple[bool, float]:
+        self._calls += 1
+        if self._calls % self.SWEEP_EVERY == 0:
+            self._tat = {k: tat for k, tat in self._tat.items() if tat > now}
+        tat = max(self._tat.get(key, now), now)
+        if tat - now > limit.burst:
+            return False, tat - now - limit.burst
+        self._tat[key] = tat + limit.interval
+        return True, 0.0
+
+    def reset(self) -> None:
+        self._tat = {}
+
+
+class SQLiteBackend:
+    """Buckets shared by every process that opens the same SQLite file."""
+
+    threaded = True
+
+    def __init__(self, path: str = RATE_LIMIT_SQLITE_PATH):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS rate_limit_buckets (key TEXT PRIMARY KEY, tat REAL NOT NULL)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Losing a few bucket updates on power loss is harmless.
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    def acquire(self, key: str, limit: RateLimit, now: float) -> Tuple[bool, float]:
+        conn = self._connect()
+        params = {"key": key, "now": now, "interval": limit.interval, "burst": limit.burst}
+        cursor = conn.execute(
+            "INSERT INTO rate_limit_buckets (key, tat) VALUES (:key, :now + :interval) "
+            "ON CONFLICT(key) DO UPDATE SET tat = max(tat, :now) + :interval "
+            "WHERE max(rate_limit_buckets.tat, :now) - :now <= :burst",
+            params,
+        )
+        if cursor.rowcount == 1:
+            return True, 0.0
+        row = conn.execute("SELECT tat FROM rate_limit_buckets WHERE key = :key", params).fetchone()
+        retry_after = (row[0] - now - limit.burst) if row else limit.interval
+        return False, max(0.0, retry_after)
+
+    def reset(self) -> None:
+        self._connect().execute("DELETE FROM rate_limit_buckets")
+
+
+class RateLimiter:
+    def __init__(self, backend=None, limits: Optional[Dict[str, str]] = None):
+        self.backend = backend or MemoryBackend()
+        self.limits = {scope: RateLimit.parse(spec) for scope, spec in (limits or DEFAULT_LIMITS).items()}
+
+    def configure(self, scope: str, spec: str) -> None:
+        self.limits[scope] = RateLimit.parse(spec)
+
+    async def hit(self, scope: str, key: str) -> Tuple[bool, float]:
+        """Consume one token for ``key`` in ``scope``; returns (allowed, retry_after_seconds)."""
+        limit = self.limits.get(scope)
+        if limit is None:
+            return True, 0.0
+        bucket = f"{scope}:{key}"
+        now = time.time()
+        if self.backend.threaded:
+            return await run_in_threadpool(self.backend.acquire, bucket, limit, now)
+        return self.backend.acquire(bucket, limit, now)
+
+
+def build_backend(name: str = RATE_LIMIT_BACKEND):
+    if name == "sqlite":
+        return SQLiteBackend()
+    return MemoryBackend()
+
+
+rate_limiter = RateLimiter(build_backend())
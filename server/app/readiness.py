@@ -0,0 +1,84 @@
+"""Startup timing and the readiness state behind ``/api/ready``.
+
+``/api/health`` only says the process is up. ``/api/ready`` says it should
+get traffic: the database answers, the startup caches (budget counters, photo
+hash index, festival configs) are loaded and the YOLO model has been warmed
+up. The warm-up runs in the background after startup, so the port opens
+immediately, and the load balancer keeps the instance out of rotation until
+it finishes. A warm-up that could not load the model (missing package, bad
+weights) leaves the instance unready, with the error in the response; only a
+loaded model or an explicitly configured stub counts.
+
+Each startup phase is timed, and the breakdown is logged once at boot under
+``cashup.startup``.
+"""
+import asyncio
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from . import BOOT_STARTED
+
+YOLO_WARMUP_ON_STARTUP = os.getenv("YOLO_WARMUP_ON_STARTUP", "1").lower() not in ("0", "false", "no")
+
+# model_state() values an instance can serve with.
+MODEL_READY_STATES = ("loaded", "stub")
+
+logger = logging.getLogger("cashup.startup")
+
+
+class StartupState:
+    def __init__(self, boot_started: float = BOOT_STARTED):
+        self.boot_started = boot_started
+        self.phases: Dict[str, float] = {}
+        self.caches_ready = False
+        self.model_ready = False
+        self.model_seconds: Optional[float] = None
+        # model_state() as seen by the warm-up (from a pool worker when the pool is on).
+        self.model_state: Optional[Dict[str, Any]] = None
+        self.model_task: Optional[asyncio.Task] = None
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - started
+
+    def mark_imported(self) -> None:
+        """Record the import phase: from package import to the first startup hook."""
+        self.phases.setdefault("imports", time.perf_counter() - self.boot_started)
+
+    def breakdown(self) -> str:
+        parts = " ".join(f"{name}={seconds * 1000:.0f}ms" for name, seconds in self.phases.items())
+        return f"{parts} total={(time.perf_counter() - self.boot_started) * 1000:.0f}ms"
+
+    def log_breakdown(self) -> None:
+        logger.info("startup %s", self.breakdown())
+
+    def report(self) -> Dict[str, Any]:
+        report: Dict[str, Any] = {name: round(seconds * 1000) for name, seconds in self.phases.items()}
+        if self.model_seconds is not None:
+            report["model_warm_up"] = round(self.model_seconds * 1000)
+        return {"phasesMs": report}
+
+    def reset_model(self) -> None:
+        self.model_ready = False
+        self.model_seconds = None
+        self.model_state = None
+
+    def mark_model_warm(self, seconds: float, state: Dict[str, Any], label: Optional[str] = None) -> None:
+        """Record a finished warm-up; the model is ready only if it loaded or the stub is configured."""
+        self.model_seconds = seconds
+        self.model_state = state
+        self.model_ready = state.get("state") in MODEL_READY_STATES
+        if self.model_ready:
+            logger.info("model warm-up %.0fms state=%s", seconds * 1000, label or state["state"])
+        else:
+            logger.error("model warm-up failed after %.0fms: %s", seconds * 1000, state.get("error", state["state"]))
+
+
+startup_state = StartupState()
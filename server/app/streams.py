@@ -0,0 +1,34 @@
+"""Helpers for building streamed response bodies with writers that expect a file."""
+from typing import List
+
+
+class StreamSink:
+    """Write-only file object that hands out what was written since the last drain.
+
+    Lets zipfile, csv or Parquet writers produce a response body chunk by
+    chunk instead of into one growing buffer.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._offset = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._offset
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
@@ -0,0 +1,78 @@
+"""Create tomorrow's daily summary rows shortly before KST midnight.
+
+Without this, every active user's first request after midnight inserts a
+summary row, so the rollover is a burst of writes. A background task wakes
+``SUMMARY_PREWARM_LEAD_SECONDS`` before midnight and bulk-inserts the next
+day's rows for everyone who has a row today. ``ON CONFLICT DO NOTHING`` makes
+it idempotent, so every worker process can run it.
+"""
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+import anyio
+
+from .db import get_db
+from .points import KST, prewarm_summaries
+
+SUMMARY_PREWARM_LEAD_SECONDS = float(os.getenv("SUMMARY_PREWARM_LEAD_SECONDS", "300"))
+
+logger = logging.getLogger("cashup.prewarm")
+
+
+def next_midnight(moment: datetime) -> datetime:
+    day = moment.astimezone(KST).date()
+    return datetime.combine(day + timedelta(days=1), datetime.min.time(), tzinfo=KST)
+
+
+def run_prewarm(moment: datetime) -> int:
+    """Create rows for the day after ``moment``'s KST day. Returns rows created."""
+    day = moment.astimezone(KST).date()
+    with get_db() as db:
+        return prewarm_summaries(db, day.isoformat(), (day + timedelta(days=1)).isoformat())
+
+
+class SummaryPrewarmer:
+    def __init__(
+        self,
+        lead_seconds: float = SUMMARY_PREWARM_LEAD_SECONDS,
+        clock: Callable[[], datetime] = lambda: datetime.now(KST),
+    ):
+        self.lead = timedelta(seconds=lead_seconds)
+        self.clock = clock
+        self._task: Optional[asyncio.Task] = None
+
+    def seconds_until_run(self) -> float:
+        """Time until the next run; 0 if we are already inside today's lead window."""
+        now = self.clock()
+        return max(0.0, (next_midnight(now) - self.lead - now).total_seconds())
+
+    async def start(self) -> None:
+        if self.lead.total_seconds() > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.seconds_until_run())
+            started = self.clock()
+            try:
+                created = await anyio.to_thread.run_sync(run_prewarm, started)
+                logger.info("pre-created %d daily summaries for %s", created, next_midnight(started).date())
+            except Exception:
+                logger.exception("daily summary pre-warm failed")
+            # Sleep past midnight so the next wait is measured from the new day.
+            await asyncio.sleep((next_midnight(started) - self.clock()).total_seconds() + 1)
+
+
+summary_prewarmer = SummaryPrewarmer()
@@ -0,0 +1,104 @@
+"""Bounded LRU of recently verified user tokens.
+
+Maps a token to ``(user_id, expires_at)`` so repeat requests skip the base64
+decode and HMAC recompute. Expiry is still checked on every hit, and the
+cache empties itself when it sees a different signing key.
+
+A hit is a plain dict read with no lock. Recency is only refreshed once an
+entry has drifted into the older half of the cache (measured in puts since it
+was last stamped), so hot tokens are never evicted while most hits write
+nothing. The hit/miss counters are updated without the lock and may drop an
+increment under concurrent requests.
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "20000"))
+
+
+class VerifiedTokenCache:
+    def __init__(self, max_entries: int = TOKEN_CACHE_MAX_ENTRIES):
+        # token -> (user_id, expires_at, put count when last stamped)
+        self._entries: "OrderedDict[str, Tuple[str, float, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._secret: Optional[str] = None
+        self._puts = 0
+        self.hits = 0
+        self.misses = 0
+        self.max_entries = max_entries
+
+    @property
+    def max_entries(self) -> int:
+        return self._max_entries
+
+    @max_entries.setter
+    def max_entries(self, value: int) -> None:
+        self._max_entries = value
+        # An entry is re-stamped on a hit once this many puts have happened since its stamp.
+        self._refresh_after = max(1, value >> 1)
+
+    def bind_secret(self, secret: str) -> None:
+        """Clear every entry if tokens are now signed with a different key."""
+        if secret is self._secret:
+            return
+        with self._lock:
+            if secret != self._secret:
+                self._entries.clear()
+            self._secret = secret
+
+    def get(self, token: str, now: float, secret: Optional[str] = None) -> Optional[str]:
+        """The cached user for ``token``; None on a miss, after expiry, or if ``secret`` is not the bound key."""
+        entry = self._entries.get(token)
+        # The common case in one condition: present, unexpired, same key, recently stamped.
+        if (
+            entry is not None
+            and now <= entry[1]
+            and (secret is None or secret is self._secret)
+            and self._puts - entry[2] < self._refresh_after
+        ):
+            self.hits += 1
+            return entry[0]
+        return self._get_slow(token, now, secret)
+
+    def _get_slow(self, token: str, now: float, secret: Optional[str]) -> Optional[str]:
+        if token not in self._entries or (secret is not None and secret is not self._secret):
+            self.misses += 1
+            return None
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+            user_id, expires_at, _ = entry
+            if now > expires_at:
+                del self._entries[token]
+                self.misses += 1
+                return None
+            # Drifted into the older half: stamp it and move it to the recent end.
+            self._entries[token] = (user_id, expires_at, self._puts)
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return user_id
+
+    def put(self, token: str, user_id: str, expires_at: float) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._puts += 1
+            self._entries[token] = (user_id, expires_at, self._puts)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+token_cache = VerifiedTokenCache()
@@ -1,14 +1,25 @@
 import os
+import threading
+import time
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence
 
-try:
-    from ultralytics import YOLO
-except Exception:  # ultralytics not installed or no weights available
-    YOLO = None  # type: ignore
+import numpy as np
+from PIL import Image
 
+from .imaging import MODEL_INPUT_EDGE
 
+# PyTorch weights (.pt), an exported ONNX file (.onnx) or an OpenVINO model
+# (``*_openvino_model`` directory or its .xml); see export_model.py.
 YOLO_MODEL_PATH = os.getenv("YOLO_MODEL_PATH", "yolov8n.pt")
+# Inference size; exported models must be exported at the same size.
+YOLO_IMGSZ = int(os.getenv("YOLO_IMGSZ", str(MODEL_INPUT_EDGE)))
+YOLO_CONF = float(os.getenv("YOLO_CONF", "0.25"))
+# Only ask the model for TRASH_CANDIDATE_CLASSES, so NMS and summarizing skip everything else.
+YOLO_TRASH_CLASSES_ONLY = os.getenv("YOLO_TRASH_CLASSES_ONLY", "1").lower() not in ("0", "false", "no")
+# Load tests/CI without weights: when set, analyze_batch returns a canned detection
+# after sleeping this many milliseconds per image instead of running the model.
+YOLO_STUB_LATENCY_MS = os.getenv("YOLO_STUB_LATENCY_MS")
 TRASH_CANDIDATE_CLASSES = {
     "bottle",
     "cup",
@@ -41,63 +52,175 @@ TRASH_CANDIDATE_CLASSES = {
     "tie",
 }
 
+# Square dummy image for warm-up; large enough to exercise the real letterbox/resize path.
+YOLO_WARMUP_IMAGE_SIZE = 640
+
 _model: Optional[Any] = None
+_model_error: Optional[str] = None
+_model_load_seconds: Optional[float] = None
+_predict_options: Dict[str, Any] = {}
+_model_lock = threading.Lock()
+
+
+def model_backend(path: str) -> str:
+    """``torch``, ``onnx`` or ``openvino`` for a model path; ValueError for anything else."""
+    model_path = Path(path)
+    if model_path.suffix == ".pt":
+        return "torch"
+    if model_path.suffix == ".onnx":
+        return "onnx"
+    if model_path.suffix == ".xml" or model_path.name.endswith("_openvino_model"):
+        return "openvino"
+    raise ValueError(f"unsupported model format: {path}")
+
+
+def load_model(path: str = YOLO_MODEL_PATH):
+    """Load any supported backend; ultralytics runs ONNX and OpenVINO models itself."""
+    model_backend(path)
+    # Imported on first use: ultralytics pulls in torch, which takes seconds to import.
+    from ultralytics import YOLO
+
+    # Exported models carry no task metadata ultralytics can rely on.
+    return YOLO(path, task="detect")
+
+
+def trash_class_ids(names: Dict[int, str]) -> List[int]:
+    return sorted(cls_id for cls_id, name in names.items() if name in TRASH_CANDIDATE_CLASSES)
+
+
+def predict_options(
+    names: Dict[int, str],
+    imgsz: int = YOLO_IMGSZ,
+    conf: float = YOLO_CONF,
+    trash_only: bool = YOLO_TRASH_CLASSES_ONLY,
+) -> Dict[str, Any]:
+    options: Dict[str, Any] = {"imgsz": imgsz, "conf": conf, "verbose": False}
+    if trash_only:
+        options["classes"] = trash_class_ids(names)
+    return options
 
 
 def _load_model():
-    global _model
-    if _model is None and YOLO is not None:
-        try:
-            _model = YOLO(YOLO_MODEL_PATH)
-        except Exception:
-            _model = None
+    global _model, _model_error, _model_load_seconds, _predict_options
+    if _model is not None or _model_error is not None:
+        return _model
+    with _model_lock:
+        if _model is None and _model_error is None:
+            started = time.perf_counter()
+            try:
+                model = load_model(YOLO_MODEL_PATH)
+                _predict_options = predict_options(model.names or {})
+                _model = model
+                _model_load_seconds = time.perf_counter() - started
+            except Exception as exc:  # ultralytics not installed, no weights or an unknown format
+                _model_error = f"{type(exc).__name__}: {exc}"
     return _model
 
 
-def analyze_trash(image_path: str) -> Dict[str, Any]:
-    """Run YOLO inference. Returns detection summary but never raises."""
-    model = _load_model()
-    if model is None or not Path(image_path).exists():
+def model_state() -> Dict[str, Any]:
+    """``stub``, ``loaded``, ``unavailable`` (with the error) or ``not_loaded``."""
+    if YOLO_STUB_LATENCY_MS:
+        return {"state": "stub"}
+    if _model is not None:
         return {
-            "has_trash": None,
-            "trash_count": None,
-            "max_trash_confidence": None,
-            "raw_detections": None,
+            "state": "loaded",
+            "backend": model_backend(YOLO_MODEL_PATH),
+            "loadSeconds": round(_model_load_seconds or 0.0, 3),
         }
+    if _model_error is not None:
+        return {"state": "unavailable", "error": _model_error}
+    return {"state": "not_loaded"}
 
-    try:
-        results = model(image_path, verbose=False)
-        detections: List[Dict[str, Any]] = []
-        trash_candidates: List[Dict[str, Any]] = []
-        for res in results:
-            names = res.names
-            for box in res.boxes:
-                cls_id = int(box.cls[0])
-                cls_name = names.get(cls_id, str(cls_id)) if names else str(cls_id)
-                conf = float(box.conf[0])
-                bbox = [float(x) for x in box.xyxy[0].tolist()]
-                det = {
-                    "class_id": cls_id,
-                    "class_name": cls_name,
-                    "confidence": conf,
-                    "bbox": bbox,
-                }
-                detections.append(det)
-                if cls_name in TRASH_CANDIDATE_CLASSES:
-                    trash_candidates.append(det)
-
-        has_trash = bool(trash_candidates)
-        max_conf = max((d["confidence"] for d in trash_candidates), default=None)
-        return {
-            "has_trash": has_trash,
-            "trash_count": len(trash_candidates),
-            "max_trash_confidence": max_conf,
-            "raw_detections": detections,
+
+def warmup_image() -> np.ndarray:
+    return np.zeros((YOLO_WARMUP_IMAGE_SIZE, YOLO_WARMUP_IMAGE_SIZE, 3), dtype=np.uint8)
+
+
+def warm_up() -> Dict[str, Any]:
+    """Load the weights and run one dummy inference so the first upload does not pay for it."""
+    analyze_batch([warmup_image()])
+    return model_state()
+
+
+def empty_result() -> Dict[str, Any]:
+    return {
+        "has_trash": None,
+        "trash_count": None,
+        "max_trash_confidence": None,
+        "raw_detections": None,
+    }
+
+
+def summarize(res: Any) -> Dict[str, Any]:
+    names = res.names
+    detections: List[Dict[str, Any]] = []
+    trash_candidates: List[Dict[str, Any]] = []
+    for box in res.boxes:
+        cls_id = int(box.cls[0])
+        cls_name = names.get(cls_id, str(cls_id)) if names else str(cls_id)
+        conf = float(box.conf[0])
+        bbox = [float(x) for x in box.xyxy[0].tolist()]
+        det = {
+            "class_id": cls_id,
+            "class_name": cls_name,
+            "confidence": conf,
+            "bbox": bbox,
         }
+        detections.append(det)
+        if cls_name in TRASH_CANDIDATE_CLASSES:
+            trash_candidates.append(det)
+
+    max_conf = max((d["confidence"] for d in trash_candidates), default=None)
+    return {
+        "has_trash": bool(trash_candidates),
+        "trash_count": len(trash_candidates),
+        "max_trash_confidence": max_conf,
+        "raw_detections": detections,
+    }
+
+
+def image_to_array(img: Image.Image) -> np.ndarray:
+    """Convert a decoded image into the HWC BGR uint8 array ultralytics expects for numpy input."""
+    rgb = np.asarray(img.convert("RGB"))
+    return np.ascontiguousarray(rgb[..., ::-1])
+
+
+def analyze_batch(images: Sequence[Any]) -> List[Dict[str, Any]]:
+    """Run one batched YOLO call over decoded images or paths. Never raises."""
+    if not images:
+        return []
+    if YOLO_STUB_LATENCY_MS:
+        return _stub_batch(images)
+    model = _load_model()
+    if model is None:
+        return [empty_result() for _ in images]
+    try:
+        results = model(list(images), **_predict_options)
+        summaries = [summarize(res) for res in results]
     except Exception:
-        return {
-            "has_trash": None,
-            "trash_count": None,
-            "max_trash_confidence": None,
-            "raw_detections": None,
+        return [empty_result() for _ in images]
+    if len(summaries) != len(images):
+        return [empty_result() for _ in images]
+    return summaries
+
+
+def _stub_batch(images: Sequence[Any]) -> List[Dict[str, Any]]:
+    time.sleep(float(YOLO_STUB_LATENCY_MS) * len(images) / 1000)
+    return [
+        {
+            "has_trash": True,
+            "trash_count": 1,
+            "max_trash_confidence": 0.8,
+            "raw_detections": [
+                {"class_id": 39, "class_name": "bottle", "confidence": 0.8, "bbox": [10.0, 10.0, 60.0, 120.0]}
+            ],
         }
+        for _ in images
+    ]
+
+
+def analyze_trash(image_path: str) -> Dict[str, Any]:
+    """Run YOLO inference. Returns detection summary but never raises."""
+    if _load_model() is None or not Path(image_path).exists():
+        return empty_result()
+    return analyze_batch([image_path])[0]
@@ -0,0 +1,56 @@
+"""Per-request auth cost with and without the verified-token cache.
+
+Usage (from server/): python -m benchmarks.bench_auth [--tokens 10000] [--requests 200000]
+"""
+import argparse
+import random
+import time
+
+from app import main
+from app.token_cache import token_cache
+
+
+def run(tokens: int, requests: int, seed: int = 0):
+    headers = [f"Bearer {main.create_token(f'user-{idx}')}" for idx in range(tokens)]
+    rng = random.Random(seed)
+    sequence = [rng.choice(headers) for _ in range(requests)]
+
+    def measure() -> float:
+        start = time.perf_counter()
+        for header in sequence:
+            main.get_current_user_id(header)
+        return (time.perf_counter() - start) / requests * 1e9
+
+    original_limit = token_cache.max_entries
+    try:
+        token_cache.max_entries = 0
+        token_cache.clear()
+        uncached = measure()
+
+        token_cache.max_entries = max(original_limit, tokens)
+        token_cache.clear()
+        for header in headers:
+            main.get_current_user_id(header)
+        cached = measure()
+    finally:
+        token_cache.max_entries = original_limit
+        token_cache.clear()
+    return uncached, cached
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tokens", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=200_000)
+    args = parser.parse_args()
+
+    uncached, cached = run(args.tokens, args.requests)
+    print(f"distinct active tokens: {args.tokens}, requests: {args.requests}")
+    print(f"{'path':<24}{'ns/request':>12}")
+    print(f"{'HMAC verify (no cache)':<24}{uncached:>12.0f}")
+    print(f"{'LRU hit':<24}{cached:>12.0f}")
+    print(f"speedup: {uncached / cached:.1f}x")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,188 @@
+"""Accuracy vs latency of YOLO backends (PyTorch, ONNX, OpenVINO, INT8) on real photos.
+
+Every model runs over the same images, one predict call per image, with the
+serving options (``YOLO_IMGSZ``, ``YOLO_CONF``, trash classes only). The first
+model is the reference, normally the PyTorch weights. Each other model is
+scored against it on what the upload path stores: agreement on ``has_trash``
+and on ``trash_count``, and recall/precision of its trash boxes (same class,
+IoU >= 0.5). Latency is wall time per call after a short warm-up.
+
+Images are stored uploads spread over the upload history, prepared like
+uploads (``model_input_copy``). They overlap the INT8 calibration set; pass
+``--images-dir`` with held-out photos for an unbiased accuracy figure.
+
+Usage (from server/):
+    python -m benchmarks.compare_backends yolov8n.pt yolov8n.onnx yolov8n_int8.onnx yolov8n_int8_openvino_model
+    python -m benchmarks.compare_backends yolov8n.pt yolov8n_int8.onnx --images 300 --json results/backends.json
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from app.model_export import load_calibration_image
+from app.yolo_utils import (
+    TRASH_CANDIDATE_CLASSES,
+    YOLO_CONF,
+    YOLO_IMGSZ,
+    image_to_array,
+    load_model,
+    model_backend,
+    predict_options,
+    summarize,
+)
+from benchmarks.loadtest import percentile
+
+IOU_THRESHOLD = 0.5
+WARMUP_CALLS = 3
+
+
+def iou(a: Sequence[float], b: Sequence[float]) -> float:
+    width = min(a[2], b[2]) - max(a[0], b[0])
+    height = min(a[3], b[3]) - max(a[1], b[1])
+    if width <= 0 or height <= 0:
+        return 0.0
+    overlap = width * height
+    return overlap / ((a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - overlap)
+
+
+def trash_boxes(result: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [det for det in result.get("raw_detections") or [] if det["class_name"] in TRASH_CANDIDATE_CLASSES]
+
+
+def match_boxes(
+    reference: List[Dict[str, Any]], candidate: List[Dict[str, Any]], threshold: float = IOU_THRESHOLD
+) -> int:
+    """Greedy one-to-one matching, most confident candidate first; returns the matches."""
+    unmatched = list(reference)
+    matched = 0
+    for det in sorted(candidate, key=lambda d: d["confidence"], reverse=True):
+        best, best_iou = None, threshold
+        for ref in unmatched:
+            overlap = iou(det["bbox"], ref["bbox"])
+            if ref["class_id"] == det["class_id"] and overlap >= best_iou:
+                best, best_iou = ref, overlap
+        if best is not None:
+            unmatched.remove(best)
+            matched += 1
+    return matched
+
+
+def score(reference: Sequence[Dict[str, Any]], candidate: Sequence[Dict[str, Any]]) -> Dict[str, float]:
+    """Agreement of ``candidate`` with ``reference``, image by image."""
+    images = len(reference)
+    has_trash = sum(ref["has_trash"] == cand["has_trash"] for ref, cand in zip(reference, candidate))
+    count = sum(ref["trash_count"] == cand["trash_count"] for ref, cand in zip(reference, candidate))
+    matched = ref_boxes = cand_boxes = 0
+    for ref, cand in zip(reference, candidate):
+        ref_trash, cand_trash = trash_boxes(ref), trash_boxes(cand)
+        matched += match_boxes(ref_trash, cand_trash)
+        ref_boxes += len(ref_trash)
+        cand_boxes += len(cand_trash)
+    return {
+        "has_trash_agreement": has_trash / images if images else 1.0,
+        "count_agreement": count / images if images else 1.0,
+        "box_recall": matched / ref_boxes if ref_boxes else 1.0,
+        "box_precision": matched / cand_boxes if cand_boxes else 1.0,
+    }
+
+
+def run_model(path: str, images: Sequence[np.ndarray], options: Dict[str, Any]) -> Tuple[List[dict], List[float]]:
+    model = load_model(path)
+    kwargs = predict_options(model.names or {}, options["imgsz"], options["conf"], options["trash_only"])
+    for image in images[:WARMUP_CALLS]:
+        model([image], **kwargs)
+    results, latencies = [], []
+    for image in images:
+        started = time.perf_counter()
+        [res] = model([image], **kwargs)
+        latencies.append((time.perf_counter() - started) * 1000)
+        results.append(summarize(res))
+    return results, latencies
+
+
+def compare_models(paths: Sequence[str], images: Sequence[np.ndarray], options: Dict[str, Any]) -> List[dict]:
+    rows, reference, reference_mean = [], None, None
+    for path in paths:
+        results, latencies = run_model(path, images, options)
+        mean = sum(latencies) / len(latencies)
+        row = {
+            "model": path,
+            "backend": model_backend(path),
+            "mean_ms": mean,
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+        }
+        if reference is None:
+            reference, reference_mean = results, mean
+        row["speedup"] = reference_mean / mean
+        row.update(score(reference, results))
+        rows.append(row)
+    return rows
+
+
+def format_report(rows: Sequence[dict], images: int) -> str:
+    lines = [
+        f"{images} images, reference: {rows[0]['model']}",
+        "",
+        "| model | backend | mean ms | p50 ms | p95 ms | speedup | has_trash | count | box recall | box precision |",
+        "|---|---|---:|---:|---:|---:|---:|---:|---:|---:|",
+    ]
+    for row in rows:
+        lines.append(
+            f"| {row['model']} | {row['backend']} | {row['mean_ms']:.1f} | {row['p50_ms']:.1f} | {row['p95_ms']:.1f}"
+            f" | {row['speedup']:.2f}x | {row['has_trash_agreement']:.1%} | {row['count_agreement']:.1%}"
+            f" | {row['box_recall']:.1%} | {row['box_precision']:.1%} |"
+        )
+    return "\n".join(lines)
+
+
+def load_images(args) -> List[np.ndarray]:
+    if args.images_dir:
+        paths = sorted(p for p in Path(args.images_dir).iterdir() if p.suffix.lower() in (".jpg", ".jpeg", ".png"))
+        paths = paths[: args.images]
+    else:
+        from app.db import create_db_and_tables, get_read_db
+        from app.main import UPLOAD_DIR
+        from app.model_export import calibration_images
+
+        create_db_and_tables()
+        with get_read_db() as db:
+            paths = calibration_images(db, UPLOAD_DIR, args.images)
+    return [image_to_array(load_calibration_image(path)) for path in paths]
+
+
+def main_cli() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("models", nargs="+", help="model paths; the first is the reference")
+    parser.add_argument("--images", type=int, default=200, help="number of photos to run")
+    parser.add_argument("--images-dir", help="held-out photos instead of stored uploads")
+    parser.add_argument("--imgsz", type=int, default=YOLO_IMGSZ)
+    parser.add_argument("--conf", type=float, default=YOLO_CONF)
+    parser.add_argument("--all-classes", action="store_true", help="do not restrict inference to trash classes")
+    parser.add_argument("--json", type=Path, help="also write the rows as JSON")
+    args = parser.parse_args()
+    for path in args.models:
+        try:
+            model_backend(path)
+        except ValueError as exc:
+            parser.error(str(exc))
+
+    images = load_images(args)
+    if not images:
+        parser.error("no images to run")
+    options = {"imgsz": args.imgsz, "conf": args.conf, "trash_only": not args.all_classes}
+    rows = compare_models(args.models, images, options)
+    print(format_report(rows, len(images)))
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        args.json.write_text(json.dumps({"images": len(images), **options, "rows": rows}, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,159 @@
+"""Storage size of per-photo detections: legacy JSON ``yolo_raw`` vs packed ``detections``.
+
+Generates a festival-sized set of photos with detections shaped like real
+uploads: a Poisson number of boxes per photo drawn mostly from the trash
+classes, full-precision float32 confidences, and boxes mapped back to a
+2048x1536 stored image (rounded to 0.1px, as ``scale_detections`` does). The
+same rows are written to two SQLite files with the ``trash_photos`` columns,
+one per format, and the report compares the column payload, the file size
+after VACUUM, and the ``include=detections`` page of ``list_photos``.
+
+Usage (from server/):
+    python -m benchmarks.detection_storage --photos 50000 --mean-boxes 3
+"""
+import argparse
+import json
+import sqlite3
+import sys
+import tempfile
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.detections import COCO_CLASS_NAMES, decode_detections, encode_detections
+from app.yolo_utils import TRASH_CANDIDATE_CLASSES
+
+STORED_SIZE = (2048, 1536)
+PAGE_SIZE = 30
+TRASH_SHARE = 0.8
+
+COLUMNS = (
+    "id VARCHAR PRIMARY KEY, user_id VARCHAR NOT NULL, festival_id VARCHAR NOT NULL, image_url VARCHAR NOT NULL, "
+    "thumbnail_url VARCHAR, hash VARCHAR NOT NULL, hash_value BIGINT, content_sha256 VARCHAR, "
+    "status VARCHAR NOT NULL, points INTEGER NOT NULL, has_trash BOOLEAN, trash_count INTEGER, "
+    "max_trash_confidence FLOAT, created_at DATETIME NOT NULL"
+)
+
+
+def make_detections(rng: np.random.Generator, mean_boxes: float) -> List[Dict[str, Any]]:
+    trash_ids = [i for i, name in enumerate(COCO_CLASS_NAMES) if name in TRASH_CANDIDATE_CLASSES]
+    detections = []
+    for _ in range(rng.poisson(mean_boxes)):
+        cls_id = int(rng.choice(trash_ids)) if rng.random() < TRASH_SHARE else int(rng.integers(0, 80))
+        width, height = rng.uniform(40, 900), rng.uniform(40, 900)
+        x1, y1 = rng.uniform(0, STORED_SIZE[0] - width), rng.uniform(0, STORED_SIZE[1] - height)
+        detections.append(
+            {
+                "class_id": cls_id,
+                "class_name": COCO_CLASS_NAMES[cls_id],
+                "confidence": float(np.float32(rng.uniform(0.25, 0.98))),
+                "bbox": [round(v, 1) for v in (x1, y1, x1 + width, y1 + height)],
+            }
+        )
+    return detections
+
+
+def make_rows(photos: int, mean_boxes: float, seed: int) -> List[Dict[str, Any]]:
+    rng = np.random.default_rng(seed)
+    created = datetime(2024, 10, 5, 12)
+    rows = []
+    for index in range(photos):
+        detections = make_detections(rng, mean_boxes)
+        trash = [d for d in detections if d["class_name"] in TRASH_CANDIDATE_CLASSES]
+        name = uuid.UUID(int=int(rng.integers(0, 2**63))).hex
+        rows.append(
+            {
+                "id": uuid.UUID(int=index + 1).hex,
+                "user_id": f"user-{index % 500}",
+                "festival_id": "festival",
+                "image_url": f"/uploads/{name}.jpg",
+                "thumbnail_url": f"/uploads/{name}_thumb.webp",
+                "hash": f"{int(rng.integers(0, 2**63)):016x}",
+                "hash_value": int(rng.integers(-(2**63), 2**63 - 1)),
+                "content_sha256": f"{int(rng.integers(0, 2**63)):064x}",
+                "status": "PENDING",
+                "points": 100,
+                "has_trash": bool(trash),
+                "trash_count": len(trash),
+                "max_trash_confidence": max((d["confidence"] for d in trash), default=None),
+                "created_at": (created + timedelta(seconds=index)).isoformat(" "),
+                "detections": detections,
+            }
+        )
+    return rows
+
+
+def write_db(path: Path, rows: List[Dict[str, Any]], column: str, ddl_type: str, encode) -> int:
+    conn = sqlite3.connect(path)
+    conn.execute(f"CREATE TABLE trash_photos ({COLUMNS}, {column} {ddl_type})")
+    names = [name for name in rows[0] if name != "detections"]
+    placeholders = ", ".join("?" for _ in range(len(names) + 1))
+    conn.executemany(
+        f"INSERT INTO trash_photos ({', '.join(names)}, {column}) VALUES ({placeholders})",
+        ([row[name] for name in names] + [encode(row["detections"])] for row in rows),
+    )
+    conn.commit()
+    conn.execute("VACUUM")
+    conn.close()
+    return path.stat().st_size
+
+
+def payload_bytes(values: List[Optional[Any]]) -> int:
+    return sum(len(value) for value in values if value is not None)
+
+
+def measure(photos: int, mean_boxes: float, seed: int = 0) -> Dict[str, Any]:
+    rows = make_rows(photos, mean_boxes, seed)
+    legacy = [json.dumps(row["detections"]) for row in rows]
+    packed = [encode_detections(row["detections"]) for row in rows]
+    with tempfile.TemporaryDirectory(prefix="cashup-detections-") as scratch:
+        legacy_file = write_db(Path(scratch) / "legacy.db", rows, "yolo_raw", "JSON", json.dumps)
+        packed_file = write_db(Path(scratch) / "packed.db", rows, "detections", "BLOB", encode_detections)
+    page = rows[:PAGE_SIZE]
+    return {
+        "photos": photos,
+        "boxes": sum(len(row["detections"]) for row in rows),
+        "legacy_payload": payload_bytes([v.encode() for v in legacy]),
+        "packed_payload": payload_bytes(packed),
+        "legacy_file": legacy_file,
+        "packed_file": packed_file,
+        # The yoloRaw part of one include=detections page, as served before and after.
+        "legacy_page": len(json.dumps([row["detections"] for row in page], ensure_ascii=False)),
+        "packed_page": len(
+            json.dumps([decode_detections(encode_detections(row["detections"])) for row in page], ensure_ascii=False)
+        ),
+    }
+
+
+def format_report(result: Dict[str, Any]) -> str:
+    def line(label: str, before: int, after: int) -> str:
+        return f"{label:<28}{before:>14,}{after:>14,}{1 - after / before:>10.0%}"
+
+    header = f"{'':<28}{'JSON yolo_raw':>14}{'packed':>14}{'saved':>10}"
+    return "\n".join(
+        [
+            f"{result['photos']:,} photos, {result['boxes']:,} boxes",
+            header,
+            "-" * len(header),
+            line("detections payload (B)", result["legacy_payload"], result["packed_payload"]),
+            line("SQLite file after VACUUM (B)", result["legacy_file"], result["packed_file"]),
+            line(f"yoloRaw per {PAGE_SIZE}-photo page (B)", result["legacy_page"], result["packed_page"]),
+        ]
+    )
+
+
+def main_cli() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--photos", type=int, default=50_000)
+    parser.add_argument("--mean-boxes", type=float, default=3.0, help="mean detections per photo")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(format_report(measure(args.photos, args.mean_boxes, args.seed)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,348 @@
+"""Festival-peak load test against a real uvicorn process.
+
+Starts ``app.main:app`` on a fresh SQLite database in a scratch directory,
+seeds the festival, bins and returning users with the ``seed.py`` helpers, and
+replays participant journeys (mock-login -> summary -> trash-photos ->
+trash-bins/scan -> coupons -> photos) arriving as a Poisson process, while
+admin pollers hit the dashboard summary. Inference uses the YOLO stub, so no
+weights are needed.
+
+Usage (from server/):
+    python -m benchmarks.loadtest --users 300 --arrival-rate 30 --concurrency 100
+    python -m benchmarks.loadtest --json results/peak.json --compare results/baseline.json
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import httpx
+import numpy as np
+from PIL import Image
+
+SERVER_DIR = Path(__file__).resolve().parent.parent
+
+
+def percentile(values: Sequence[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def make_photos(count: int, size: int, seed: int) -> List[bytes]:
+    """Distinct phone-like JPEGs: smooth random gradients, so every average hash differs."""
+    rng = np.random.default_rng(seed)
+    photos = []
+    for _ in range(count):
+        coarse = rng.integers(0, 255, (6, 8, 3), dtype=np.uint8)
+        img = Image.fromarray(coarse).resize((size, size * 3 // 4), Image.BICUBIC)
+        buffer = io.BytesIO()
+        img.save(buffer, format="JPEG", quality=90)
+        photos.append(buffer.getvalue())
+    return photos
+
+
+def dir_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file()) if path.exists() else 0
+
+
+def db_size(db_path: Path) -> int:
+    return sum(p.stat().st_size for p in db_path.parent.glob(db_path.name + "*") if p.is_file())
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+
+    async def call(self, client: httpx.AsyncClient, label: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError as exc:
+            self.latencies[label].append((time.perf_counter() - start) * 1000)
+            self.statuses[label][type(exc).__name__] += 1
+            return None
+        self.latencies[label].append((time.perf_counter() - start) * 1000)
+        self.statuses[label][str(response.status_code)] += 1
+        return response
+
+
+class LoadTest:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.recorder = Recorder()
+
+    # -- environment -----------------------------------------------------------------
+    def prepare(self) -> None:
+        args = self.args
+        self.workdir = Path(args.workdir or tempfile.mkdtemp(prefix="cashup-load-"))
+        self.workdir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.workdir / "load.db"
+        self.upload_dir = self.workdir / "uploads"
+        self.env = {
+            **os.environ,
+            "DATABASE_URL": f"sqlite:///{self.db_path}",
+            "UPLOAD_DIR": str(self.upload_dir),
+            "SECRET_KEY": f"load-{args.seed}",
+            "YOLO_STUB_LATENCY_MS": str(args.stub_latency_ms),
+            "RATE_LIMIT_SQLITE_PATH": str(self.workdir / "ratelimit.db"),
+        }
+        if args.workers > 1:
+            self.env.setdefault("RATE_LIMIT_BACKEND", "sqlite")
+        # The seeding helpers read DATABASE_URL at import time, so seed in a child process.
+        seed_script = (
+            "import json, sys\n"
+            "from app.db import create_db_and_tables, get_db\n"
+            "from app.main import create_token\n"
+            "from seed import seed_festival, seed_users\n"
+            "create_db_and_tables()\n"
+            "with get_db() as db:\n"
+            f"    festival = seed_festival(db, bin_count={args.bins}, budget={args.budget})\n"
+            f"    users = seed_users(db, {args.users})\n"
+            "    out = {'festival': {'id': festival.id, 'lat': festival.center_lat, 'lng': festival.center_lng},\n"
+            "           'bins': [b.code for b in festival.trash_bins],\n"
+            "           'users': [[u.id, create_token(u.id)] for u in users]}\n"
+            "json.dump(out, sys.stdout)\n"
+        )
+        seeded = subprocess.run(
+            [sys.executable, "-c", seed_script], cwd=SERVER_DIR, env=self.env, check=True, capture_output=True, text=True
+        )
+        self.seed = json.loads(seeded.stdout.strip().splitlines()[-1])
+        self.photos = make_photos(args.users * args.photos_per_user, args.image_size, args.seed)
+
+    def start_server(self) -> None:
+        self.port = free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        command = [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(self.port),
+            "--workers", str(self.args.workers), "--log-level", "warning",
+        ]
+        self.server = subprocess.Popen(command, cwd=SERVER_DIR, env=self.env)
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            try:
+                if httpx.get(f"{self.base_url}/api/festivals", timeout=1).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            if self.server.poll() is not None:
+                raise RuntimeError("uvicorn exited during startup")
+            time.sleep(0.2)
+        raise RuntimeError("uvicorn did not become ready within 60s")
+
+    def stop_server(self) -> None:
+        self.server.terminate()
+        try:
+            self.server.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            self.server.kill()
+
+    # -- traffic -----------------------------------------------------------------------
+    async def think(self) -> None:
+        if self.args.think_ms > 0:
+            await asyncio.sleep(self.rng.uniform(0, self.args.think_ms) / 1000)
+
+    async def journey(self, client: httpx.AsyncClient, index: int) -> None:
+        args, call = self.args, self.recorder.call
+        festival = self.seed["festival"]
+        fid = festival["id"]
+        # One phone per participant; the API rate-limits mock-login per client IP.
+        ip = {"X-Real-IP": f"10.{index // 65536 % 256}.{index // 256 % 256}.{index % 256}"}
+
+        if self.rng.random() < args.new_user_ratio:
+            response = await call(
+                client, "POST /auth/mock-login", "POST", "/api/auth/mock-login",
+                json={"nickname": f"load-{index}"}, headers=ip,
+            )
+            if response is None or response.status_code != 200:
+                return
+            body = response.json()
+            user_id, token = body["user"]["id"], body["token"]
+        else:
+            user_id, token = self.seed["users"][index]
+        headers = {**ip, "Authorization": f"Bearer {token}"}
+        location = {"lat": str(festival["lat"]), "lng": str(festival["lng"])}
+
+        await call(client, "GET /users/:id/summary", "GET", f"/api/users/{user_id}/summary",
+                   params={"festivalId": fid}, headers=headers)
+        for k in range(args.photos_per_user):
+            await self.think()
+            photo = self.photos[(index * args.photos_per_user + k) % len(self.photos)]
+            await call(client, "POST /trash-photos", "POST", f"/api/festivals/{fid}/trash-photos",
+                       data=location, files={"image": ("photo.jpg", photo, "image/jpeg")}, headers=headers)
+        await self.think()
+        await call(client, "POST /trash-bins/scan", "POST", f"/api/festivals/{fid}/trash-bins/scan",
+                   json={"binCode": self.rng.choice(self.seed["bins"]), **location}, headers=headers)
+        await self.think()
+        await call(client, "POST /coupons", "POST", f"/api/festivals/{fid}/coupons",
+                   json={"shopName": "OO 카페", "amount": 100 * max(1, args.photos_per_user - 1)}, headers=headers)
+        await call(client, "GET /users/:id/photos", "GET", f"/api/users/{user_id}/photos",
+                   params={"festivalId": fid}, headers=headers)
+
+    async def poller(self, client: httpx.AsyncClient, stop: asyncio.Event) -> None:
+        url = f"/api/admin/festivals/{self.seed['festival']['id']}/summary"
+        headers = {"X-Admin-Token": os.environ.get("ADMIN_TOKEN", "admin123")}
+        while not stop.is_set():
+            await self.recorder.call(client, "GET /admin/summary", "GET", url, headers=headers)
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=self.args.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def drive(self) -> float:
+        args = self.args
+        limits = httpx.Limits(max_connections=args.concurrency + args.pollers, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=self.base_url, limits=limits, timeout=args.timeout) as client:
+            stop = asyncio.Event()
+            pollers = [asyncio.create_task(self.poller(client, stop)) for _ in range(args.pollers)]
+            gate = asyncio.Semaphore(args.concurrency)
+
+            async def gated(index: int) -> None:
+                async with gate:
+                    await self.journey(client, index)
+
+            start = time.perf_counter()
+            journeys = []
+            for index in range(args.users):
+                journeys.append(asyncio.create_task(gated(index)))
+                await asyncio.sleep(self.rng.expovariate(args.arrival_rate))
+            await asyncio.gather(*journeys)
+            elapsed = time.perf_counter() - start
+            stop.set()
+            await asyncio.gather(*pollers)
+        return elapsed
+
+    # -- reporting ---------------------------------------------------------------------
+    def run(self) -> dict:
+        self.prepare()
+        try:
+            self.start_server()
+            db_before, uploads_before = db_size(self.db_path), dir_size(self.upload_dir)
+            elapsed = asyncio.run(self.drive())
+        finally:
+            if hasattr(self, "server"):
+                self.stop_server()
+        report = self.report(elapsed, db_before, uploads_before)
+        if not self.args.keep:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+        return report
+
+    def report(self, elapsed: float, db_before: int, uploads_before: int) -> dict:
+        endpoints = {}
+        totals: Counter = Counter()
+        for label in sorted(self.recorder.latencies):
+            latencies = self.recorder.latencies[label]
+            statuses = self.recorder.statuses[label]
+            totals.update(statuses)
+            endpoints[label] = {
+                "requests": len(latencies),
+                "rps": round(len(latencies) / elapsed, 2),
+                "p50_ms": round(percentile(latencies, 50), 1),
+                "p95_ms": round(percentile(latencies, 95), 1),
+                "p99_ms": round(percentile(latencies, 99), 1),
+                "max_ms": round(max(latencies), 1),
+                "statuses": dict(sorted(statuses.items())),
+            }
+        requests = sum(totals.values())
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SERVER_DIR, capture_output=True, text=True)
+        return {
+            "meta": {
+                "commit": commit.stdout.strip() or None,
+                "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "args": {k: v for k, v in vars(self.args).items() if k not in ("json", "compare", "workdir", "keep")},
+            },
+            "duration_s": round(elapsed, 2),
+            "requests": requests,
+            "throughput_rps": round(requests / elapsed, 2),
+            "errors": {k: v for k, v in sorted(totals.items()) if not k.startswith("2") and k != "429"},
+            "rate_limited": totals.get("429", 0),
+            "db_bytes": {"before": db_before, "after": db_size(self.db_path)},
+            "upload_bytes": {"before": uploads_before, "after": dir_size(self.upload_dir)},
+            "endpoints": endpoints,
+        }
+
+
+def format_table(report: dict, baseline: Optional[dict] = None) -> str:
+    header = f"{'endpoint':<26}{'reqs':>7}{'rps':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}  statuses"
+    if baseline:
+        header += "   Δp95 vs baseline"
+    lines = [header, "-" * len(header)]
+    for label, row in report["endpoints"].items():
+        statuses = " ".join(f"{code}:{count}" for code, count in row["statuses"].items())
+        line = (
+            f"{label:<26}{row['requests']:>7}{row['rps']:>8.1f}{row['p50_ms']:>9.1f}"
+            f"{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}{row['max_ms']:>9.1f}  {statuses}"
+        )
+        before = (baseline or {}).get("endpoints", {}).get(label)
+        if before:
+            delta = row["p95_ms"] - before["p95_ms"]
+            pct = delta / before["p95_ms"] * 100 if before["p95_ms"] else 0.0
+            line += f"   {delta:+.1f}ms ({pct:+.0f}%)"
+        lines.append(line)
+    db, uploads = report["db_bytes"], report["upload_bytes"]
+    lines += [
+        "",
+        f"duration {report['duration_s']}s, {report['requests']} requests, {report['throughput_rps']} req/s"
+        + (f" (baseline {baseline['throughput_rps']} req/s @ {baseline['meta'].get('commit')})" if baseline else ""),
+        f"429 rate-limited: {report['rate_limited']}, errors: {report['errors'] or 'none'}",
+        f"db growth: {(db['after'] - db['before']) / 1024:.0f} KiB ({db['after'] / 1024:.0f} KiB total), "
+        f"uploads: {(uploads['after'] - uploads['before']) / 1024 / 1024:.1f} MiB",
+    ]
+    return "\n".join(lines)
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=200, help="participant journeys to run")
+    parser.add_argument("--arrival-rate", type=float, default=20.0, help="new participants per second (Poisson)")
+    parser.add_argument("--concurrency", type=int, default=64, help="max journeys in flight")
+    parser.add_argument("--photos-per-user", type=int, default=3)
+    parser.add_argument("--new-user-ratio", type=float, default=0.3, help="share of journeys that start with mock-login")
+    parser.add_argument("--think-ms", type=float, default=300.0, help="max random pause between a participant's steps")
+    parser.add_argument("--pollers", type=int, default=3, help="admin dashboards polling the summary")
+    parser.add_argument("--poll-interval", type=float, default=2.0)
+    parser.add_argument("--bins", type=int, default=10)
+    parser.add_argument("--budget", type=int, default=50_000_000)
+    parser.add_argument("--image-size", type=int, default=1600, help="long edge of generated photos")
+    parser.add_argument("--stub-latency-ms", type=float, default=40.0, help="stub model cost per image")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", type=Path, help="write the report as JSON")
+    parser.add_argument("--compare", type=Path, help="JSON report from an earlier run to diff against")
+    parser.add_argument("--workdir", type=Path, help="scratch directory (default: a temp dir)")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch database and uploads")
+    args = parser.parse_args()
+
+    report = LoadTest(args).run()
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    print(format_table(report, baseline))
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        args.json.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,335 @@
+"""Micro-benchmarks for the pure per-request helpers, with a stored baseline.
+
+Each case calls one helper over a fixed set of representative inputs (phone-sized
+JPEGs, mixed hex/binary hash strings, messy QR codes, ORM rows) and records
+ops/sec and the peak bytes allocated by a single call (tracemalloc, which sees
+Python and numpy allocations but not Pillow's internal image buffers).
+
+Results are compared against ``benchmarks/baselines/microbench.json``. Each case
+is preceded by a short fixed pure-Python calibration loop, and speeds are compared
+relative to it, so a baseline recorded on a faster machine (or while the machine
+was busier) still compares fairly.
+
+Usage (from server/):
+    python -m benchmarks.microbench                  # compare against the baseline
+    python -m benchmarks.microbench --save           # record a new baseline
+    python -m benchmarks.microbench --filter hash    # only matching cases
+"""
+import argparse
+import io
+import json
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, replace
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+from PIL import Image
+
+from app.config_cache import BinSnapshot, FestivalSnapshot
+from app.detections import encode_detections
+from app.geo import BinIndex
+from app.hash_index import hash_to_int
+from app.imaging import model_input_copy
+from app.main import (
+    compute_image_hash,
+    decode_image,
+    hamming_distance,
+    haversine_distance,
+    is_inside_festival,
+    normalize_bin_code,
+    parse_hash,
+    serialize_bin,
+    serialize_coupon,
+    serialize_festival,
+    serialize_photo,
+)
+from app.models import Coupon, TrashPhoto
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baselines" / "microbench.json"
+DEFAULT_THRESHOLD = 0.25
+
+
+@dataclass
+class Case:
+    name: str
+    fn: Callable[[Any], Any]
+    inputs: Sequence[Any]
+    # Approximate wall time for all repeats; image cases run one round per repeat.
+    budget_s: float = 0.5
+
+
+def phone_jpeg(width: int = 4032, height: int = 3024, seed: int = 0) -> bytes:
+    """A deterministic 12MP camera-like JPEG: smooth scene plus sensor noise."""
+    rng = np.random.default_rng(seed)
+    scene = Image.fromarray(rng.integers(0, 255, (12, 16, 3), dtype=np.uint8)).resize((width, height), Image.BICUBIC)
+    noisy = np.asarray(scene, dtype=np.int16) + rng.normal(0, 6, (height, width, 3)).astype(np.int16)
+    buffer = io.BytesIO()
+    Image.fromarray(np.clip(noisy, 0, 255).astype(np.uint8)).save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def build_cases() -> List[Case]:
+    festival = FestivalSnapshot(
+        id="f" * 16, name="해운대 불꽃축제", budget=5_000_000, per_user_daily_cap=3000, per_photo_point=100,
+        center_lat=35.1587, center_lng=129.1604, radius_meters=1200,
+    )
+    open_festival = replace(festival, center_lat=None, center_lng=None)
+    # Beach strip plus a disjoint plaza, as an admin would draw them.
+    polygon_festival = replace(festival, geofence=(
+        ((35.1560, 129.1540), (35.1600, 129.1530), (35.1610, 129.1600), (35.1600, 129.1680), (35.1570, 129.1690)),
+        ((35.1690, 129.1600), (35.1700, 129.1600), (35.1700, 129.1610), (35.1690, 129.1610)),
+    ))
+    # Inside, on the edge, and well outside the 1.2km geofence; plus a missing fix.
+    points = [(35.1590, 129.1610), (35.1695, 129.1604), (35.2000, 129.3000), (None, None)]
+
+    qr_codes = [
+        "TRASH_BIN_01", "trash_bin_1", "  Trash-Bin-02\n", "trashbin03", "TRASH BIN 12", "07", "trash-bin-0011",
+        "HDFEST-2000-123456", "", "BIN_A",
+    ]
+    rng = np.random.default_rng(1)
+    hex_hashes = [f"{int(v):016x}" for v in rng.integers(0, 2**63, 6, dtype=np.int64)]
+    hash_strings = hex_hashes + [format(int(h, 16), "064b") for h in hex_hashes[:3]] + ["not-a-hash", "ABCDEF"]
+    hash_pairs = [(hex_hashes[i], hex_hashes[(i + 1) % len(hex_hashes)]) for i in range(len(hex_hashes))]
+    hash_pairs.append((hex_hashes[0], hex_hashes[0][:-1]))
+
+    photo_bytes = [phone_jpeg(seed=0), phone_jpeg(3024, 4032, seed=1)]
+    full_images = [Image.open(io.BytesIO(data)).convert("RGB") for data in photo_bytes]
+    model_inputs = [model_input_copy(decode_image(data)) for data in photo_bytes]
+
+    created = datetime(2024, 10, 5, 19, 30, 12, 123456)
+    photos = [
+        TrashPhoto(
+            id=f"photo{i}", user_id="user", festival_id=festival.id, image_url=f"/uploads/{i:032x}.jpg",
+            thumbnail_url=f"/uploads/{i:032x}_thumb.webp", status="PENDING", points=100, has_trash=True,
+            trash_count=2, max_trash_confidence=0.87, created_at=created,
+            detections=encode_detections(
+                [{"class_id": 39, "class_name": "bottle", "confidence": 0.87, "bbox": [1.0, 2.0, 3.0, 4.0]}] * 2
+            ),
+        )
+        for i in range(4)
+    ]
+    coupons = [
+        Coupon(id=f"c{i}", user_id="user", festival_id=festival.id, shop_name="OO 카페", amount=3000,
+               code=f"HDFEST-3000-{i:06d}", status="ISSUED", created_at=created)
+        for i in range(4)
+    ]
+    bins = [
+        BinSnapshot(id=f"b{i}", festival_id=festival.id, code=f"TRASH_BIN_{i:02d}", name="중앙무대 옆",
+                    description="바다 방향 메인 무대 왼편", latitude=35.1587, longitude=129.1604)
+        for i in range(4)
+    ]
+    grid = np.random.default_rng(2).uniform(-0.01, 0.01, (200, 2))
+    bin_index = BinIndex([(35.1587 + dlat, 129.1604 + dlng, f"b{i}") for i, (dlat, dlng) in enumerate(grid)])
+
+    return [
+        Case("haversine_distance", lambda p: haversine_distance(35.1587, 129.1604, *p), [p for p in points if p[0]]),
+        Case("is_inside_festival", lambda p: is_inside_festival(festival, *p), points),
+        Case("is_inside_festival[no geofence]", lambda p: is_inside_festival(open_festival, *p), points),
+        Case("is_inside_festival[polygons]", lambda p: is_inside_festival(polygon_festival, *p), points),
+        Case("nearest_bin[200 bins]", lambda p: bin_index.nearest(*p), [p for p in points if p[0]]),
+        Case("normalize_bin_code", normalize_bin_code, qr_codes),
+        Case("parse_hash", parse_hash, hash_strings),
+        Case("hash_to_int", hash_to_int, hash_strings),
+        Case("hamming_distance", lambda pair: hamming_distance(*pair), hash_pairs),
+        Case("compute_image_hash[12MP]", compute_image_hash, full_images, budget_s=2.0),
+        Case("compute_image_hash[model input]", compute_image_hash, model_inputs),
+        Case("decode_image[12MP JPEG]", decode_image, photo_bytes, budget_s=2.0),
+        Case("serialize_festival", serialize_festival, [festival]),
+        Case("serialize_bin", serialize_bin, bins),
+        Case("serialize_photo", lambda p: serialize_photo(p, include_detections=False), photos),
+        Case("serialize_photo[detections]", serialize_photo, photos),
+        Case("serialize_coupon", serialize_coupon, coupons),
+    ]
+
+
+def calibrate(loops: int = 10_000, repeats: int = 31) -> float:
+    """Ops/sec of a fixed pure-Python loop, used to normalize across machines."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        total = 0
+        for i in range(loops):
+            total += i % 7
+        best = min(best, time.perf_counter() - start)
+    return loops / best
+
+
+def measure(case: Case, repeats: int = 31) -> Dict[str, float]:
+    inputs = list(case.inputs)
+    fn = case.fn
+    calibration = calibrate()
+
+    def run(rounds: int) -> float:
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for item in inputs:
+                fn(item)
+        return time.perf_counter() - start
+
+    # Many short repeats and the fastest one: on a shared machine this is far more
+    # stable than a few long runs.
+    per_repeat = case.budget_s / repeats
+    rounds = 1
+    while (elapsed := run(rounds)) < per_repeat / 10 and rounds < 1_000_000:
+        rounds *= 10
+    rounds = max(1, int(rounds * per_repeat / max(elapsed, 1e-9)))
+    best = min(run(rounds) for _ in range(repeats))
+    ops_per_sec = rounds * len(inputs) / best
+
+    tracemalloc.start()
+    try:
+        peak = 0
+        for item in inputs:
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+            result = fn(item)
+            _, call_peak = tracemalloc.get_traced_memory()
+            del result
+            peak = max(peak, call_peak - baseline)
+    finally:
+        tracemalloc.stop()
+    return {
+        "ops_per_sec": round(ops_per_sec, 1),
+        "peak_alloc_bytes": int(peak),
+        "calibration_ops_per_sec": round(calibration, 1),
+    }
+
+
+def run_suite(cases: Sequence[Case], repeats: int = 31) -> dict:
+    return {
+        "python": sys.version.split()[0],
+        "cases": {case.name: measure(case, repeats) for case in cases},
+    }
+
+
+def median_suite(cases: Sequence[Case], runs: int, repeats: int) -> dict:
+    """Run the suite ``runs`` times and keep, per case, the run with the median score."""
+    results = [run_suite(cases, repeats) for _ in range(runs)]
+
+    def score(result: dict, name: str) -> float:
+        row = result["cases"][name]
+        return row["ops_per_sec"] / row["calibration_ops_per_sec"]
+
+    merged = dict(results[0])
+    merged["cases"] = {}
+    for case in cases:
+        ranked = sorted(results, key=lambda result: score(result, case.name))
+        merged["cases"][case.name] = ranked[len(ranked) // 2]["cases"][case.name]
+    return merged
+
+
+def compare(current: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD) -> List[dict]:
+    """Per-case comparison rows; ``regressed`` is set past ``threshold`` (speed or allocation)."""
+    rows = []
+    for name, now in current["cases"].items():
+        before = baseline["cases"].get(name)
+        if before is None:
+            rows.append({"name": name, "speed_change": None, "alloc_change": None, "regressed": False})
+            continue
+        machine = now["calibration_ops_per_sec"] / before["calibration_ops_per_sec"]
+        speed_change = now["ops_per_sec"] / (before["ops_per_sec"] * machine) - 1
+        alloc_before = max(before["peak_alloc_bytes"], 1)
+        alloc_change = now["peak_alloc_bytes"] / alloc_before - 1
+        # Tiny allocations jitter by a few bytes; only flag growth past 1 KiB.
+        alloc_regressed = alloc_change > threshold and now["peak_alloc_bytes"] - alloc_before > 1024
+        rows.append(
+            {
+                "name": name,
+                "speed_change": speed_change,
+                "alloc_change": alloc_change,
+                "regressed": speed_change < -threshold or alloc_regressed,
+            }
+        )
+    return rows
+
+
+def confirm_regressions(
+    cases: Sequence[Case], current: dict, baseline: dict, threshold: float, retries: int, repeats: int
+) -> List[dict]:
+    """Re-measure cases that look regressed and keep their best run before deciding.
+
+    Noise on a shared machine only ever makes a run slower, so a real regression
+    survives the retries while a scheduling hiccup does not.
+    """
+    by_name = {case.name: case for case in cases}
+    rows = compare(current, baseline, threshold)
+    for _ in range(retries):
+        suspects = [row["name"] for row in rows if row["regressed"]]
+        if not suspects:
+            break
+        for name in suspects:
+            again = measure(by_name[name], repeats)
+            previous = current["cases"][name]
+            if again["ops_per_sec"] / again["calibration_ops_per_sec"] > (
+                previous["ops_per_sec"] / previous["calibration_ops_per_sec"]
+            ):
+                current["cases"][name] = again
+        rows = compare(current, baseline, threshold)
+    return rows
+
+
+def format_report(current: dict, rows: Optional[List[dict]] = None) -> str:
+    by_name = {row["name"]: row for row in rows or []}
+    header = f"{'helper':<34}{'ops/sec':>14}{'peak alloc':>12}"
+    if rows is not None:
+        header += f"{'Δspeed':>10}{'Δalloc':>10}"
+    lines = [header, "-" * len(header)]
+    for name, result in current["cases"].items():
+        line = f"{name:<34}{result['ops_per_sec']:>14,.0f}{result['peak_alloc_bytes']:>11,}B"
+        row = by_name.get(name)
+        if row is not None:
+            if row["speed_change"] is None:
+                line += f"{'new':>10}{'':>10}"
+            else:
+                line += f"{row['speed_change']:>+10.0%}{row['alloc_change']:>+10.0%}"
+                if row["regressed"]:
+                    line += "  REGRESSED"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main_cli() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed slowdown, e.g. 0.25")
+    parser.add_argument("--filter", help="only run cases whose name contains this text")
+    parser.add_argument("--repeats", type=int, default=31)
+    parser.add_argument("--retries", type=int, default=2, help="re-measure apparent regressions this many times")
+    parser.add_argument("--save-runs", type=int, default=3, help="suite runs whose per-case median is saved")
+    args = parser.parse_args()
+    if args.save and args.filter:
+        parser.error("--save records the whole suite; drop --filter")
+
+    cases = [case for case in build_cases() if not args.filter or args.filter in case.name]
+    if args.save:
+        current = median_suite(cases, args.save_runs, args.repeats)
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(current, ensure_ascii=False, indent=2) + "\n")
+        print(format_report(current))
+        print(f"baseline written to {args.baseline}")
+        return 0
+
+    current = run_suite(cases, args.repeats)
+    if not args.baseline.exists():
+        print(format_report(current))
+        print(f"no baseline at {args.baseline}; run with --save to record one")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text())
+    rows = confirm_regressions(cases, current, baseline, args.threshold, args.retries, args.repeats)
+    print(format_report(current, rows))
+    regressed = [row["name"] for row in rows if row["regressed"]]
+    if regressed:
+        print(f"\n{len(regressed)} helper(s) regressed more than {args.threshold:.0%}: {', '.join(regressed)}")
+        return 1
+    print(f"\nno regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,46 @@
+import argparse
+import sys
+
+from app.db import create_db_and_tables, get_read_db
+from app.exports import EXPORT_FORMATS, EXPORT_TABLES, export_stream, parquet_available, parse_bound, prepare_export
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream a festival's photos, scans, coupons or daily summaries.")
+    parser.add_argument("festival_id")
+    parser.add_argument("table", choices=list(EXPORT_TABLES))
+    parser.add_argument("--format", choices=list(EXPORT_FORMATS), default="csv")
+    parser.add_argument("--from", dest="start", help="YYYY-MM-DD (KST) or ISO datetime, inclusive")
+    parser.add_argument("--to", dest="end", help="YYYY-MM-DD (KST, whole day) or ISO datetime, exclusive")
+    parser.add_argument("--since", help="Cursor printed by the previous export; only newer rows are exported")
+    parser.add_argument("-o", "--output", help="Output file (default: stdout)")
+    args = parser.parse_args()
+
+    if args.format == "parquet" and not parquet_available():
+        parser.error("Parquet export requires pyarrow (pip install pyarrow)")
+    try:
+        start = parse_bound(args.start) if args.start else None
+        end = parse_bound(args.end, end=True) if args.end else None
+    except ValueError:
+        parser.error("--from/--to must be YYYY-MM-DD or an ISO datetime")
+
+    create_db_and_tables()
+    with get_read_db() as db:
+        try:
+            stmt, next_cursor = prepare_export(db, args.table, args.festival_id, start, end, args.since)
+        except ValueError:
+            parser.error("invalid --since cursor")
+
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        for chunk in export_stream(args.table, args.format, stmt):
+            out.write(chunk)
+    finally:
+        if args.output:
+            out.close()
+    # On stderr so it never mixes with the data on stdout.
+    print(f"next cursor: {next_cursor or '-'}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
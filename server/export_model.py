@@ -0,0 +1,38 @@
+import argparse
+
+from app.db import create_db_and_tables, get_read_db
+from app.main import UPLOAD_DIR
+from app.model_export import EXPORT_MODEL_FORMATS, calibration_images, export_model, onnxruntime_available
+from app.yolo_utils import YOLO_IMGSZ, YOLO_MODEL_PATH
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the YOLO weights to ONNX or OpenVINO, optionally INT8.")
+    parser.add_argument("--weights", default=YOLO_MODEL_PATH, help="PyTorch weights (default: YOLO_MODEL_PATH)")
+    parser.add_argument("--format", choices=EXPORT_MODEL_FORMATS, default="onnx")
+    parser.add_argument("--imgsz", type=int, default=YOLO_IMGSZ, help="Must match YOLO_IMGSZ at serving time")
+    parser.add_argument("--int8", action="store_true", help="Quantize to INT8, calibrated on stored uploads")
+    parser.add_argument("--calibration", type=int, default=200, help="Number of stored uploads to calibrate on")
+    args = parser.parse_args()
+
+    if not args.weights.endswith(".pt"):
+        parser.error("--weights must be PyTorch .pt weights")
+    if args.int8 and args.format == "onnx" and not onnxruntime_available():
+        parser.error("ONNX INT8 quantization requires onnxruntime (pip install onnxruntime)")
+
+    calibration = []
+    if args.int8:
+        create_db_and_tables()
+        with get_read_db() as db:
+            calibration = calibration_images(db, UPLOAD_DIR, args.calibration)
+        if not calibration:
+            parser.error(f"no stored uploads to calibrate on in {UPLOAD_DIR}")
+        print(f"calibrating on {len(calibration)} stored uploads")
+
+    output = export_model(args.weights, args.format, args.imgsz, args.int8, calibration)
+    print(f"exported {output}")
+    print(f"serve it with YOLO_MODEL_PATH={output} YOLO_IMGSZ={args.imgsz}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+import argparse
+
+from sqlalchemy import select
+
+from app.budget import get_budget_usage, rebuild_budget_counters
+from app.db import create_db_and_tables, get_db
+from app.models import Festival
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild festival budget counters from trash_photos and coupons.")
+    parser.add_argument("--festival-id", help="Only rebuild this festival")
+    args = parser.parse_args()
+
+    create_db_and_tables()
+    with get_db() as db:
+        query = select(Festival.id)
+        if args.festival_id:
+            query = query.where(Festival.id == args.festival_id)
+        before = {festival_id: get_budget_usage(db, festival_id) for festival_id in db.execute(query).scalars()}
+        count = rebuild_budget_counters(db, args.festival_id)
+        for festival_id, used_before in before.items():
+            used_after = get_budget_usage(db, festival_id)
+            marker = "" if used_before == used_after else "  (fixed)"
+            print(f"{festival_id}: {used_before} -> {used_after}{marker}")
+        print("Reconciled festivals:", count)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,53 +1,71 @@
+from typing import List
+
 from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.bins import BinSpec, create_bins
+from app.db import create_db_and_tables, generate_id, get_db
+from app.models import Festival, FestivalBudget, TrashBin, User
+
+DEFAULT_BINS = [
+    BinSpec("중앙무대 옆", "바다 방향 메인 무대 왼편"),
+    BinSpec("해운대역 출구 인근", "해운대역 3번 출구"),
+    BinSpec("광안대교 뷰 포토존", "포토존 안내판 옆"),
+]
+
+
+def seed_festival(db: Session, bin_count: int = len(DEFAULT_BINS), budget: int = 5_000_000) -> Festival:
+    """Create the demo festival (idempotent) with ``bin_count`` bins."""
+    festival = (
+        db.execute(select(Festival).where(Festival.name == "해운대 불꽃축제"))
+        .scalars()
+        .first()
+    )
+    if not festival:
+        festival = Festival(
+            name="해운대 불꽃축제",
+            budget=budget,
+            per_user_daily_cap=3000,
+            per_photo_point=100,
+            center_lat=35.1587,
+            center_lng=129.1604,
+            radius_meters=1200,
+        )
+        db.add(festival)
+        db.flush()
+        db.add(FestivalBudget(festival_id=festival.id, used=0))
+        db.refresh(festival)
 
-from app.db import create_db_and_tables, get_db
-from app.models import Festival, TrashBin
+    existing_bins = (
+        db.execute(select(TrashBin).where(TrashBin.festival_id == festival.id))
+        .scalars()
+        .all()
+    )
+    if not existing_bins:
+        # Codes come from the festival's bin sequence: TRASH_BIN_01, 02, ...
+        specs = [
+            DEFAULT_BINS[index] if index < len(DEFAULT_BINS) else BinSpec(f"수거함 {index + 1}")
+            for index in range(bin_count)
+        ]
+        create_bins(db, festival.id, specs)
+    return festival
+
+
+def seed_users(db: Session, count: int, prefix: str = "참가자") -> List[User]:
+    """Create ``count`` mock-login users, as if they had logged in before."""
+    users = [
+        User(id=generate_id(), provider="mock", provider_user_id=generate_id(), display_name=f"{prefix}{idx}")
+        for idx in range(count)
+    ]
+    db.add_all(users)
+    db.flush()
+    return users
 
 
 def main():
     create_db_and_tables()
     with get_db() as db:
-        existing = (
-            db.execute(select(Festival).where(Festival.name == "해운대 불꽃축제"))
-            .scalars()
-            .first()
-        )
-        festival = existing
-        if not festival:
-            festival = Festival(
-                name="해운대 불꽃축제",
-                budget=5_000_000,
-                per_user_daily_cap=3000,
-                per_photo_point=100,
-                center_lat=35.1587,
-                center_lng=129.1604,
-                radius_meters=1200,
-            )
-            db.add(festival)
-            db.flush()
-            db.refresh(festival)
-
-        existing_bins = (
-            db.execute(select(TrashBin).where(TrashBin.festival_id == festival.id))
-            .scalars()
-            .all()
-        )
-        if not existing_bins:
-            bins = [
-                {"code": "TRASH_BIN_01", "name": "중앙무대 옆", "description": "바다 방향 메인 무대 왼편"},
-                {"code": "TRASH_BIN_02", "name": "해운대역 출구 인근", "description": "해운대역 3번 출구"},
-                {"code": "TRASH_BIN_03", "name": "광안대교 뷰 포토존", "description": "포토존 안내판 옆"},
-            ]
-            for bin_data in bins:
-                db.add(
-                    TrashBin(
-                        festival_id=festival.id,
-                        code=bin_data["code"],
-                        name=bin_data["name"],
-                        description=bin_data["description"],
-                    )
-                )
-
+        festival = seed_festival(db)
         print("Seed completed. Festival id:", festival.id)
 
 
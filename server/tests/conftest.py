@@ -0,0 +1,58 @@
+import os
+import tempfile
+
+# Point the app at a throwaway SQLite file before app.db creates its engine.
+_TEST_DB_DIR = tempfile.mkdtemp(prefix="cashup-test-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_TEST_DB_DIR}/test.db"
+
+import pytest  # noqa: E402
+
+from app.db import Base, create_db_and_tables, engine, get_db  # noqa: E402
+
+
+@pytest.fixture()
+def db():
+    Base.metadata.drop_all(bind=engine)
+    create_db_and_tables()
+    with get_db() as session:
+        yield session
+
+
+@pytest.fixture()
+def client(db):
+    from fastapi.testclient import TestClient
+
+    from app.config_cache import festival_cache
+    from app.hash_index import photo_hash_index
+    from app.live_summary import live_summary
+    from app.main import app
+    from app.rate_limit import rate_limiter
+
+    festival_cache.invalidate()
+    photo_hash_index.clear()
+    live_summary.invalidate()
+    rate_limiter.backend.reset()
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+ADMIN_HEADERS = {"X-Admin-Token": "admin123"}
+
+
+def create_festival(client, **overrides):
+    payload = {"name": "테스트 축제", "budget": 100_000, "perUserDailyCap": 3000, "perPhotoPoint": 100}
+    payload.update(overrides)
+    response = client.post("/api/admin/festivals", json=payload, headers=ADMIN_HEADERS)
+    assert response.status_code == 200, response.text
+    return response.json()["festival"]
+
+
+def login(client, nickname="tester"):
+    body = client.post("/api/auth/mock-login", json={"nickname": nickname}).json()
+    return body["user"]["id"], {"Authorization": f"Bearer {body['token']}"}
+
+
+def link_token(client, path):
+    response = client.post("/api/admin/link-tokens", json={"path": path}, headers=ADMIN_HEADERS)
+    assert response.status_code == 200, response.text
+    return response.json()["token"]
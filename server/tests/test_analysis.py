@@ -0,0 +1,249 @@
+import asyncio
+import io
+import time
+from datetime import datetime, timedelta
+
+from PIL import Image
+
+from app.analysis import (
+    ANALYSIS_ANALYZING,
+    AnalysisWorker,
+    claim_jobs,
+    complete_job,
+    enqueue_analysis,
+    fail_job,
+)
+from app.detections import decode_detections
+from app.models import AnalysisJob, TrashPhoto
+from conftest import ADMIN_HEADERS, create_festival, login
+
+T0 = datetime(2024, 10, 5, 12)
+
+DETECTED = {
+    "has_trash": True,
+    "trash_count": 1,
+    "max_trash_confidence": 0.9,
+    "raw_detections": [{"class_id": 39, "class_name": "bottle", "confidence": 0.9, "bbox": [10.0, 20.0, 30.0, 40.0]}],
+}
+
+
+class Clock:
+    def __init__(self, moment=T0):
+        self.moment = moment
+
+    def __call__(self):
+        return self.moment
+
+    def advance(self, seconds):
+        self.moment += timedelta(seconds=seconds)
+
+
+def _jpeg(width=1280, height=960) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), "olive").save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def _queued_photo(db, tmp_path, name="a.jpg", store=True):
+    if store:
+        (tmp_path / name).write_bytes(_jpeg())
+    photo = TrashPhoto(
+        user_id="u", festival_id="f", image_url=f"/uploads/{name}", hash="0", points=100,
+        analysis_status=ANALYSIS_ANALYZING, created_at=T0,
+    )  # fmt: skip
+    db.add(photo)
+    db.flush()
+    enqueue_analysis(db, photo.id)
+    db.flush()
+    db.get(AnalysisJob, photo.id).available_at = T0
+    db.commit()
+    return photo.id
+
+
+def _analyzer(*results):
+    calls = []
+
+    async def analyze(image):
+        calls.append(image.shape)
+        return results[min(len(calls), len(results)) - 1]
+
+    analyze.calls = calls
+    return analyze
+
+
+def _photo(db, photo_id):
+    db.expire_all()
+    return db.get(TrashPhoto, photo_id)
+
+
+def test_upload_returns_before_analysis_and_the_worker_fills_it_in(client, monkeypatch):
+    from app.main import analysis_worker
+
+    monkeypatch.setattr(analysis_worker, "analyze", _analyzer(DETECTED))
+    monkeypatch.setattr(analysis_worker, "model_available", lambda: True)
+    festival = create_festival(client)
+    user_id, headers = login(client)
+    response = client.post(
+        f"/api/festivals/{festival['id']}/trash-photos",
+        files={"image": ("photo.jpg", _jpeg(), "image/jpeg")},
+        headers=headers,
+    )
+    assert response.status_code == 200, response.text
+    photo = response.json()["photo"]
+    assert photo["analysisStatus"] == "ANALYZING" and photo["hasTrash"] is None
+
+    url = f"/api/users/{user_id}/photos/analysis?ids={photo['id']}"
+    deadline = time.monotonic() + 5
+    while True:
+        polled = client.get(url, headers=headers).json()["photos"][0]
+        if polled["analysisStatus"] != "ANALYZING" or time.monotonic() > deadline:
+            break
+        time.sleep(0.05)
+    assert polled == {
+        "id": photo["id"],
+        "analysisStatus": "DONE",
+        "hasTrash": True,
+        "trashCount": 1,
+        "maxTrashConfidence": 0.9,
+    }
+
+
+def test_poll_is_limited_to_the_caller(client):
+    user_id, headers = login(client)
+    other_id, _ = login(client, nickname="other")
+    assert client.get(f"/api/users/{other_id}/photos/analysis?ids=x", headers=headers).status_code == 403
+    assert client.get(f"/api/users/{user_id}/photos/analysis?ids=", headers=headers).status_code == 400
+    too_many = ",".join(str(i) for i in range(101))
+    assert client.get(f"/api/users/{user_id}/photos/analysis?ids={too_many}", headers=headers).status_code == 400
+    assert client.get(f"/api/users/{user_id}/photos/analysis?ids=missing", headers=headers).json() == {"photos": []}
+
+
+def test_completion_maps_detections_back_to_stored_pixels(db, tmp_path):
+    photo_id = _queued_photo(db, tmp_path)
+    analyze = _analyzer(DETECTED)
+    worker = AnalysisWorker(analyze, tmp_path, clock=Clock())
+
+    assert asyncio.run(worker.run_once()) == 1
+    # 1280px stored, 640px model input.
+    assert analyze.calls == [(480, 640, 3)]
+    photo = _photo(db, photo_id)
+    assert photo.analysis_status == "DONE" and photo.has_trash is True and photo.trash_count == 1
+    assert decode_detections(photo.detections)[0]["bbox"] == [20.0, 40.0, 60.0, 80.0]
+    assert db.get(AnalysisJob, photo_id) is None
+    assert worker.stats()["completed"] == 1
+
+
+def test_failures_back_off_then_give_up(db, tmp_path):
+    photo_id = _queued_photo(db, tmp_path)
+    clock = Clock()
+    empty = {"has_trash": None, "trash_count": None, "raw_detections": None}
+    worker = AnalysisWorker(_analyzer(empty), tmp_path, max_attempts=2, clock=clock)
+
+    assert asyncio.run(worker.run_once()) == 1
+    db.expire_all()
+    job = db.get(AnalysisJob, photo_id)
+    assert job.attempts == 1 and job.available_at == T0 + timedelta(seconds=5) and job.last_error
+    assert _photo(db, photo_id).analysis_status == "ANALYZING"
+
+    assert asyncio.run(worker.run_once()) == 0
+    clock.advance(5)
+    assert asyncio.run(worker.run_once()) == 1
+    assert _photo(db, photo_id).analysis_status == "FAILED"
+    assert db.get(AnalysisJob, photo_id) is None
+    assert (worker.retried, worker.failed) == (1, 1)
+
+
+def test_missing_image_fails_without_retrying(db, tmp_path):
+    photo_id = _queued_photo(db, tmp_path, store=False)
+    worker = AnalysisWorker(_analyzer(DETECTED), tmp_path, clock=Clock())
+
+    assert asyncio.run(worker.run_once()) == 1
+    assert _photo(db, photo_id).analysis_status == "FAILED"
+    assert worker.failed == 1
+
+
+def test_a_job_claimed_by_a_crashed_worker_is_picked_up_after_its_lease(db, tmp_path):
+    photo_id = _queued_photo(db, tmp_path)
+    # A worker claims the job and dies before recording anything.
+    assert [job.photo_id for job in claim_jobs(db, 10, T0, lease_seconds=60)] == [photo_id]
+    db.commit()
+    assert claim_jobs(db, 10, T0) == []
+    db.commit()
+
+    clock = Clock(T0 + timedelta(seconds=30))
+    worker = AnalysisWorker(_analyzer(DETECTED), tmp_path, clock=clock)
+    assert asyncio.run(worker.run_once()) == 0
+    clock.advance(31)
+    assert asyncio.run(worker.run_once()) == 1
+    assert _photo(db, photo_id).analysis_status == "DONE"
+
+
+def test_completion_does_not_touch_a_photo_activated_mid_analysis(db, tmp_path):
+    photo_id = _queued_photo(db, tmp_path)
+    _photo(db, photo_id).status = "ACTIVE"
+    db.commit()
+
+    complete_job(db, photo_id, DETECTED)
+    db.commit()
+    photo = _photo(db, photo_id)
+    assert (photo.status, photo.analysis_status, photo.has_trash) == ("ACTIVE", "DONE", True)
+
+
+def test_no_jobs_are_claimed_while_the_model_is_unavailable(db, tmp_path):
+    photo_id = _queued_photo(db, tmp_path)
+    analyze = _analyzer(DETECTED)
+    worker = AnalysisWorker(analyze, tmp_path, clock=Clock(), model_available=lambda: False)
+
+    for _ in range(10):
+        assert asyncio.run(worker.run_once()) == 0
+    assert analyze.calls == []
+    db.expire_all()
+    assert db.get(AnalysisJob, photo_id).attempts == 0
+    assert worker.stats()["modelAvailable"] is False
+
+
+def test_a_batch_cut_short_by_the_model_failing_keeps_its_attempts(db, tmp_path):
+    photo_id = _queued_photo(db, tmp_path)
+    available = [True]
+    clock = Clock()
+
+    async def analyze(image):
+        # The first inference is what finds out the weights cannot load.
+        available[0] = False
+        return {"has_trash": None, "trash_count": None, "raw_detections": None}
+
+    worker = AnalysisWorker(analyze, tmp_path, max_attempts=1, clock=clock, model_available=lambda: available[0])
+    assert asyncio.run(worker.run_once()) == 1
+    db.expire_all()
+    job = db.get(AnalysisJob, photo_id)
+    assert job.attempts == 0 and job.last_error == "model unavailable"
+    assert _photo(db, photo_id).analysis_status == "ANALYZING"
+    assert (worker.deferred, worker.failed) == (1, 0)
+
+    available[0] = True
+    worker.analyze = _analyzer(DETECTED)
+    clock.advance(5)
+    assert asyncio.run(worker.run_once()) == 1
+    assert _photo(db, photo_id).analysis_status == "DONE"
+
+
+def test_admin_requeues_failed_analyses(client, db, tmp_path):
+    festival = create_festival(client)
+    failed_id = _queued_photo(db, tmp_path)
+    _photo(db, failed_id).festival_id = festival["id"]
+    other_id = _queued_photo(db, tmp_path, name="b.jpg")
+    for photo_id in (failed_id, other_id):
+        fail_job(db, photo_id)
+    db.commit()
+
+    url = "/api/admin/analysis/requeue"
+    assert client.post(url, json={}).status_code == 401
+    response = client.post(url, json={"festivalId": festival["id"]}, headers=ADMIN_HEADERS)
+    assert response.json() == {"requeued": 1}
+    db.expire_all()
+    assert _photo(db, failed_id).analysis_status == "ANALYZING"
+    assert db.get(AnalysisJob, failed_id).attempts == 0
+    assert _photo(db, other_id).analysis_status == "FAILED"
+
+    assert client.post(url, headers=ADMIN_HEADERS).json() == {"requeued": 1}
+    assert client.post(url, headers=ADMIN_HEADERS).json() == {"requeued": 0}
@@ -0,0 +1,115 @@
+from conftest import ADMIN_HEADERS, create_festival, login
+
+
+def test_festival_cache_is_invalidated_by_bin_generation(client):
+    festival = create_festival(client)
+    first = client.get(f"/api/festivals/{festival['id']}").json()
+    assert first["festival"]["perPhotoPoint"] == 100
+    assert first["bins"] == []
+
+    response = client.post(
+        f"/api/admin/festivals/{festival['id']}/trash-bins/generate", json={"count": 2}, headers=ADMIN_HEADERS
+    )
+    assert response.status_code == 200
+
+    bins = client.get(f"/api/festivals/{festival['id']}/trash-bins").json()["bins"]
+    assert [b["code"] for b in bins] == ["TRASH_BIN_01", "TRASH_BIN_02"]
+    assert len(client.get(f"/api/festivals/{festival['id']}").json()["bins"]) == 2
+
+
+def test_unknown_festival(client):
+    assert client.get("/api/festivals/missing").status_code == 404
+    assert client.get("/api/festivals/missing/trash-bins").json() == {"bins": []}
+
+
+def test_photo_and_coupon_listings_are_keyset_paginated(client, db):
+    from datetime import datetime, timedelta
+
+    from app.detections import encode_detections
+    from app.models import Coupon, TrashPhoto
+
+    festival = create_festival(client)
+    user_id, headers = login(client)
+    base = datetime(2024, 10, 1, 12, 0, 0)
+    for i in range(5):
+        # Pairs share a timestamp so the id tiebreak is exercised.
+        created_at = base + timedelta(minutes=i // 2)
+        db.add(
+            TrashPhoto(
+                id=f"p{i}", user_id=user_id, festival_id=festival["id"], image_url=f"/uploads/{i}.jpg",
+                hash=f"{i:016x}", status="PENDING", points=100, created_at=created_at,
+                detections=encode_detections([{"class_id": 39, "confidence": 0.5, "bbox": [i, i, 10.0, 10.0]}]),
+            )
+        )
+        db.add(
+            Coupon(
+                id=f"c{i}", user_id=user_id, festival_id=festival["id"], shop_name="shop", amount=100,
+                code=f"CODE{i}", created_at=created_at,
+            )
+        )
+    db.commit()
+
+    url = f"/api/users/{user_id}/photos?festivalId={festival['id']}&limit=2"
+    seen, cursor = [], None
+    while True:
+        body = client.get(url + (f"&cursor={cursor}" if cursor else ""), headers=headers).json()
+        assert len(body["photos"]) <= 2
+        assert all("yoloRaw" not in p for p in body["photos"])
+        seen += [p["id"] for p in body["photos"]]
+        cursor = body["nextCursor"]
+        if cursor is None:
+            break
+    assert seen == ["p4", "p3", "p2", "p1", "p0"]
+
+    detailed = client.get(url + "&include=detections", headers=headers).json()["photos"]
+    assert detailed[0]["yoloRaw"] == [
+        {"class_id": 39, "class_name": "bottle", "confidence": 0.5, "bbox": [4.0, 4.0, 10.0, 10.0]}
+    ]
+
+    coupons = client.get(f"/api/users/{user_id}/coupons?festivalId={festival['id']}&limit=3", headers=headers).json()
+    assert [c["id"] for c in coupons["coupons"]] == ["c4", "c3", "c2"]
+    rest = client.get(
+        f"/api/users/{user_id}/coupons?festivalId={festival['id']}&cursor={coupons['nextCursor']}", headers=headers
+    ).json()
+    assert [c["id"] for c in rest["coupons"]] == ["c1", "c0"]
+    assert rest["nextCursor"] is None
+
+    assert client.get(url + "&cursor=not-a-cursor", headers=headers).status_code == 400
+
+
+def test_scan_requires_being_near_the_bin(client):
+    festival = create_festival(client, centerLat=35.1587, centerLng=129.1604, radiusMeters=1200)
+    client.post(
+        f"/api/admin/festivals/{festival['id']}/trash-bins/generate",
+        json={"locations": [{"lat": 35.1587, "lng": 129.1604}, {"lat": 35.1620, "lng": 129.1650}]},
+        headers=ADMIN_HEADERS,
+    )
+    user_id, headers = login(client)
+    scan_url = f"/api/festivals/{festival['id']}/trash-bins/scan"
+
+    far = client.post(scan_url, json={"binCode": "TRASH_BIN_01", "lat": 35.1620, "lng": 129.1650}, headers=headers)
+    assert far.status_code == 400
+    assert "수거함 가까이" in far.json()["detail"]["message"]
+    near = client.post(scan_url, json={"binCode": "TRASH_BIN_01", "lat": 35.1588, "lng": 129.1605}, headers=headers)
+    assert "지급 대기 포인트가 없습니다" in near.json()["detail"]["message"]
+
+    nearest = client.get(f"/api/festivals/{festival['id']}/trash-bins/nearest?lat=35.1618&lng=129.1648").json()
+    assert nearest["bin"]["code"] == "TRASH_BIN_02"
+    assert 0 < nearest["distanceMeters"] < 50
+
+
+def test_polygon_geofence_gates_uploads_and_scans(client):
+    strip = [[35.1580, 129.1550], [35.1590, 129.1550], [35.1590, 129.1650], [35.1580, 129.1650]]
+    festival = create_festival(client, centerLat=35.1587, centerLng=129.1604, geofence=[strip])
+    assert festival["geofence"] == [strip]
+    client.post(f"/api/admin/festivals/{festival['id']}/trash-bins/generate", json={"count": 1}, headers=ADMIN_HEADERS)
+    user_id, headers = login(client)
+    scan_url = f"/api/festivals/{festival['id']}/trash-bins/scan"
+
+    outside = client.post(scan_url, json={"binCode": "TRASH_BIN_01", "lat": 35.1610, "lng": 129.1604}, headers=headers)
+    assert "축제장 안에서만" in outside.json()["detail"]["message"]
+    inside = client.post(scan_url, json={"binCode": "TRASH_BIN_01", "lat": 35.1585, "lng": 129.1604}, headers=headers)
+    assert "지급 대기 포인트가 없습니다" in inside.json()["detail"]["message"]
+
+    payload = {"name": "x", "budget": 1, "perUserDailyCap": 1, "perPhotoPoint": 1, "geofence": [[[1, 2]]]}
+    assert client.post("/api/admin/festivals", json=payload, headers=ADMIN_HEADERS).status_code == 400
@@ -0,0 +1,102 @@
+import io
+import re
+import zipfile
+import zlib
+
+import pytest
+from PIL import Image
+
+from app.bins import parse_bins_csv
+from app.qr_export import stream_pdf
+from conftest import ADMIN_HEADERS, create_festival, link_token
+
+
+def _generate(client, festival_id, count):
+    response = client.post(
+        f"/api/admin/festivals/{festival_id}/trash-bins/generate", json={"count": count}, headers=ADMIN_HEADERS
+    )
+    assert response.status_code == 200, response.text
+    return [b["code"] for b in response.json()["bins"]]
+
+
+def test_bin_codes_follow_a_per_festival_sequence(client):
+    first = create_festival(client)
+    second = create_festival(client)
+    assert _generate(client, first["id"], 2) == ["TRASH_BIN_01", "TRASH_BIN_02"]
+    assert _generate(client, first["id"], 3) == ["TRASH_BIN_03", "TRASH_BIN_04", "TRASH_BIN_05"]
+    # Codes are unique per festival, not globally.
+    assert _generate(client, second["id"], 1) == ["TRASH_BIN_01"]
+    listed = client.get(f"/api/festivals/{first['id']}/trash-bins").json()["bins"]
+    assert len(listed) == 5
+
+    missing = client.post(
+        "/api/admin/festivals/nope/trash-bins/generate", json={"count": 1}, headers=ADMIN_HEADERS
+    )
+    assert missing.status_code == 404
+
+
+def test_csv_import_creates_bins_with_locations(client):
+    festival = create_festival(client)
+    _generate(client, festival["id"], 1)
+    csv_data = "이름,설명,위도,경도\n정문,매표소 옆,35.1587,129.1604\n\n후문,,,\n".encode("utf-8-sig")
+    response = client.post(
+        f"/api/admin/festivals/{festival['id']}/trash-bins/import",
+        files={"file": ("bins.csv", csv_data, "text/csv")},
+        headers=ADMIN_HEADERS,
+    )
+    assert response.status_code == 200, response.text
+    bins = response.json()["bins"]
+    assert [(b["code"], b["name"]) for b in bins] == [("TRASH_BIN_02", "정문"), ("TRASH_BIN_03", "후문")]
+    assert bins[0]["latitude"] == 35.1587 and bins[1]["latitude"] is None
+
+    bad = client.post(
+        f"/api/admin/festivals/{festival['id']}/trash-bins/import",
+        files={"file": ("bins.csv", b"name,lat,lng\nA,35.1,\n", "text/csv")},
+        headers=ADMIN_HEADERS,
+    )
+    assert bad.status_code == 400
+    assert "2행" in bad.json()["detail"]["message"]
+
+
+@pytest.mark.parametrize(
+    "data",
+    [b"", b"description\nx\n", b"name,lat,lng\nA,91,10\n", "name\n가".encode("cp949"), b"name\n\n"],
+)
+def test_parse_bins_csv_rejects_bad_input(data):
+    with pytest.raises(ValueError):
+        parse_bins_csv(data)
+
+
+def test_qr_codes_stream_as_zip_and_pdf(client):
+    festival = create_festival(client)
+    _generate(client, festival["id"], 13)
+    url = f"/api/admin/festivals/{festival['id']}/trash-bins/qr-codes"
+    assert client.get(url).status_code == 401
+
+    archive = client.get(url, params={"token": link_token(client, url)})
+    assert archive.status_code == 200
+    assert archive.headers["content-type"] == "application/zip"
+    with zipfile.ZipFile(io.BytesIO(archive.content)) as bundle:
+        names = bundle.namelist()
+        assert names[:2] == ["TRASH_BIN_01.png", "TRASH_BIN_02.png"] and len(names) == 13
+        with Image.open(io.BytesIO(bundle.read(names[-1]))) as image:
+            assert image.format == "PNG" and image.height > image.width
+
+    sheet = client.get(url, params={"format": "pdf"}, headers=ADMIN_HEADERS)
+    assert sheet.status_code == 200
+    assert sheet.content.startswith(b"%PDF-1.4") and sheet.content.rstrip().endswith(b"%%EOF")
+    # 13 labels at 12 per page.
+    assert b"/Count 2" in sheet.content
+    assert client.get(url, params={"format": "svg"}, headers=ADMIN_HEADERS).status_code == 400
+    assert client.get("/api/admin/festivals/nope/trash-bins/qr-codes", headers=ADMIN_HEADERS).status_code == 404
+
+
+def test_pdf_xref_offsets_point_at_objects():
+    pdf = b"".join(stream_pdf(["TRASH_BIN_01", "TRASH_BIN_02"]))
+    xref_at = int(pdf.rsplit(b"startxref\n", 1)[1].split(b"\n")[0])
+    table = pdf[xref_at:].split(b"trailer")[0].split(b"\n")[2:]
+    offsets = [int(line[:10]) for line in table if line.endswith(b" n ")]
+    for number, offset in enumerate(offsets, start=1):
+        assert pdf[offset:].startswith(b"%d 0 obj" % number)
+    content = re.search(rb"stream\n(.*?)\nendstream", pdf, re.S).group(1)
+    assert b"(TRASH_BIN_02) Tj" in zlib.decompress(content)
@@ -0,0 +1,42 @@
+from app.budget import get_budget_usage, rebuild_budget_counters, reserve_budget
+from app.models import Coupon, Festival, FestivalBudget, TrashPhoto, User
+
+
+def make_festival(db, budget=1000):
+    festival = Festival(name="test", budget=budget, per_user_daily_cap=3000, per_photo_point=100)
+    db.add(festival)
+    db.flush()
+    db.add(FestivalBudget(festival_id=festival.id, used=0))
+    db.flush()
+    return festival
+
+
+def test_reserve_budget_stops_at_limit(db):
+    festival = make_festival(db, budget=250)
+    assert reserve_budget(db, festival.id, 100)
+    assert reserve_budget(db, festival.id, 100)
+    assert not reserve_budget(db, festival.id, 100)
+    assert reserve_budget(db, festival.id, 50)
+    assert get_budget_usage(db, festival.id) == 250
+
+
+def test_rebuild_matches_raw_tables(db):
+    festival = make_festival(db)
+    user = User(provider="mock", provider_user_id="1", display_name="u")
+    db.add(user)
+    db.flush()
+    db.add(TrashPhoto(user_id=user.id, festival_id=festival.id, image_url="/x", hash="0" * 16, points=100))
+    db.add(Coupon(user_id=user.id, festival_id=festival.id, shop_name="s", amount=300, code="C1"))
+    db.flush()
+
+    assert get_budget_usage(db, festival.id) == 0
+    assert rebuild_budget_counters(db, festival.id) == 1
+    assert get_budget_usage(db, festival.id) == 400
+
+
+def test_missing_counter_is_rebuilt_on_reserve(db):
+    festival = Festival(name="legacy", budget=500, per_user_daily_cap=3000, per_photo_point=100)
+    db.add(festival)
+    db.flush()
+    assert reserve_budget(db, festival.id, 100)
+    assert get_budget_usage(db, festival.id) == 100
@@ -0,0 +1,74 @@
+import sqlite3
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.db import commit_with_retry, engine, get_read_db, retry_on_busy
+
+
+def _busy_error():
+    return OperationalError("UPDATE x", {}, sqlite3.OperationalError("database is locked"))
+
+
+def test_production_pragmas_are_applied(db):
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar_one().lower() == "wal"
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar_one() > 0
+        assert conn.execute(text("PRAGMA temp_store")).scalar_one() == 2
+
+
+def test_read_sessions_are_query_only(db):
+    with get_read_db() as read_db:
+        assert read_db.execute(text("SELECT count(*) FROM festivals")).scalar_one() == 0
+        with pytest.raises(OperationalError):
+            read_db.execute(text("DELETE FROM festivals"))
+
+
+def test_retry_on_busy_backs_off_then_succeeds():
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise _busy_error()
+        return "ok"
+
+    assert retry_on_busy(flaky, retries=5) == "ok"
+    assert len(attempts) == 3
+
+
+def test_retry_on_busy_gives_up_and_ignores_other_errors():
+    with pytest.raises(OperationalError):
+        retry_on_busy(lambda: (_ for _ in ()).throw(_busy_error()), retries=1)
+
+    calls = []
+
+    def broken():
+        calls.append(1)
+        raise OperationalError("SELECT", {}, sqlite3.OperationalError("no such table: x"))
+
+    with pytest.raises(OperationalError):
+        retry_on_busy(broken, retries=5)
+    assert len(calls) == 1
+
+
+def test_commit_with_retry_reruns_the_unit_of_work(db):
+    runs = []
+
+    def work():
+        runs.append(1)
+        db.execute(
+            text(
+                "INSERT INTO festivals (id, name, budget, per_user_daily_cap, per_photo_point, created_at) "
+                "VALUES (:id, 'f', 1, 1, 1, '2024-01-01')"
+            ),
+            {"id": f"f{len(runs)}"},
+        )
+        if len(runs) == 1:
+            raise _busy_error()
+        return len(runs)
+
+    assert commit_with_retry(db, work) == 2
+    ids = db.execute(text("SELECT id FROM festivals")).scalars().all()
+    assert ids == ["f2"]
@@ -0,0 +1,69 @@
+import json
+import struct
+
+import pytest
+
+from app.detections import decode_detections, encode_detections
+
+RAW = [
+    {"class_id": 39, "class_name": "bottle", "confidence": 0.8734512329101562, "bbox": [1034.6, 220.3, 1203.9, 611.2]},
+    {"class_id": 41, "class_name": "cup", "confidence": 0.2512, "bbox": [0.0, 1530.1, 88.4, 1536.0]},
+    {"class_id": 0, "class_name": "person", "confidence": 0.99, "bbox": [12.5, 40.0, 2048.0, 1400.7]},
+]
+
+
+def test_round_trip_within_quantization_error():
+    decoded = decode_detections(encode_detections(RAW))
+    assert [d["class_name"] for d in decoded] == ["bottle", "cup", "person"]
+    for original, restored in zip(RAW, decoded):
+        assert restored["class_id"] == original["class_id"]
+        assert restored["confidence"] == pytest.approx(original["confidence"], abs=1e-4)
+        assert restored["bbox"] == pytest.approx(original["bbox"], abs=0.1)
+
+
+def test_blob_is_columnar_and_small():
+    blob = encode_detections(RAW)
+    # 7-byte header and an empty class-name table, then 12 bytes per box.
+    assert len(blob) == 8 + 12 * len(RAW)
+    assert len(blob) * 5 < len(json.dumps(RAW))
+    assert struct.unpack_from("<3H", blob, 8) == (39, 41, 0)
+
+
+def test_names_from_a_custom_model_survive():
+    custom = [
+        {"class_id": 0, "class_name": "cigarette butt", "confidence": 0.7, "bbox": [1.0, 2.0, 3.0, 4.0]},
+        {"class_id": 0, "class_name": "cigarette butt", "confidence": 0.6, "bbox": [5.0, 6.0, 7.0, 8.0]},
+        {"class_id": 39, "class_name": "bottle", "confidence": 0.5, "bbox": [1.0, 2.0, 3.0, 4.0]},
+        {"class_id": 120, "class_name": "컵홀더", "confidence": 0.5, "bbox": [1.0, 2.0, 3.0, 4.0]},
+    ]
+    blob = encode_detections(custom)
+    names = [d["class_name"] for d in decode_detections(blob)]
+    assert names == ["cigarette butt", "cigarette butt", "bottle", "컵홀더"]
+    # Only the names COCO would get wrong are stored, once per class.
+    assert blob.count("cigarette butt".encode()) == 1 and b"bottle" not in blob
+
+
+def test_version_1_blobs_still_decode():
+    blob = encode_detections(RAW[:1])
+    legacy = bytes([1]) + blob[1:7] + blob[8:]
+    assert decode_detections(legacy) == decode_detections(blob)
+
+
+def test_empty_and_missing_detections_stay_distinct():
+    assert encode_detections(None) is None and decode_detections(None) is None
+    assert decode_detections(encode_detections([])) == []
+
+
+def test_unknown_version_is_rejected():
+    blob = bytearray(encode_detections(RAW))
+    blob[0] = 99
+    with pytest.raises(ValueError):
+        decode_detections(bytes(blob))
+
+
+def test_storage_benchmark_reports_a_reduction():
+    from benchmarks.detection_storage import measure
+
+    result = measure(photos=200, mean_boxes=3, seed=1)
+    assert result["packed_payload"] * 4 < result["legacy_payload"]
+    assert result["packed_file"] < result["legacy_file"]
@@ -0,0 +1,134 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+import pytest
+
+from app.detections import encode_detections
+from app.exports import iter_batches, parse_bound, prepare_export, stream_csv
+from app.models import Coupon, TrashPhoto
+from conftest import ADMIN_HEADERS, create_festival, link_token, login
+
+DETECTIONS = [{"class_id": 41, "class_name": "cup", "confidence": 0.75, "bbox": [1.0, 2.0, 3.0, 4.0]}]
+
+
+def _add_photos(db, festival_id, user_id, *created):
+    for index, created_at in enumerate(created):
+        db.add(
+            TrashPhoto(
+                user_id=user_id,
+                festival_id=festival_id,
+                image_url=f"/uploads/{index}.jpg",
+                hash="0" * 16,
+                points=100,
+                detections=encode_detections(DETECTIONS),
+                created_at=created_at,
+            )
+        )
+    db.commit()
+
+
+def _export(client, festival_id, table, **params):
+    return client.get(f"/api/admin/festivals/{festival_id}/exports/{table}", params=params, headers=ADMIN_HEADERS)
+
+
+def test_csv_export_with_date_range_and_incremental_cursor(client, db):
+    festival = create_festival(client)
+    user_id, _ = login(client)
+    # 2024-10-01 KST runs from 2024-09-30T15:00 to 2024-10-01T15:00 UTC.
+    _add_photos(
+        db, festival["id"], user_id, datetime(2024, 9, 30, 14), datetime(2024, 9, 30, 16), datetime(2024, 10, 2)
+    )
+
+    response = _export(client, festival["id"], "trash_photos")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.content.startswith(b"\xef\xbb\xbf")
+    rows = list(csv.DictReader(io.StringIO(response.content.decode("utf-8-sig"))))
+    assert [row["created_at"] for row in rows] == ["2024-09-30T14:00:00", "2024-09-30T16:00:00", "2024-10-02T00:00:00"]
+    # Packed detections are exported decoded.
+    assert json.loads(rows[0]["detections"]) == DETECTIONS
+    cursor = response.headers["X-Export-Cursor"]
+
+    day = _export(client, festival["id"], "trash_photos", **{"from": "2024-10-01", "to": "2024-10-01"})
+    assert day.content.decode("utf-8-sig").count("\n") == 2
+
+    _add_photos(db, festival["id"], user_id, datetime(2024, 10, 3))
+    newer = _export(client, festival["id"], "trash_photos", format="ndjson", since=cursor)
+    lines = newer.text.splitlines()
+    assert [json.loads(line)["created_at"] for line in lines] == ["2024-10-03T00:00:00"]
+    next_cursor = newer.headers["X-Export-Cursor"]
+    caught_up = _export(client, festival["id"], "trash_photos", format="ndjson", since=next_cursor)
+    assert caught_up.text == ""
+    assert caught_up.headers["X-Export-Cursor"] == next_cursor
+
+
+def test_export_validation(client):
+    festival = create_festival(client)
+    url = f"/api/admin/festivals/{festival['id']}/exports/coupons"
+    assert client.get(url).status_code == 401
+    assert client.get(url, params={"token": link_token(client, url)}).status_code == 200
+    assert _export(client, festival["id"], "users").status_code == 404
+    assert _export(client, festival["id"], "coupons", format="xlsx").status_code == 400
+    assert _export(client, festival["id"], "coupons", since="not-a-cursor").status_code == 400
+    assert _export(client, festival["id"], "coupons", **{"from": "yesterday"}).status_code == 400
+    assert _export(client, "nope", "coupons").status_code == 404
+
+
+def test_export_streams_one_chunk_per_batch(client, db):
+    festival = create_festival(client)
+    user_id, _ = login(client)
+    for index in range(5):
+        db.add(Coupon(user_id=user_id, festival_id=festival["id"], shop_name="카페", amount=1000, code=f"C{index}"))
+    db.commit()
+    stmt, cursor = prepare_export(db, "coupons", festival["id"])
+    columns = [column.name for column in Coupon.__table__.columns]
+    chunks = list(stream_csv(columns, iter_batches(stmt, batch_size=2)))
+    # Header, then batches of 2, 2 and 1.
+    assert len(chunks) == 4
+    assert cursor
+
+
+def test_parquet_export(client, db):
+    pq = pytest.importorskip("pyarrow.parquet")
+    festival = create_festival(client)
+    user_id, _ = login(client)
+    _add_photos(db, festival["id"], user_id, datetime(2024, 10, 1), datetime(2024, 10, 2))
+
+    response = _export(client, festival["id"], "trash_photos", format="parquet")
+    assert response.status_code == 200
+    table = pq.read_table(io.BytesIO(response.content))
+    assert table.num_rows == 2
+    assert str(table.schema.field("created_at").type) == "timestamp[us]"
+    assert json.loads(table.column("detections")[0].as_py()) == DETECTIONS
+    empty = _export(client, festival["id"], "bin_scans", format="parquet")
+    assert pq.read_table(io.BytesIO(empty.content)).num_rows == 0
+
+
+def test_parse_bound_uses_kst_days_and_utc_datetimes():
+    assert parse_bound("2024-10-01") == datetime(2024, 9, 30, 15)
+    assert parse_bound("2024-10-01", end=True) == datetime(2024, 10, 1, 15)
+    assert parse_bound("2024-10-01T12:00:00+09:00") == datetime(2024, 10, 1, 3)
+    assert parse_bound("2024-10-01T12:00:00") == datetime(2024, 10, 1, 12)
+
+
+def test_query_tokens_are_short_lived_and_scoped_to_one_path(client, monkeypatch):
+    from app import main
+
+    festival = create_festival(client)
+    coupons = f"/api/admin/festivals/{festival['id']}/exports/coupons"
+    photos = f"/api/admin/festivals/{festival['id']}/exports/trash_photos"
+    token = link_token(client, coupons)
+
+    assert client.get(coupons, params={"token": token}).status_code == 200
+    # The long-lived admin token is never accepted in a URL.
+    assert client.get(coupons, params={"token": "admin123"}).status_code == 401
+    assert client.get(photos, params={"token": token}).status_code == 401
+
+    monkeypatch.setattr(main.time, "time", lambda: 10**10)
+    assert client.get(coupons, params={"token": token}).status_code == 401
+
+    assert client.post("/api/admin/link-tokens", json={"path": coupons}).status_code == 401
+    rejected = client.post("/api/admin/link-tokens", json={"path": "/api/admin/festivals"}, headers=ADMIN_HEADERS)
+    assert rejected.status_code == 400
@@ -0,0 +1,55 @@
+import random
+
+import pytest
+
+from app.geo import BinIndex, build_area, haversine_distance, parse_geofence
+
+CENTER = (35.1587, 129.1604)
+
+
+def test_circle_matches_haversine():
+    area = build_area(*CENTER, 1200)
+    rng = random.Random(0)
+    for _ in range(2000):
+        lat = CENTER[0] + rng.uniform(-0.02, 0.02)
+        lng = CENTER[1] + rng.uniform(-0.02, 0.02)
+        assert area.contains(lat, lng) == (haversine_distance(lat, lng, *CENTER) <= 1200)
+    assert not area.contains(None, None)
+    assert build_area(None, None, None).contains(None, None)
+
+
+def test_polygon_zones_and_disjoint_areas():
+    # A thin beach strip plus a separate plaza square.
+    strip = [[35.1580, 129.1550], [35.1590, 129.1550], [35.1590, 129.1650], [35.1580, 129.1650]]
+    plaza = [[35.1630, 129.1700], [35.1640, 129.1700], [35.1640, 129.1710], [35.1630, 129.1710], [35.1630, 129.1700]]
+    geofence = parse_geofence([strip, plaza])
+    assert len(geofence[1]) == 4  # closing point dropped
+    area = build_area(*CENTER, 1200, geofence)
+
+    assert area.contains(35.1585, 129.1600)
+    assert area.contains(35.1635, 129.1705)
+    # Inside the old circle but outside both polygons.
+    assert not area.contains(35.1610, 129.1604)
+    assert not area.contains(35.2000, 129.3000)
+
+
+def test_parse_geofence_rejects_bad_shapes():
+    assert parse_geofence(None) is None
+    assert parse_geofence([]) is None
+    for bad in ("abc", [[[1, 2], [3, 4]]], [[[1, 2, 3], [3, 4], [5, 6]]], [[[95, 0], [0, 0], [0, 1]]]):
+        with pytest.raises(ValueError):
+            parse_geofence(bad)
+
+
+def test_bin_index_nearest_matches_brute_force():
+    rng = random.Random(1)
+    bins = [(CENTER[0] + rng.uniform(-0.01, 0.01), CENTER[1] + rng.uniform(-0.01, 0.01), f"b{i}") for i in range(200)]
+    index = BinIndex(bins)
+    for _ in range(300):
+        lat = CENTER[0] + rng.uniform(-0.012, 0.012)
+        lng = CENTER[1] + rng.uniform(-0.012, 0.012)
+        expected = min(bins, key=lambda b: haversine_distance(lat, lng, b[0], b[1]))
+        found, distance = index.nearest(lat, lng)
+        assert found == expected[2]
+        assert distance == pytest.approx(haversine_distance(lat, lng, expected[0], expected[1]))
+    assert BinIndex([]).nearest(*CENTER) is None
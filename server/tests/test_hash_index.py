@@ -0,0 +1,86 @@
+import random
+
+from app.hash_index import (
+    FestivalHashIndex,
+    MultiIndexHash,
+    from_signed64,
+    hash_to_int,
+    to_signed64,
+)
+
+
+def test_hash_to_int_formats():
+    assert hash_to_int("ffffffffffffffff") == 2**64 - 1
+    assert hash_to_int("01" * 32) == int("01" * 32, 2)
+    assert hash_to_int("") is None
+    assert hash_to_int("not-a-hash") is None
+
+
+def test_signed64_roundtrip():
+    for value in (0, 1, 2**63 - 1, 2**63, 2**64 - 1):
+        signed = to_signed64(value)
+        assert -(2**63) <= signed < 2**63
+        assert from_signed64(signed) == value
+
+
+def test_multi_index_matches_brute_force():
+    rng = random.Random(7)
+    stored = [rng.getrandbits(64) for _ in range(2000)]
+    index = MultiIndexHash(max_distance=5)
+    for value in stored:
+        index.add(value)
+
+    queries = [rng.getrandbits(64) for _ in range(200)]
+    for base in stored[:200]:
+        flipped = base
+        for bit in rng.sample(range(64), rng.randint(0, 7)):
+            flipped ^= 1 << bit
+        queries.append(flipped)
+
+    for query in queries:
+        expected = any((query ^ value).bit_count() <= 5 for value in stored)
+        found = index.find_within(query)
+        assert (found is not None) == expected
+        if found is not None:
+            assert (found ^ query).bit_count() <= 5
+
+
+def test_claim_is_festival_scoped_and_releasable():
+    index = FestivalHashIndex(max_distance=5)
+    value = 0x0F0F0F0F0F0F0F0F
+    assert index.claim("fest-a", value)
+    assert not index.claim("fest-a", value ^ 0b111)
+    assert index.claim("fest-b", value)
+
+    index.release("fest-a", value)
+    assert index.find_within("fest-a", value ^ 0b111) is None
+
+
+def test_merge_skips_rows_at_or_below_the_watermark():
+    index = FestivalHashIndex(max_distance=5)
+    assert index.load([(1, "fest", 0xAAAA), (4, "fest", 0xBBBB)]) == 2
+    assert index.watermark == 4
+    # A concurrent sync already merged rowid 5; only 6 is new.
+    assert index.merge([(5, "fest", 0xCCCC)]) == 1
+    assert index.merge([(5, "fest", 0xCCCC), (6, "fest", 0xDDDD)]) == 1
+    assert index.watermark == 6
+    assert index.find_within("fest", 0xDDDD) == 0xDDDD
+
+
+def test_uploads_committed_by_another_worker_are_seen(client):
+    from app.main import photo_hash_index
+    from conftest import create_festival, login
+    from test_imaging import _rotated_jpeg
+
+    festival = create_festival(client)
+    url = f"/api/festivals/{festival['id']}/trash-photos"
+    image = {"image": ("a.jpg", _rotated_jpeg(800, 600), "image/jpeg")}
+    _, first = login(client, nickname="first")
+    assert client.post(url, files=image, headers=first).status_code == 200
+
+    # Forget it locally, as if another worker process had accepted it.
+    photo_hash_index.load([])
+    _, second = login(client, nickname="second")
+    response = client.post(url, files=image, headers=second)
+    assert response.status_code == 400
+    assert photo_hash_index.watermark > 0
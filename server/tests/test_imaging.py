@@ -0,0 +1,81 @@
+import io
+
+from PIL import Image
+
+from app.imaging import encode_derivatives, model_input_copy, open_normalized, scale_detections
+from conftest import create_festival, login
+
+
+def _rotated_jpeg(width=4000, height=3000) -> bytes:
+    exif = Image.Exif()
+    exif[0x0112] = 6  # rotate 90° clockwise on display
+    exif[0x010F] = "PhoneMaker"
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), "navy").save(buffer, format="JPEG", exif=exif.tobytes())
+    return buffer.getvalue()
+
+
+def test_upload_is_normalized_upright_downscaled_and_stripped():
+    img = open_normalized(_rotated_jpeg(), max_edge=2048)
+    # Upright, and decoded at half scale by libjpeg instead of resized from full size.
+    assert img.size == (1500, 2000)
+    assert open_normalized(_rotated_jpeg(2400, 1800), max_edge=2048).size == (1536, 2048)
+
+    model_input = model_input_copy(img)
+    assert max(model_input.size) == 640
+    stored, thumbnail = encode_derivatives(img, model_input)
+
+    with Image.open(io.BytesIO(stored)) as reopened:
+        assert reopened.format == "JPEG" and reopened.size == (1500, 2000)
+        assert dict(reopened.getexif()) == {}
+    with Image.open(io.BytesIO(thumbnail)) as thumb:
+        assert thumb.format == "WEBP" and max(thumb.size) == 320
+
+
+def test_detections_are_mapped_back_to_stored_pixels():
+    result = {"raw_detections": [{"class_name": "cup", "bbox": [10.0, 20.0, 30.0, 40.0]}], "trash_count": 1}
+    scaled = scale_detections(result, 3.2)
+    assert scaled["raw_detections"][0]["bbox"] == [32.0, 64.0, 96.0, 128.0]
+    assert scaled["trash_count"] == 1
+    assert scale_detections({"raw_detections": None}, 2.0) == {"raw_detections": None}
+
+
+def test_uploaded_photo_has_thumbnail(client):
+    from app.main import UPLOAD_DIR
+
+    festival = create_festival(client)
+    _, headers = login(client)
+    response = client.post(
+        f"/api/festivals/{festival['id']}/trash-photos",
+        files={"image": ("big.jpg", _rotated_jpeg(), "image/jpeg")},
+        headers=headers,
+    )
+    assert response.status_code == 200, response.text
+    photo = response.json()["photo"]
+    assert photo["imageUrl"].endswith(".jpg")
+    assert photo["thumbnailUrl"].endswith("_thumb.webp")
+    with Image.open(UPLOAD_DIR / photo["imageUrl"].rsplit("/", 1)[1]) as stored:
+        assert stored.size == (1500, 2000)
+    assert (UPLOAD_DIR / photo["thumbnailUrl"].rsplit("/", 1)[1]).exists()
+
+
+def test_failed_upload_keeps_the_same_image_accepted_elsewhere(client, monkeypatch):
+    from app import main
+
+    image = {"image": ("same.jpg", _rotated_jpeg(800, 600), "image/jpeg")}
+    _, headers = login(client)
+    first = client.post(f"/api/festivals/{create_festival(client)['id']}/trash-photos", files=image, headers=headers)
+    assert first.status_code == 200, first.text
+    kept = [main.UPLOAD_DIR / first.json()["photo"][key].rsplit("/", 1)[1] for key in ("imageUrl", "thumbnailUrl")]
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("commit failed")
+
+    # Same bytes in another festival are accepted, but this upload fails after its files are written.
+    monkeypatch.setattr(main, "add_to_summary", fail)
+    second_festival = create_festival(client, name="다른 축제")
+    try:
+        client.post(f"/api/festivals/{second_festival['id']}/trash-photos", files=image, headers=headers)
+    except RuntimeError:
+        pass
+    assert all(path.exists() for path in kept)
@@ -0,0 +1,86 @@
+import asyncio
+
+from app.inference import InferenceBatcher
+
+
+def test_batcher_groups_concurrent_requests():
+    calls = []
+
+    def runner(images):
+        calls.append(list(images))
+        return [{"has_trash": True, "trash_count": image} for image in images]
+
+    async def scenario():
+        batcher = InferenceBatcher(runner, max_batch_size=4, max_wait_ms=50, max_queue_depth=16)
+        await batcher.start()
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(6)))
+        stats = batcher.stats()
+        await batcher.stop()
+        return results, stats
+
+    results, stats = asyncio.run(scenario())
+    assert [r["trash_count"] for r in results] == list(range(6))
+    assert [len(batch) for batch in calls] == [4, 2]
+    assert stats["batchSizeHistogram"] == {"2": 1, "4": 1}
+    assert stats["processed"] == 6
+
+
+def test_batcher_falls_back_when_runner_fails():
+    def runner(images):
+        raise RuntimeError("model exploded")
+
+    async def scenario():
+        batcher = InferenceBatcher(runner, max_batch_size=2, max_wait_ms=0)
+        result = await batcher.submit("image")
+        await batcher.stop()
+        return result
+
+    result = asyncio.run(scenario())
+    assert result == {
+        "has_trash": None,
+        "trash_count": None,
+        "max_trash_confidence": None,
+        "raw_detections": None,
+    }
+
+
+def test_infer_shared_reads_images_from_shared_memory(monkeypatch):
+    from multiprocessing import shared_memory
+
+    import numpy as np
+
+    from app.inference_pool import _infer_shared
+
+    seen = []
+
+    class FakeResult:
+        names = {}
+        boxes = []
+
+    def fake_model(images, verbose=False):
+        seen.extend(image.copy() for image in images)
+        return [FakeResult() for _ in images]
+
+    monkeypatch.setattr("app.yolo_utils._model", fake_model)
+
+    image = np.arange(4 * 5 * 3, dtype=np.uint8).reshape(4, 5, 3)
+    block = shared_memory.SharedMemory(create=True, size=image.nbytes)
+    try:
+        np.ndarray(image.shape, dtype=image.dtype, buffer=block.buf)[...] = image
+        results = _infer_shared([(block.name, image.shape, image.dtype.str)])
+    finally:
+        block.close()
+        block.unlink()
+
+    assert results[0]["has_trash"] is False
+    assert np.array_equal(seen[0], image)
+
+
+def test_stub_model_returns_canned_detections(monkeypatch):
+    from app import yolo_utils
+
+    monkeypatch.setattr(yolo_utils, "YOLO_STUB_LATENCY_MS", "0")
+    results = yolo_utils.analyze_batch([object(), object()])
+    assert [r["trash_count"] for r in results] == [1, 1]
+    results[0]["raw_detections"][0]["bbox"][0] = -1.0
+    assert results[1]["raw_detections"][0]["bbox"][0] == 10.0
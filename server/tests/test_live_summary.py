@@ -0,0 +1,90 @@
+import asyncio
+import io
+import json
+
+import numpy as np
+from PIL import Image
+
+from conftest import ADMIN_HEADERS, create_festival, link_token, login
+
+
+def _noise_png(seed: int) -> bytes:
+    pixels = np.random.default_rng(seed).integers(0, 255, (64, 64, 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _summary(client, festival_id):
+    response = client.get(f"/api/admin/festivals/{festival_id}/summary", headers=ADMIN_HEADERS)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_summary_is_maintained_in_memory_by_write_endpoints(client):
+    from app.live_summary import live_summary
+
+    festival = create_festival(client)
+    fid = festival["id"]
+    client.post(f"/api/admin/festivals/{fid}/trash-bins/generate", json={"count": 1}, headers=ADMIN_HEADERS)
+    user_id, headers = login(client)
+
+    assert _summary(client, fid)["totalPending"] == 0
+    seeds = live_summary.stats()["seeds"]
+
+    upload = client.post(
+        f"/api/festivals/{fid}/trash-photos",
+        files={"image": ("a.png", _noise_png(1), "image/png")},
+        headers=headers,
+    )
+    assert upload.status_code == 200, upload.text
+    after_upload = _summary(client, fid)
+    assert (after_upload["totalPending"], after_upload["totalParticipants"], after_upload["budgetUsed"]) == (100, 1, 100)
+
+    scan = client.post(f"/api/festivals/{fid}/trash-bins/scan", json={"binCode": "TRASH_BIN_01"}, headers=headers)
+    assert scan.status_code == 200, scan.text
+    coupon = client.post(f"/api/festivals/{fid}/coupons", json={"shopName": "shop", "amount": 100}, headers=headers)
+    assert coupon.status_code == 200, coupon.text
+
+    live = _summary(client, fid)
+    assert (live["totalPending"], live["totalActive"], live["budgetUsed"]) == (0, 100, 200)
+    assert [(b["code"], b["count"]) for b in live["binUsage"]] == [("TRASH_BIN_01", 1)]
+    assert live_summary.stats()["seeds"] == seeds
+
+    live_summary.invalidate(fid)
+    assert _summary(client, fid) == live
+
+
+def test_summary_stream_sends_snapshot_then_deltas(client, monkeypatch):
+    from app import main
+    from app.live_summary import live_summary
+
+    monkeypatch.setattr(main, "SUMMARY_STREAM_MIN_INTERVAL_SECONDS", 0)
+    fid = create_festival(client)["id"]
+    assert client.get(f"/api/admin/festivals/{fid}/summary/stream").status_code == 401
+    missing = "/api/admin/festivals/missing/summary/stream"
+    assert client.get(missing, params={"token": link_token(client, missing)}).status_code == 404
+
+    class ConnectedRequest:
+        async def is_disconnected(self):
+            return False
+
+    def parse(chunk: bytes):
+        event, data = chunk.decode("utf-8").strip().split("\n")
+        return event.removeprefix("event: "), json.loads(data.removeprefix("data: "))
+
+    async def scenario():
+        first = main.load_admin_summary(fid)
+        events = main.summary_events(ConnectedRequest(), fid, first)
+        assert parse(await events.__anext__()) == ("summary", first)
+        pending = asyncio.ensure_future(events.__anext__())
+        await asyncio.sleep(0.01)
+        await asyncio.get_running_loop().run_in_executor(None, live_summary.record_coupon, fid, 300)
+        event, delta = parse(await asyncio.wait_for(pending, timeout=5))
+        await events.aclose()
+        return event, delta
+
+    event, delta = asyncio.run(scenario())
+    assert event == "delta"
+    assert delta == {"budgetUsed": 300, "budgetRemaining": 100_000 - 300}
+    assert live_summary.stats()["subscribers"] == 0
@@ -0,0 +1,78 @@
+import asyncio
+import io
+import logging
+import time
+
+from PIL import Image
+
+from app.metrics import MetricsMiddleware, MetricsRegistry, span, span_seconds
+from conftest import ADMIN_HEADERS, create_festival, login
+
+
+def test_histogram_and_counter_render_prometheus_text():
+    registry = MetricsRegistry()
+    hits = registry.counter("demo_hits_total", "Hits.", ("route",))
+    latency = registry.histogram("demo_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    registry.gauge("demo_depth", "Depth.", lambda: [((), 3)])
+    hits.inc('/a"b')
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value, "/a")
+
+    text = registry.render()
+    assert '# TYPE demo_hits_total counter\ndemo_hits_total{route="/a\\"b"} 1' in text
+    assert 'demo_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{route="/a",le="1"} 2' in text
+    assert 'demo_seconds_bucket{route="/a",le="+Inf"} 3' in text
+    assert 'demo_seconds_count{route="/a"} 3' in text
+    assert "# TYPE demo_depth gauge\ndemo_depth 3" in text
+
+
+def test_metrics_endpoint_reports_routes_queries_and_spans(client):
+    festival = create_festival(client)
+    _, headers = login(client)
+    buffer = io.BytesIO()
+    Image.new("RGB", (800, 600), "teal").save(buffer, format="JPEG")
+    hashed_before = span_seconds.count("hash")
+    response = client.post(
+        f"/api/festivals/{festival['id']}/trash-photos",
+        files={"image": ("a.jpg", buffer.getvalue(), "image/jpeg")},
+        headers=headers,
+    )
+    assert response.status_code == 200, response.text
+    assert span_seconds.count("hash") == hashed_before + 1
+    client.get(f"/api/festivals/{festival['id']}")
+
+    assert client.get("/api/admin/metrics").status_code == 401
+    scrape = client.get("/api/admin/metrics", headers={"Authorization": "Bearer admin123"})
+    assert scrape.status_code == 200
+    assert scrape.headers["content-type"].startswith("text/plain")
+    text = scrape.text
+    # Route templates, not raw paths.
+    assert 'cashup_http_requests_total{method="GET",route="/api/festivals/{festival_id}",status="200"}' in text
+    assert festival["id"] not in text
+    assert 'cashup_db_queries_total{route="/api/festivals/{festival_id}/trash-photos"}' in text
+    # Inference runs in the background analysis worker, outside the upload request.
+    for name in ("decode", "hash", "encode", "file_write", "budget"):
+        assert f'cashup_span_seconds_count{{span="{name}"}}' in text
+    assert 'cashup_threadpool_threads{state="limit"}' in text
+    assert "cashup_inference_queue_depth 0" in text
+    assert 'cashup_analysis_jobs_total{outcome="completed"}' in text
+    assert client.get("/api/admin/metrics", headers=ADMIN_HEADERS).status_code == 200
+
+
+def test_slow_requests_are_logged_with_span_breakdown(caplog):
+    async def endpoint(scope, receive, send):
+        with span("hash"):
+            time.sleep(0.002)
+        await send({"type": "http.response.start", "status": 201, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def discard(message):
+        pass
+
+    middleware = MetricsMiddleware(endpoint, slow_request_ms=1)
+    with caplog.at_level(logging.WARNING, logger="cashup.metrics"):
+        asyncio.run(middleware({"type": "http", "method": "POST", "path": "/slow"}, None, discard))
+    [record] = [r for r in caplog.records if r.name == "cashup.metrics"]
+    assert record.getMessage().startswith("slow request POST /slow route=unmatched status=201")
+    assert "db=0q/" in record.getMessage() and " hash=" in record.getMessage()
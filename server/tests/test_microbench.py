@@ -0,0 +1,21 @@
+from benchmarks.microbench import compare
+
+
+def _suite(calibration, **cases):
+    return {
+        "cases": {
+            name: {"ops_per_sec": ops, "peak_alloc_bytes": alloc, "calibration_ops_per_sec": calibration}
+            for name, (ops, alloc) in cases.items()
+        }
+    }
+
+
+def test_compare_normalizes_for_machine_speed_and_flags_regressions():
+    baseline = _suite(1000.0, fast=(100_000, 200), slow=(100_000, 200), hungry=(100_000, 200))
+    # Half-speed machine: everything is 2x slower, only "slow" got slower beyond that.
+    current = _suite(500.0, fast=(50_000, 200), slow=(30_000, 200), hungry=(50_000, 8_000), new=(1, 1))
+    rows = {row["name"]: row for row in compare(current, baseline, threshold=0.25)}
+    assert not rows["fast"]["regressed"]
+    assert rows["slow"]["regressed"] and round(rows["slow"]["speed_change"], 2) == -0.4
+    assert rows["hungry"]["regressed"]
+    assert rows["new"]["speed_change"] is None and not rows["new"]["regressed"]
@@ -0,0 +1,197 @@
+import json
+import sqlite3
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, func, inspect, select, text, tuple_
+
+from app.db import Base
+from app.detections import decode_detections
+from app.migrations import MIGRATIONS, run_migrations
+from app.models import BinScan, Coupon, TrashPhoto, UserDailySummary
+
+
+def test_legacy_database_is_upgraded(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE trash_photos (id VARCHAR PRIMARY KEY, user_id VARCHAR NOT NULL, "
+                "festival_id VARCHAR NOT NULL, image_url VARCHAR NOT NULL, hash VARCHAR NOT NULL, "
+                "status VARCHAR NOT NULL, points INTEGER NOT NULL, created_at DATETIME NOT NULL)"
+            )
+        )
+        conn.execute(
+            text(
+                "INSERT INTO trash_photos VALUES "
+                "('p1', 'u1', 'f1', '/uploads/a.jpg', 'ffffffffffffffff', 'PENDING', 100, '2024-10-01 00:00:00')"
+            )
+        )
+    Base.metadata.create_all(bind=engine)
+
+    applied = run_migrations(engine)
+    assert applied == [version for version, _, _ in MIGRATIONS]
+    assert run_migrations(engine) == []
+
+    columns = {col["name"] for col in inspect(engine).get_columns("trash_photos")}
+    assert {"has_trash", "detections", "hash_value", "content_sha256", "thumbnail_url"} <= columns
+    assert "yolo_raw" not in columns
+    indexes = {index["name"] for index in inspect(engine).get_indexes("trash_photos")}
+    assert "ix_trash_photos_user_festival_status_created" in indexes
+    assert "ix_trash_photos_user_festival_created_id" in indexes
+    assert "ix_trash_photos_user_created" not in indexes
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT hash_value FROM trash_photos")).scalar_one() == -1
+        # Never analysed successfully under the old synchronous flow.
+        assert conn.execute(text("SELECT analysis_status FROM trash_photos")).scalar_one() == "FAILED"
+
+
+def _plan(db, stmt) -> str:
+    sql = str(stmt.compile(bind=db.get_bind(), compile_kwargs={"literal_binds": True}))
+    rows = db.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+    return " | ".join(row[-1] for row in rows)
+
+
+def test_hot_queries_use_indexes(db):
+    since = datetime(2024, 10, 1) - timedelta(minutes=30)
+    hot_queries = {
+        "photo timeline page": select(TrashPhoto)
+        .where(
+            TrashPhoto.user_id == "u",
+            TrashPhoto.festival_id == "f",
+            tuple_(TrashPhoto.created_at, TrashPhoto.id) < tuple_(since, "p"),
+        )
+        .order_by(TrashPhoto.created_at.desc(), TrashPhoto.id.desc())
+        .limit(31),
+        "pending activation": select(TrashPhoto)
+        .where(
+            TrashPhoto.user_id == "u",
+            TrashPhoto.festival_id == "f",
+            TrashPhoto.status == "PENDING",
+            TrashPhoto.created_at >= since,
+        )
+        .order_by(TrashPhoto.created_at.asc()),
+        "admin status totals": select(TrashPhoto.status, func.sum(TrashPhoto.points))
+        .where(TrashPhoto.festival_id == "f")
+        .group_by(TrashPhoto.status),
+        "admin bin usage": select(BinScan.bin_id, func.count(BinScan.bin_id))
+        .where(BinScan.festival_id == "f")
+        .group_by(BinScan.bin_id),
+        "coupon page": select(Coupon)
+        .where(Coupon.user_id == "u", Coupon.festival_id == "f")
+        .order_by(Coupon.created_at.desc(), Coupon.id.desc())
+        .limit(31),
+        "festival export": select(Coupon)
+        .where(Coupon.festival_id == "f", tuple_(Coupon.created_at, Coupon.id) > tuple_(since, "c"))
+        .order_by(Coupon.created_at, Coupon.id),
+        "daily summary": select(UserDailySummary).where(
+            UserDailySummary.user_id == "u",
+            UserDailySummary.festival_id == "f",
+            UserDailySummary.date == "2024-10-01",
+        ),
+    }
+    for name, stmt in hot_queries.items():
+        plan = _plan(db, stmt)
+        assert "USING INDEX" in plan or "USING COVERING INDEX" in plan, f"{name}: {plan}"
+        assert "USE TEMP B-TREE FOR ORDER BY" not in plan, f"{name}: {plan}"
+
+
+def test_global_bin_code_uniqueness_becomes_per_festival(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'bins.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE festivals (id VARCHAR PRIMARY KEY, name VARCHAR NOT NULL)"))
+        conn.execute(
+            text(
+                "CREATE TABLE trash_bins (id VARCHAR PRIMARY KEY, festival_id VARCHAR NOT NULL "
+                "REFERENCES festivals (id), code VARCHAR NOT NULL UNIQUE, name VARCHAR NOT NULL, "
+                "description VARCHAR, latitude FLOAT, longitude FLOAT, created_at DATETIME NOT NULL)"
+            )
+        )
+        conn.execute(text("INSERT INTO festivals VALUES ('f1', 'A'), ('f2', 'B')"))
+        conn.execute(
+            text(
+                "INSERT INTO trash_bins (id, festival_id, code, name, created_at) VALUES "
+                "('b1', 'f1', 'TRASH_BIN_01', 'x', '2024-10-01'), ('b2', 'f1', 'TRASH_BIN_12', 'y', '2024-10-01')"
+            )
+        )
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+
+    uniques = inspect(engine).get_unique_constraints("trash_bins")
+    assert [c["column_names"] for c in uniques] == [["festival_id", "code"]]
+    with engine.begin() as conn:
+        sequences = dict(conn.execute(text("SELECT id, bin_sequence FROM festivals")).all())
+        assert sequences == {"f1": 12, "f2": 0}
+        assert conn.execute(text("SELECT count(*) FROM trash_bins")).scalar_one() == 2
+        conn.execute(
+            text(
+                "INSERT INTO trash_bins (id, festival_id, code, name, created_at) "
+                "VALUES ('b3', 'f2', 'TRASH_BIN_01', 'z', '2024-10-01')"
+            )
+        )
+
+
+def test_yolo_raw_is_packed_into_detections(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'photos.db'}")
+    raw = [
+        {"class_id": 41, "class_name": "cup", "confidence": 0.6123456789, "bbox": [10.25, 20.5, 300.0, 410.75]},
+        # From a custom model: class 0 is not COCO's "person".
+        {"class_id": 0, "class_name": "cigarette butt", "confidence": 0.5, "bbox": [1.0, 2.0, 3.0, 4.0]},
+    ]
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE trash_photos (id VARCHAR PRIMARY KEY, user_id VARCHAR NOT NULL, "
+                "festival_id VARCHAR NOT NULL, image_url VARCHAR NOT NULL, hash VARCHAR NOT NULL, "
+                "status VARCHAR NOT NULL, points INTEGER NOT NULL, created_at DATETIME NOT NULL, yolo_raw JSON)"
+            )
+        )
+        for photo_id, value in (("p1", json.dumps(raw)), ("p2", "null"), ("p3", None), ("p4", '{"boxes": [1]}')):
+            conn.execute(
+                text(
+                    "INSERT INTO trash_photos VALUES "
+                    "(:id, 'u1', 'f1', '/uploads/a.jpg', '0', 'PENDING', 100, '2024-10-01 00:00:00', :raw)"
+                ),
+                {"id": photo_id, "raw": value},
+            )
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT id, detections, yolo_raw FROM trash_photos ORDER BY id")).all()
+    blobs = {photo_id: blob for photo_id, blob, _ in rows}
+    assert blobs["p2"] is None and blobs["p3"] is None and blobs["p4"] is None
+    restored, custom = decode_detections(blobs["p1"])
+    assert restored["class_name"] == "cup" and restored["confidence"] == 0.6123
+    assert restored["bbox"] == [10.2, 20.5, 300.0, 410.8]
+    assert custom["class_name"] == "cigarette butt"
+    # The row the packer could not read keeps its yolo_raw, so the column stays.
+    raw_left = {photo_id: value for photo_id, _, value in rows}
+    assert raw_left == {"p1": None, "p2": None, "p3": None, "p4": '{"boxes": [1]}'}
+
+
+def test_yolo_raw_is_dropped_once_everything_is_packed(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'photos.db'}")
+    raw = [{"class_id": 2, "class_name": "can", "confidence": 0.5, "bbox": [1.0, 2.0, 3.0, 4.0]}]
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE trash_photos (id VARCHAR PRIMARY KEY, user_id VARCHAR NOT NULL, "
+                "festival_id VARCHAR NOT NULL, image_url VARCHAR NOT NULL, hash VARCHAR NOT NULL, "
+                "status VARCHAR NOT NULL, points INTEGER NOT NULL, created_at DATETIME NOT NULL, yolo_raw JSON)"
+            )
+        )
+        conn.execute(
+            text(
+                "INSERT INTO trash_photos VALUES "
+                "('p1', 'u1', 'f1', '/uploads/a.jpg', '0', 'PENDING', 100, '2024-10-01 00:00:00', :raw)"
+            ),
+            {"raw": json.dumps(raw)},
+        )
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+
+    columns = {col["name"] for col in inspect(engine).get_columns("trash_photos")}
+    assert "yolo_raw" not in columns or sqlite3.sqlite_version_info < (3, 35)
+    with engine.connect() as conn:
+        [blob] = conn.execute(text("SELECT detections FROM trash_photos")).scalars()
+    assert decode_detections(blob)[0]["class_name"] == "can"
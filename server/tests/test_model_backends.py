@@ -0,0 +1,100 @@
+import types
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.model_export import OnnxCalibrationReader, calibration_images, head_nodes_to_exclude, letterbox
+from app.models import TrashPhoto
+from app.yolo_utils import model_backend, predict_options, trash_class_ids
+from benchmarks.compare_backends import match_boxes, score
+from conftest import create_festival, login
+
+NAMES = {0: "person", 39: "bottle", 41: "cup", 63: "laptop", 2: "car"}
+
+
+def test_model_backend_from_path():
+    assert model_backend("yolov8n.pt") == "torch"
+    assert model_backend("models/yolov8n_int8.onnx") == "onnx"
+    assert model_backend("yolov8n_int8_openvino_model") == "openvino"
+    assert model_backend("yolov8n_openvino_model/yolov8n.xml") == "openvino"
+    with pytest.raises(ValueError):
+        model_backend("yolov8n.engine")
+
+
+def test_predict_options_restrict_to_trash_classes():
+    assert trash_class_ids(NAMES) == [39, 41, 63]
+    assert predict_options(NAMES, imgsz=480, conf=0.4) == {
+        "imgsz": 480,
+        "conf": 0.4,
+        "verbose": False,
+        "classes": [39, 41, 63],
+    }
+    assert "classes" not in predict_options(NAMES, trash_only=False)
+
+
+def test_letterbox_pads_to_a_square_tensor():
+    tensor = letterbox(Image.new("RGB", (640, 320), (255, 0, 0)), 320)
+    assert tensor.shape == (1, 3, 320, 320) and tensor.dtype == np.float32
+    # 640x320 scales to 320x160, centred with 80px of grey above and below.
+    assert tensor[0, :, 0, 0].tolist() == pytest.approx([114 / 255] * 3)
+    assert tensor[0, :, 160, 160].tolist() == pytest.approx([1.0, 0.0, 0.0])
+
+
+def test_calibration_spreads_over_stored_uploads(client, db, tmp_path):
+    festival = create_festival(client)
+    user_id, _ = login(client)
+    for index in range(10):
+        Image.new("RGB", (64, 48), (index * 20, 0, 0)).save(tmp_path / f"{index}.jpg")
+        db.add(
+            TrashPhoto(
+                user_id=user_id, festival_id=festival["id"], image_url=f"/uploads/{index}.jpg", hash="0" * 16, points=1
+            )
+        )
+    db.add(TrashPhoto(user_id=user_id, festival_id=festival["id"], image_url="/uploads/gone.jpg", hash="0", points=1))
+    db.commit()
+
+    paths = calibration_images(db, tmp_path, 5)
+    assert len(paths) == 5 and len(set(paths)) == 5
+    assert len(calibration_images(db, tmp_path, 50)) == 10
+
+    reader = OnnxCalibrationReader("images", paths[:2], 64)
+    feeds = [reader.get_next(), reader.get_next(), reader.get_next()]
+    assert feeds[2] is None and feeds[0]["images"].shape == (1, 3, 64, 64)
+    reader.rewind()
+    assert reader.get_next() is not None
+
+
+def test_int8_keeps_the_box_decoding_in_fp32():
+    node = lambda name, op: types.SimpleNamespace(name=name, op_type=op)  # noqa: E731
+    graph = types.SimpleNamespace(
+        node=[
+            node("/model.0/conv/Conv", "Conv"),
+            node("/model.22/cv2.0/cv2.0.0/conv/Conv", "Conv"),
+            node("/model.22/Concat_3", "Concat"),
+            node("/model.22/dfl/conv/Conv", "Conv"),
+            node("/model.22/Sigmoid", "Sigmoid"),
+            node("/model.2/Add", "Add"),
+        ]
+    )
+    excluded = head_nodes_to_exclude(types.SimpleNamespace(graph=graph), 22)
+    assert excluded == ["/model.22/Concat_3", "/model.22/dfl/conv/Conv", "/model.22/Sigmoid"]
+
+
+def _result(*boxes):
+    detections = [{"class_id": 39, "class_name": "bottle", "confidence": conf, "bbox": bbox} for bbox, conf in boxes]
+    return {"has_trash": bool(detections), "trash_count": len(detections), "raw_detections": detections}
+
+
+def test_backend_score_against_the_reference():
+    reference = [_result(([0, 0, 10, 10], 0.9), ([20, 20, 30, 30], 0.8)), _result(), _result(([0, 0, 10, 10], 0.5))]
+    # Same first box (slightly shifted), misses the second; a false positive; misses the third image entirely.
+    candidate = [_result(([1, 0, 11, 10], 0.85)), _result(([50, 50, 60, 60], 0.3)), _result()]
+    assert match_boxes(reference[0]["raw_detections"], candidate[0]["raw_detections"]) == 1
+    assert score(reference, candidate) == {
+        "has_trash_agreement": pytest.approx(1 / 3),
+        "count_agreement": 0.0,
+        "box_recall": pytest.approx(1 / 3),
+        "box_precision": 0.5,
+    }
+    assert score(reference, reference)["box_precision"] == 1.0
@@ -0,0 +1,139 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+
+from app.budget import get_budget_usage
+from app.main import get_today
+from app.models import BinScan, Coupon, TrashPhoto, UserDailySummary
+from app.db import get_db
+from app.points import KST, activate_pending_photos, add_to_summary, prewarm_summaries
+from app.rate_limit import RateLimit, rate_limiter
+from app.summary_prewarm import SummaryPrewarmer
+from conftest import ADMIN_HEADERS, create_festival, login
+
+PARALLEL_REQUESTS = 100
+
+
+def _summary(db, user_id, festival_id, **totals):
+    db.add(UserDailySummary(user_id=user_id, festival_id=festival_id, date=get_today(), **totals))
+    db.commit()
+
+
+def _pending_photos(db, user_id, festival_id, *points):
+    start = datetime.utcnow() - timedelta(minutes=5)
+    for index, value in enumerate(points):
+        db.add(
+            TrashPhoto(
+                user_id=user_id,
+                festival_id=festival_id,
+                image_url=f"/uploads/{index}.jpg",
+                hash="0" * 16,
+                points=value,
+                created_at=start + timedelta(seconds=index),
+            )
+        )
+    db.commit()
+
+
+def _fire(client, url, payload, headers):
+    with ThreadPoolExecutor(max_workers=PARALLEL_REQUESTS) as pool:
+        return list(pool.map(lambda _: client.post(url, json=payload, headers=headers), range(PARALLEL_REQUESTS)))
+
+
+def test_parallel_coupon_requests_never_double_spend(client, db, monkeypatch):
+    monkeypatch.setitem(rate_limiter.limits, "coupon", RateLimit.parse("1000/60"))
+    # Points allow six 150-point coupons, the budget only four.
+    festival = create_festival(client, budget=600)
+    user_id, headers = login(client)
+    _summary(db, user_id, festival["id"], total_active=1000)
+
+    payload = {"shopName": "OO 카페", "amount": 150}
+    url = f"/api/festivals/{festival['id']}/coupons"
+    responses = _fire(client, url, payload, headers)
+
+    statuses = sorted(r.status_code for r in responses)
+    assert statuses.count(200) == 4 and set(statuses) == {200, 400}, statuses
+    codes = {r.json()["coupon"]["code"] for r in responses if r.status_code == 200}
+    assert len(codes) == 4
+    db.expire_all()
+    summary = db.execute(select(UserDailySummary).where(UserDailySummary.user_id == user_id)).scalar_one()
+    assert (summary.total_active, summary.total_consumed) == (400, 600)
+    assert db.execute(select(func.count(Coupon.id))).scalar_one() == 4
+    assert get_budget_usage(db, festival["id"]) == 600
+
+
+def test_parallel_scans_activate_each_photo_once(client, db, monkeypatch):
+    monkeypatch.setitem(rate_limiter.limits, "scan", RateLimit.parse("1000/60"))
+    festival = create_festival(client, perUserDailyCap=700)
+    client.post(f"/api/admin/festivals/{festival['id']}/trash-bins/generate", json={"count": 1}, headers=ADMIN_HEADERS)
+    user_id, headers = login(client)
+    _pending_photos(db, user_id, festival["id"], *[100] * 10)
+    _summary(db, user_id, festival["id"], total_pending=1000)
+
+    url = f"/api/festivals/{festival['id']}/trash-bins/scan"
+    payload = {"binCode": "TRASH_BIN_01"}
+    responses = _fire(client, url, payload, headers)
+
+    ok = [r.json() for r in responses if r.status_code == 200]
+    assert ok and {r.status_code for r in responses} <= {200, 400}
+    assert sum(body["activated"] for body in ok) == 700
+    db.expire_all()
+    active = db.execute(select(func.count(TrashPhoto.id)).where(TrashPhoto.status == "ACTIVE")).scalar_one()
+    assert active == 7
+    summary = db.execute(select(UserDailySummary).where(UserDailySummary.user_id == user_id)).scalar_one()
+    assert (summary.total_pending, summary.total_active) == (300, 700)
+    assert db.execute(select(func.count(BinScan.id))).scalar_one() == len(ok)
+
+
+def test_activation_takes_the_oldest_prefix_that_fits(client, db):
+    festival = create_festival(client)
+    user_id, _ = login(client)
+    _pending_photos(db, user_id, festival["id"], 300, 500, 200)
+    _summary(db, user_id, festival["id"], total_pending=1000, total_consumed=100)
+    since = datetime.utcnow() - timedelta(minutes=30)
+
+    # 900 left under the cap: 300 + 500 fit; the 200 behind them is not taken out of order.
+    activated, count, totals = activate_pending_photos(db, user_id, festival["id"], get_today(), 1000, since)
+    assert (activated, count) == (800, 2)
+    assert (totals.total_pending, totals.total_active, totals.total_consumed) == (200, 800, 100)
+    assert activate_pending_photos(db, user_id, festival["id"], get_today(), 1000, since) == (0, 0, None)
+
+
+def test_summary_upserts_share_one_row_under_concurrency(client, db):
+    festival = create_festival(client)
+    user_id, headers = login(client)
+    # Reading a missing day writes nothing.
+    response = client.get(f"/api/users/{user_id}/summary", params={"festivalId": festival["id"]}, headers=headers)
+    assert response.json()["summary"]["totalPending"] == 0
+    assert db.execute(select(func.count(UserDailySummary.id))).scalar_one() == 0
+
+    def add(_):
+        with get_db() as session:
+            add_to_summary(session, user_id, festival["id"], "2024-10-01", pending=100)
+
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        list(pool.map(add, range(40)))
+    rows = db.execute(select(UserDailySummary).where(UserDailySummary.date == "2024-10-01")).scalars().all()
+    assert [row.total_pending for row in rows] == [4000]
+
+
+def test_prewarm_creates_next_day_rows_once(client, db):
+    festival = create_festival(client)
+    active_id, _ = login(client, "active")
+    login(client, "idle")
+    db.add(UserDailySummary(user_id=active_id, festival_id=festival["id"], date="2024-10-01", total_active=300))
+    db.commit()
+
+    assert prewarm_summaries(db, "2024-10-01", "2024-10-02") == 1
+    assert prewarm_summaries(db, "2024-10-01", "2024-10-02") == 0
+    db.commit()
+    [row] = db.execute(select(UserDailySummary).where(UserDailySummary.date == "2024-10-02")).scalars().all()
+    assert (row.user_id, row.total_pending, row.total_active, row.total_consumed) == (active_id, 0, 0, 0)
+
+
+def test_prewarm_wakes_before_kst_midnight():
+    prewarmer = SummaryPrewarmer(lead_seconds=300, clock=lambda: datetime(2024, 10, 1, 23, 0, tzinfo=KST))
+    assert prewarmer.seconds_until_run() == 55 * 60
+    prewarmer.clock = lambda: datetime(2024, 10, 1, 23, 58, tzinfo=KST)
+    assert prewarmer.seconds_until_run() == 0
@@ -0,0 +1,51 @@
+import asyncio
+
+from app.rate_limit import MemoryBackend, RateLimit, RateLimiter, SQLiteBackend
+
+
+def test_memory_bucket_allows_burst_then_refills():
+    backend = MemoryBackend()
+    limit = RateLimit.parse("5/60")
+    assert all(backend.acquire("u", limit, now=0.0)[0] for _ in range(5))
+    allowed, retry_after = backend.acquire("u", limit, now=0.0)
+    assert not allowed
+    assert retry_after == 12.0
+    assert backend.acquire("u", limit, now=12.0)[0]
+    assert backend.acquire("other", limit, now=0.0)[0]
+
+
+def test_sqlite_buckets_are_shared_between_backends(tmp_path):
+    path = str(tmp_path / "ratelimit.db")
+    first, second = SQLiteBackend(path), SQLiteBackend(path)
+    limit = RateLimit.parse("3/30")
+    assert first.acquire("u", limit, now=100.0)[0]
+    assert second.acquire("u", limit, now=100.0)[0]
+    assert first.acquire("u", limit, now=100.0)[0]
+    allowed, retry_after = second.acquire("u", limit, now=100.0)
+    assert not allowed
+    assert abs(retry_after - 10.0) < 1e-6
+    assert first.acquire("u", limit, now=110.0)[0]
+
+
+def test_limiter_scopes_are_independent():
+    limiter = RateLimiter(MemoryBackend(), {"upload": "1/60"})
+
+    async def scenario():
+        return [
+            await limiter.hit("upload", "u"),
+            await limiter.hit("upload", "u"),
+            await limiter.hit("unlimited", "u"),
+        ]
+
+    results = asyncio.run(scenario())
+    assert [allowed for allowed, _ in results] == [True, False, True]
+
+
+def test_mock_login_is_rate_limited_per_client(client, monkeypatch):
+    from app.rate_limit import rate_limiter
+
+    monkeypatch.setitem(rate_limiter.limits, "mock-login", RateLimit.parse("5/60"))
+    statuses = [client.post("/api/auth/mock-login", json={"nickname": "n"}).status_code for _ in range(6)]
+    assert statuses == [200] * 5 + [429]
+    response = client.post("/api/auth/mock-login", json={"nickname": "n"})
+    assert int(response.headers["Retry-After"]) >= 1
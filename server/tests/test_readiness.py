@@ -0,0 +1,110 @@
+import sys
+import time
+import types
+
+import pytest
+
+from app import yolo_utils
+from app.readiness import StartupState, startup_state
+
+
+class _FakeYolo:
+    loads = 0
+
+    def __init__(self, path, task=None):
+        _FakeYolo.loads += 1
+        self.names = {0: "person", 39: "bottle", 41: "cup"}
+        self.calls = []
+
+    def __call__(self, images, **options):
+        self.calls.append(([image.shape for image in images], options))
+        return [types.SimpleNamespace(names={}, boxes=[]) for _ in images]
+
+
+def _reset_model(monkeypatch):
+    monkeypatch.setattr(yolo_utils, "YOLO_STUB_LATENCY_MS", None)
+    monkeypatch.setattr(yolo_utils, "_model", None)
+    monkeypatch.setattr(yolo_utils, "_model_error", None)
+    monkeypatch.setattr(yolo_utils, "_model_load_seconds", None)
+
+
+def test_warm_up_loads_ultralytics_lazily_and_runs_once(monkeypatch):
+    _reset_model(monkeypatch)
+    monkeypatch.setitem(sys.modules, "ultralytics", types.SimpleNamespace(YOLO=_FakeYolo))
+    _FakeYolo.loads = 0
+    assert yolo_utils.model_state() == {"state": "not_loaded"}
+
+    state = yolo_utils.warm_up()
+    assert state["state"] == "loaded"
+    [(shapes, options)] = yolo_utils._model.calls
+    assert shapes == [(640, 640, 3)]
+    # Only the trash classes are requested from the model.
+    assert options["classes"] == [39, 41]
+    assert state["backend"] == "torch"
+    yolo_utils.warm_up()
+    assert _FakeYolo.loads == 1
+
+
+def test_missing_ultralytics_is_reported_not_raised(monkeypatch):
+    _reset_model(monkeypatch)
+    monkeypatch.setitem(sys.modules, "ultralytics", None)
+    state = yolo_utils.warm_up()
+    assert state["state"] == "unavailable"
+    assert "ultralytics" in state["error"]
+
+
+def _wait_for_warm_up(client):
+    deadline = time.monotonic() + 5
+    while True:
+        if startup_state.model_seconds is not None or time.monotonic() > deadline:
+            return client.get("/api/ready")
+        time.sleep(0.05)
+
+
+@pytest.fixture
+def stub_model(monkeypatch):
+    _reset_model(monkeypatch)
+    monkeypatch.setattr(yolo_utils, "YOLO_STUB_LATENCY_MS", "0")
+
+
+@pytest.fixture
+def missing_model(monkeypatch):
+    _reset_model(monkeypatch)
+    monkeypatch.setitem(sys.modules, "ultralytics", None)
+
+
+def test_ready_turns_green_after_startup(stub_model, client):
+    response = _wait_for_warm_up(client)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["checks"] == {"database": True, "caches": True, "model": True}
+    assert {"database", "budget_counters", "hash_index", "festival_cache"} <= set(body["startup"]["phasesMs"])
+    assert client.get("/api/health").json() == {"ok": True}
+
+
+def test_ready_is_503_with_the_reason_when_the_model_fails_to_load(missing_model, client):
+    response = _wait_for_warm_up(client)
+    assert response.status_code == 503
+    body = response.json()
+    assert body["checks"]["model"] is False
+    assert body["model"]["state"] == "unavailable"
+    assert "ultralytics" in body["model"]["error"]
+
+
+def test_ready_is_503_until_the_model_is_warm(stub_model, client, monkeypatch):
+    monkeypatch.setattr(startup_state, "model_ready", False)
+    response = client.get("/api/ready")
+    assert response.status_code == 503
+    assert response.json()["checks"]["model"] is False
+
+
+def test_startup_breakdown_lists_phases_in_order():
+    state = StartupState(boot_started=time.perf_counter())
+    state.mark_imported()
+    with state.phase("database"):
+        pass
+    with state.phase("hash_index"):
+        pass
+    breakdown = state.breakdown()
+    assert breakdown.startswith("imports=")
+    assert breakdown.index("database=") < breakdown.index("hash_index=") < breakdown.index("total=")
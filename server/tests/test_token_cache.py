@@ -0,0 +1,61 @@
+import time
+
+from app import main
+from app.token_cache import VerifiedTokenCache, token_cache
+
+
+def test_cache_enforces_expiry_and_bound():
+    cache = VerifiedTokenCache(max_entries=2)
+    cache.put("a", "user-a", expires_at=100)
+    cache.put("b", "user-b", expires_at=100)
+    assert cache.get("a", now=50) == "user-a"
+    cache.put("c", "user-c", expires_at=100)  # evicts "b", the least recently used
+    assert cache.get("b", now=50) is None
+    assert cache.get("a", now=101) is None
+
+
+def test_verify_token_uses_cache_and_respects_key_rotation(monkeypatch):
+    token_cache.clear()
+    token = main.create_token("user-1")
+    assert main.verify_token(token) == "user-1"
+    assert token_cache.get(token, int(time.time())) == "user-1"
+
+    monkeypatch.setattr(main, "SECRET_KEY", "rotated-secret")
+    assert main.verify_token(token) is None
+    assert token_cache.stats()["entries"] == 0
+
+
+def test_verify_token_rejects_expired_cached_token(monkeypatch):
+    token_cache.clear()
+    token = main.create_token("user-2")
+    assert main.verify_token(token) == "user-2"
+    later = time.time() + main.TOKEN_TTL_SECONDS + 10
+    monkeypatch.setattr(main.time, "time", lambda: later)
+    assert main.verify_token(token) is None
+
+
+def test_header_hit_skips_parsing_and_verification(monkeypatch):
+    token_cache.clear()
+    header = f"Bearer {main.create_token('user-3')}"
+    assert main.get_current_user_id(header) == "user-3"
+
+    def unexpected(*args, **kwargs):
+        raise AssertionError("a cache hit must not re-verify the token")
+
+    monkeypatch.setattr(main, "verify_token", unexpected)
+    assert main.get_current_user_id(header) == "user-3"
+
+    # A different signing key misses the fast path.
+    monkeypatch.setattr(main, "SECRET_KEY", "rotated-secret")
+    assert token_cache.get(header, time.time(), main.SECRET_KEY) is None
+
+
+def test_hits_only_restamp_entries_in_the_older_half():
+    cache = VerifiedTokenCache(max_entries=4)
+    cache.put("a", "user-a", expires_at=100)
+    cache.put("b", "user-b", expires_at=100)
+    assert cache.get("a", now=50) == "user-a"
+    assert list(cache._entries) == ["a", "b"]  # still recent enough, no write
+    cache.put("c", "user-c", expires_at=100)
+    assert cache.get("a", now=50) == "user-a"
+    assert list(cache._entries) == ["b", "c", "a"]
@@ -1,8 +1,12 @@
+import hashlib
+import io
+import sys
 from pathlib import Path
 
 import pytest
+from fastapi import HTTPException, UploadFile
 
-from app.main import compute_image_hash, normalize_bin_code, parse_hash
+from app.main import compute_image_hash, normalize_bin_code, parse_hash, read_upload
 from app.yolo_utils import analyze_trash
 from PIL import Image
 
@@ -32,6 +36,24 @@ def test_compute_image_hash(tmp_path: Path):
     assert str(hash_obj) == hash_str
 
 
+def test_compute_image_hash_accepts_decoded_image(tmp_path: Path):
+    img_path = tmp_path / "gradient.png"
+    img = Image.linear_gradient("L").convert("RGB")
+    img.save(img_path)
+    assert compute_image_hash(img) == compute_image_hash(img_path)
+
+
+def test_read_upload_hashes_and_enforces_limit():
+    payload = b"x" * 200_000
+    data, digest = read_upload(UploadFile(io.BytesIO(payload)), max_bytes=len(payload))
+    assert data == payload
+    assert digest == hashlib.sha256(payload).hexdigest()
+
+    with pytest.raises(HTTPException) as exc:
+        read_upload(UploadFile(io.BytesIO(payload)), max_bytes=len(payload) - 1)
+    assert exc.value.status_code == 413
+
+
 def test_parse_hash_binary_string():
     # 64 bit binary of alternating pattern
     binary = "01" * 32
@@ -44,8 +66,10 @@ def test_analyze_trash_without_model(tmp_path: Path, monkeypatch):
     img_path = tmp_path / "dummy.jpg"
     Image.new("RGB", (4, 4), "gray").save(img_path)
 
-    monkeypatch.setattr("app.yolo_utils.YOLO", None)
+    # A None entry makes the lazy ``from ultralytics import YOLO`` raise ImportError.
+    monkeypatch.setitem(sys.modules, "ultralytics", None)
     monkeypatch.setattr("app.yolo_utils._model", None)
+    monkeypatch.setattr("app.yolo_utils._model_error", None)
 
     result = analyze_trash(str(img_path))
     assert result["has_trash"] is None
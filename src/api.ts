@@ -1,4 +1,4 @@
-import { AuthSession, Coupon, Festival, Shop, Summary, TrashBin, TrashPhoto, User } from './types';
+import { AuthSession, Coupon, Festival, PhotoAnalysis, Shop, Summary, TrashBin, TrashPhoto, User } from './types';
 
 export const API_BASE = import.meta.env.VITE_API_URL || 'http://localhost:4000/api';
 const API_ORIGIN = API_BASE.replace(/\/api$/, '');
@@ -48,11 +48,25 @@ export const api = {
     return handle(res);
   },
 
-  async getPhotos(userId: string, festivalId: string): Promise<TrashPhoto[]> {
-    const res = await fetch(`${API_BASE}/users/${userId}/photos?festivalId=${festivalId}`, {
+  async getPhotos(
+    userId: string,
+    festivalId: string,
+    cursor?: string | null
+  ): Promise<{ photos: TrashPhoto[]; nextCursor: string | null }> {
+    const query = new URLSearchParams({ festivalId });
+    if (cursor) query.set('cursor', cursor);
+    const res = await fetch(`${API_BASE}/users/${userId}/photos?${query}`, {
       headers: withAuth()
     });
-    const data = await handle<{ photos: TrashPhoto[] }>(res);
+    return handle<{ photos: TrashPhoto[]; nextCursor: string | null }>(res);
+  },
+
+  async getPhotoAnalysis(userId: string, ids: string[]): Promise<PhotoAnalysis[]> {
+    const query = new URLSearchParams({ ids: ids.join(',') });
+    const res = await fetch(`${API_BASE}/users/${userId}/photos/analysis?${query}`, {
+      headers: withAuth()
+    });
+    const data = await handle<{ photos: PhotoAnalysis[] }>(res);
     return data.photos;
   },
 
@@ -90,6 +104,11 @@ export const api = {
     return data.bins;
   },
 
+  async nearestBin(festivalId: string, lat: number, lng: number) {
+    const res = await fetch(`${API_BASE}/festivals/${festivalId}/trash-bins/nearest?lat=${lat}&lng=${lng}`);
+    return handle<{ bin: TrashBin | null; distanceMeters: number | null }>(res);
+  },
+
   async scanBin(params: {
     userId: string;
     festivalId: string;
@@ -131,12 +150,17 @@ export const api = {
     return handle<{ coupon: Coupon }>(res);
   },
 
-  async listCoupons(userId: string, festivalId: string): Promise<Coupon[]> {
-    const res = await fetch(`${API_BASE}/users/${userId}/coupons?festivalId=${festivalId}`, {
+  async listCoupons(
+    userId: string,
+    festivalId: string,
+    cursor?: string | null
+  ): Promise<{ coupons: Coupon[]; nextCursor: string | null }> {
+    const query = new URLSearchParams({ festivalId });
+    if (cursor) query.set('cursor', cursor);
+    const res = await fetch(`${API_BASE}/users/${userId}/coupons?${query}`, {
       headers: withAuth()
     });
-    const data = await handle<{ coupons: Coupon[] }>(res);
-    return data.coupons;
+    return handle<{ coupons: Coupon[]; nextCursor: string | null }>(res);
   },
 
   async adminLogin(password: string) {
@@ -166,6 +190,44 @@ export const api = {
     return handle<{ bins: TrashBin[] }>(res);
   },
 
+  async adminImportBins(festivalId: string, file: File, token: string) {
+    const form = new FormData();
+    form.append('file', file);
+    const res = await fetch(`${API_BASE}/admin/festivals/${festivalId}/trash-bins/import`, {
+      method: 'POST',
+      headers: { 'x-admin-token': token },
+      body: form
+    });
+    return handle<{ bins: TrashBin[] }>(res);
+  },
+
+  // Download links and EventSource cannot set headers. Instead of the admin token, their URLs carry a
+  // short-lived token the server signs for that one path.
+  async adminLinkUrl(path: string, params: Record<string, string>, token: string) {
+    const fullPath = new URL(`${API_BASE}${path}`, window.location.href).pathname;
+    const res = await fetch(`${API_BASE}/admin/link-tokens`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json', 'x-admin-token': token },
+      body: JSON.stringify({ path: fullPath })
+    });
+    const data = await handle<{ token: string; expiresAt: number }>(res);
+    const query = new URLSearchParams({ ...params, token: data.token });
+    return `${API_BASE}${path}?${query}`;
+  },
+
+  adminBinQrCodesUrl(festivalId: string, format: 'zip' | 'pdf', token: string) {
+    return api.adminLinkUrl(`/admin/festivals/${festivalId}/trash-bins/qr-codes`, { format }, token);
+  },
+
+  adminExportUrl(
+    festivalId: string,
+    table: 'trash_photos' | 'bin_scans' | 'coupons' | 'user_daily_summaries',
+    format: 'csv' | 'ndjson' | 'parquet',
+    token: string
+  ) {
+    return api.adminLinkUrl(`/admin/festivals/${festivalId}/exports/${table}`, { format }, token);
+  },
+
   async adminSummary(festivalId: string, token: string) {
     const res = await fetch(`${API_BASE}/admin/festivals/${festivalId}/summary`, {
       headers: { 'x-admin-token': token }
@@ -179,5 +241,9 @@ export const api = {
       budgetRemaining: number;
       binUsage: { binId: string; code?: string; count: number }[];
     }>(res);
+  },
+
+  async adminSummaryStream(festivalId: string, token: string) {
+    return new EventSource(await api.adminLinkUrl(`/admin/festivals/${festivalId}/summary/stream`, {}, token));
   }
 };
@@ -1,6 +1,17 @@
 import { useEffect, useState } from 'react';
 
-type Coords = { lat: number; lng: number };
+export type Coords = { lat: number; lng: number };
+
+const EARTH_RADIUS_METERS = 6371000;
+
+// Great-circle distance, as the server's haversine_distance computes it.
+export const distanceMeters = (a: Coords, b: Coords) => {
+  const toRad = (deg: number) => (deg * Math.PI) / 180;
+  const dLat = toRad(b.lat - a.lat);
+  const dLng = toRad(b.lng - a.lng);
+  const h = Math.sin(dLat / 2) ** 2 + Math.cos(toRad(a.lat)) * Math.cos(toRad(b.lat)) * Math.sin(dLng / 2) ** 2;
+  return 2 * EARTH_RADIUS_METERS * Math.asin(Math.sqrt(h));
+};
 
 export const useLocation = () => {
   const [coords, setCoords] = useState<Coords | null>(null);
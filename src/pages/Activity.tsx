@@ -11,18 +11,31 @@ const statusLabel: Record<TrashPhoto['status'], { label: string; color: string }
   REJECTED: { label: '반려', color: 'bg-rose-100 text-rose-700' }
 };
 
+// YOLO analysis runs after the upload returns; poll the photos still being analysed.
+const ANALYSIS_POLL_MS = 3000;
+const ANALYSIS_POLL_MAX_IDS = 100;
+
+const analysisText = (photo: TrashPhoto) => {
+  if (photo.analysisStatus === 'ANALYZING') return '분석 중...';
+  if (photo.analysisStatus === 'FAILED') return '분석 실패';
+  return `${photo.trashCount ?? '—'}개 감지 ${photo.hasTrash === false ? '(쓰레기 없음으로 추정)' : ''}`;
+};
+
 export const ActivityPage = () => {
   const { user, festival } = useAppState();
   const [photos, setPhotos] = useState<TrashPhoto[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
+  const [pollCount, setPollCount] = useState(0);
 
-  const fetchPhotos = async () => {
+  const fetchPhotos = async (cursor?: string | null) => {
     if (!user || !festival) return;
     setLoading(true);
     try {
-      const list = await api.getPhotos(user.id, festival.id);
-      setPhotos(list);
+      const page = await api.getPhotos(user.id, festival.id, cursor);
+      setPhotos((prev) => (cursor ? [...prev, ...page.photos] : page.photos));
+      setNextCursor(page.nextCursor);
       setError(null);
     } catch (err) {
       setError(err instanceof Error ? err.message : '활동 내역을 불러오지 못했습니다.');
@@ -35,6 +48,28 @@ export const ActivityPage = () => {
     fetchPhotos();
   }, [user?.id, festival?.id]);
 
+  const analyzingIds = photos
+    .filter((photo) => photo.analysisStatus === 'ANALYZING')
+    .slice(0, ANALYSIS_POLL_MAX_IDS)
+    .map((photo) => photo.id);
+  const analyzingKey = analyzingIds.join(',');
+
+  useEffect(() => {
+    if (!user || analyzingIds.length === 0) return;
+    const timer = window.setTimeout(async () => {
+      try {
+        const updates = await api.getPhotoAnalysis(user.id, analyzingIds);
+        const byId = new Map(updates.map((update) => [update.id, update]));
+        setPhotos((prev) => prev.map((photo) => ({ ...photo, ...byId.get(photo.id) })));
+      } catch {
+        // Keep the last known state; the next poll retries.
+      } finally {
+        setPollCount((count) => count + 1);
+      }
+    }, ANALYSIS_POLL_MS);
+    return () => window.clearTimeout(timer);
+  }, [user?.id, analyzingKey, pollCount]);
+
   return (
     <Layout title="내 활동" showBack>
       <div className="space-y-3">
@@ -61,12 +96,26 @@ export const ActivityPage = () => {
                 <p className="text-xs text-beach-navy/60">최근 30분 내 인증된 사진만 전환돼요</p>
               </div>
               <div className="text-xs text-beach-navy/70">
-                YOLO 분석: {photo.trashCount ?? '—'}개 감지 {photo.hasTrash === false ? '(쓰레기 없음으로 추정)' : ''}
+                YOLO 분석: {analysisText(photo)}
               </div>
-              <img src={resolveImageUrl(photo.imageUrl)} alt="trash" className="h-36 w-full rounded-xl object-cover shadow" />
+              <img
+                src={resolveImageUrl(photo.thumbnailUrl ?? photo.imageUrl)}
+                alt="trash"
+                loading="lazy"
+                className="h-36 w-full rounded-xl object-cover shadow"
+              />
             </Card>
           );
         })}
+        {nextCursor && !loading && (
+          <button
+            type="button"
+            onClick={() => fetchPhotos(nextCursor)}
+            className="w-full rounded-xl bg-white py-3 text-sm font-semibold text-beach-navy shadow"
+          >
+            더 보기
+          </button>
+        )}
       </div>
     </Layout>
   );
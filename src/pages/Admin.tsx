@@ -1,4 +1,4 @@
-import { FormEvent, useEffect, useState } from 'react';
+import { ChangeEvent, FormEvent, useEffect, useState } from 'react';
 import { api } from '../api';
 import { Button } from '../components/Button';
 import { Card } from '../components/Card';
@@ -6,6 +6,15 @@ import { Layout } from '../components/Layout';
 import { useAppState } from '../state/AppStateContext';
 import { Festival } from '../types';
 
+const STREAM_RECONNECT_MS = 3000;
+
+const exportTables = [
+  { table: 'trash_photos', label: '사진' },
+  { table: 'bin_scans', label: 'QR 스캔' },
+  { table: 'coupons', label: '쿠폰' },
+  { table: 'user_daily_summaries', label: '일일 요약' }
+] as const;
+
 type AdminSummary = {
   festival: Festival;
   totalParticipants: number;
@@ -35,11 +44,56 @@ export const AdminPage = () => {
   const [error, setError] = useState<string | null>(null);
 
   useEffect(() => {
-    if (token && festival) {
-      loadSummary(festival.id, token);
-    }
+    if (!token || !festival) return;
+    let source: EventSource | null = null;
+    let retry: number | undefined;
+    let stopped = false;
+    const reconnectLater = () => {
+      retry = window.setTimeout(connect, STREAM_RECONNECT_MS);
+    };
+    const connect = async () => {
+      try {
+        source = await api.adminSummaryStream(festival.id, token);
+      } catch {
+        if (!stopped) reconnectLater();
+        return;
+      }
+      if (stopped) {
+        source.close();
+        return;
+      }
+      // The stream sends the full summary first, then only the fields that changed.
+      source.addEventListener('summary', (event) => {
+        setSummary(JSON.parse((event as MessageEvent).data));
+      });
+      source.addEventListener('delta', (event) => {
+        const delta = JSON.parse((event as MessageEvent).data) as Partial<AdminSummary>;
+        setSummary((prev) => (prev ? { ...prev, ...delta } : prev));
+      });
+      source.onerror = () => {
+        // The URL's link token is short-lived, so reconnect with a fresh one rather than letting
+        // EventSource retry the old URL. One fetch keeps the numbers current meanwhile.
+        source?.close();
+        loadSummary(festival.id, token);
+        reconnectLater();
+      };
+    };
+    connect();
+    return () => {
+      stopped = true;
+      window.clearTimeout(retry);
+      source?.close();
+    };
   }, [festival?.id, token]);
 
+  const download = async (url: Promise<string>) => {
+    try {
+      window.location.assign(await url);
+    } catch (err) {
+      setError(err instanceof Error ? err.message : '다운로드 링크를 만들지 못했습니다.');
+    }
+  };
+
   const handleLogin = async (e: FormEvent) => {
     e.preventDefault();
     try {
@@ -77,6 +131,19 @@ export const AdminPage = () => {
     }
   };
 
+  const handleImportBins = async (e: ChangeEvent<HTMLInputElement>) => {
+    const file = e.target.files?.[0];
+    e.target.value = '';
+    if (!token || !festival || !file) return;
+    try {
+      const res = await api.adminImportBins(festival.id, file, token);
+      setMessage(`CSV에서 ${res.bins.length}개의 수거함 등록 완료`);
+      setError(null);
+    } catch (err) {
+      setError(err instanceof Error ? err.message : 'CSV 등록 실패');
+    }
+  };
+
   const loadSummary = async (festivalId: string, adminToken: string) => {
     try {
       const res = await api.adminSummary(festivalId, adminToken);
@@ -178,9 +245,46 @@ export const AdminPage = () => {
               생성
             </Button>
           </form>
+          <label className="block text-xs text-beach-navy/80">
+            CSV 일괄 등록 (name, description, lat, lng)
+            <input
+              type="file"
+              accept=".csv,text/csv"
+              className="mt-1 block w-full text-xs"
+              onChange={handleImportBins}
+              disabled={!token || !festival}
+            />
+          </label>
+          {token && festival && (
+            <div className="flex gap-3 text-xs font-semibold text-beach-sea">
+              <button type="button" onClick={() => download(api.adminBinQrCodesUrl(festival.id, 'zip', token))}>
+                QR 코드 ZIP 받기
+              </button>
+              <button type="button" onClick={() => download(api.adminBinQrCodesUrl(festival.id, 'pdf', token))}>
+                QR 라벨 PDF 받기
+              </button>
+            </div>
+          )}
           <p className="text-xs text-beach-navy/60">현재 축제: {festival?.name ?? '없음'} ({festival?.id ?? 'ID 없음'})</p>
         </Card>
 
+        {token && festival && (
+          <Card className="space-y-2">
+            <p className="text-sm font-semibold text-beach-navy">정산 데이터 내보내기 (CSV)</p>
+            <div className="flex flex-wrap gap-3 text-xs font-semibold text-beach-sea">
+              {exportTables.map(({ table, label }) => (
+                <button
+                  key={table}
+                  type="button"
+                  onClick={() => download(api.adminExportUrl(festival.id, table, 'csv', token))}
+                >
+                  {label}
+                </button>
+              ))}
+            </div>
+          </Card>
+        )}
+
         <Card className="space-y-2">
           <p className="text-sm font-semibold text-beach-navy">실시간 대시보드</p>
           {summary ? (
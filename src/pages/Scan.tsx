@@ -3,9 +3,14 @@ import { api } from '../api';
 import { Button } from '../components/Button';
 import { Card } from '../components/Card';
 import { Layout } from '../components/Layout';
-import { useLocation } from '../hooks/useLocation';
+import { Coords, distanceMeters, useLocation } from '../hooks/useLocation';
 import { useAppState } from '../state/AppStateContext';
+import { TrashBin } from '../types';
 import QrScanner from 'qr-scanner';
+
+// watchPosition reports every GPS fix; only look the nearest bin up again after moving this far.
+const NEAREST_REFETCH_METERS = 10;
+
 export const ScanPage = () => {
   const { user, festival, refreshSummary, bins } = useAppState();
   const { coords, loading: locationLoading, error: locationError, locationText } = useLocation();
@@ -20,6 +25,28 @@ export const ScanPage = () => {
   const [scanningActive, setScanningActive] = useState(false);
   const [lastScanned, setLastScanned] = useState<string | null>(null);
   const [starting, setStarting] = useState(false);
+  const [nearest, setNearest] = useState<{ bin: TrashBin; distanceMeters: number } | null>(null);
+  const nearestQueryRef = useRef<{ festivalId: string; coords: Coords } | null>(null);
+
+  useEffect(() => {
+    if (!festival || !coords) return;
+    const last = nearestQueryRef.current;
+    if (last && last.festivalId === festival.id && distanceMeters(last.coords, coords) < NEAREST_REFETCH_METERS) {
+      return;
+    }
+    nearestQueryRef.current = { festivalId: festival.id, coords };
+    api
+      .nearestBin(festival.id, coords.lat, coords.lng)
+      .then((res) => {
+        // A later query (after moving on) supersedes this one.
+        if (nearestQueryRef.current?.coords !== coords) return;
+        setNearest(res.bin && res.distanceMeters !== null ? { bin: res.bin, distanceMeters: res.distanceMeters } : null);
+      })
+      .catch(() => {
+        // Let the next fix retry.
+        if (nearestQueryRef.current?.coords === coords) nearestQueryRef.current = null;
+      });
+  }, [festival?.id, coords]);
 
   const handleSubmit = async (e: FormEvent) => {
     e.preventDefault();
@@ -138,6 +165,11 @@ export const ScanPage = () => {
             <p className="text-xs text-beach-navy/60">
               공식 수거함 위치: {bins.length ? `${bins[0].name} 등 ${bins.length}곳` : '등록된 수거함이 없습니다.'}
             </p>
+            {nearest && (
+              <p className="text-xs text-beach-sea">
+                가장 가까운 수거함: {nearest.bin.name} (약 {Math.round(nearest.distanceMeters)}m)
+              </p>
+            )}
           </div>
           <div className="relative overflow-hidden rounded-2xl border border-beach-sky bg-beach-navy/5">
             <div className="aspect-video w-full">
@@ -7,7 +7,9 @@ import { useAppState } from '../state/AppStateContext';
 import { Shop } from '../types';
 
 export const WalletPage = () => {
-  const { user, festival, summary, shops, coupons, refreshSummary, refreshCoupons } = useAppState();
+  const { user, festival, summary, shops, coupons, couponsCursor, refreshSummary, refreshCoupons, loadMoreCoupons } =
+    useAppState();
+  const [loadingMore, setLoadingMore] = useState(false);
   const [selected, setSelected] = useState<Shop | null>(null);
   const [message, setMessage] = useState<string | null>(null);
   const [error, setError] = useState<string | null>(null);
@@ -107,6 +109,23 @@ export const WalletPage = () => {
             </div>
           ))}
           {coupons.length === 0 && <p className="text-sm text-beach-navy/70">발급된 쿠폰이 없습니다.</p>}
+          {couponsCursor && (
+            <button
+              type="button"
+              disabled={loadingMore}
+              onClick={async () => {
+                setLoadingMore(true);
+                try {
+                  await loadMoreCoupons();
+                } finally {
+                  setLoadingMore(false);
+                }
+              }}
+              className="w-full rounded-xl bg-white py-3 text-sm font-semibold text-beach-navy shadow"
+            >
+              {loadingMore ? '불러오는 중...' : '더 보기'}
+            </button>
+          )}
         </Card>
       </div>
     </Layout>
@@ -9,6 +9,7 @@ type AppStateValue = {
   summary?: Summary;
   bins: TrashBin[];
   coupons: Coupon[];
+  couponsCursor: string | null;
   shops: Shop[];
   loading: boolean;
   login: (nickname: string) => Promise<void>;
@@ -16,6 +17,7 @@ type AppStateValue = {
   refreshSummary: () => Promise<void>;
   refreshBins: () => Promise<void>;
   refreshCoupons: () => Promise<void>;
+  loadMoreCoupons: () => Promise<void>;
   refreshShops: () => Promise<void>;
 };
 
@@ -43,6 +45,7 @@ export const AppStateProvider = ({ children }: { children: React.ReactNode }) =>
   const [summary, setSummary] = useState<Summary | undefined>();
   const [bins, setBins] = useState<TrashBin[]>([]);
   const [coupons, setCoupons] = useState<Coupon[]>([]);
+  const [couponsCursor, setCouponsCursor] = useState<string | null>(null);
   const [shops, setShops] = useState<Shop[]>([]);
   const [loading, setLoading] = useState(false);
 
@@ -52,6 +55,7 @@ export const AppStateProvider = ({ children }: { children: React.ReactNode }) =>
       setUser(undefined);
       setSummary(undefined);
       setCoupons([]);
+      setCouponsCursor(null);
       localStorage.removeItem('cashup_user');
     }
   }, [token, user]);
@@ -108,6 +112,7 @@ export const AppStateProvider = ({ children }: { children: React.ReactNode }) =>
     setToken(undefined);
     setSummary(undefined);
     setCoupons([]);
+    setCouponsCursor(null);
     localStorage.removeItem('cashup_user');
     setAuthToken(undefined);
   };
@@ -143,8 +148,21 @@ export const AppStateProvider = ({ children }: { children: React.ReactNode }) =>
     if (!festival || !(targetUser ?? user)) return;
     try {
       const currentUser = targetUser ?? user;
-      const list = await api.listCoupons(currentUser.id, festival.id);
-      setCoupons(list);
+      const page = await api.listCoupons(currentUser.id, festival.id);
+      setCoupons(page.coupons);
+      setCouponsCursor(page.nextCursor);
+    } catch (err) {
+      console.error(err);
+    }
+  };
+
+  // The coupon list is paginated (newest first); the wallet pulls older pages on demand.
+  const loadMoreCoupons = async () => {
+    if (!festival || !user || !couponsCursor) return;
+    try {
+      const page = await api.listCoupons(user.id, festival.id, couponsCursor);
+      setCoupons((prev) => [...prev, ...page.coupons]);
+      setCouponsCursor(page.nextCursor);
     } catch (err) {
       console.error(err);
     }
@@ -168,6 +186,7 @@ export const AppStateProvider = ({ children }: { children: React.ReactNode }) =>
       summary,
       bins,
       coupons,
+      couponsCursor,
       shops,
       loading,
       login,
@@ -175,9 +194,10 @@ export const AppStateProvider = ({ children }: { children: React.ReactNode }) =>
       refreshSummary,
       refreshBins,
       refreshCoupons,
+      loadMoreCoupons,
       refreshShops
     }),
-    [user, token, festival, summary, bins, coupons, shops, loading]
+    [user, token, festival, summary, bins, coupons, couponsCursor, shops, loading]
   );
 
   return <AppStateContext.Provider value={value}>{children}</AppStateContext.Provider>;
@@ -17,6 +17,7 @@ export type Festival = {
   centerLat?: number | null;
   centerLng?: number | null;
   radiusMeters?: number | null;
+  geofence?: number[][][] | null;
 };
 
 export type TrashBin = {
@@ -40,14 +41,18 @@ export type TrashPhoto = {
   userId?: string;
   festivalId?: string;
   imageUrl: string;
+  thumbnailUrl?: string;
   status: 'PENDING' | 'ACTIVE' | 'REJECTED';
   points: number;
   hasTrash?: boolean | null;
   trashCount?: number | null;
   maxTrashConfidence?: number | null;
+  analysisStatus?: 'ANALYZING' | 'DONE' | 'FAILED' | null;
   createdAt: string;
 };
 
+export type PhotoAnalysis = Pick<TrashPhoto, 'id' | 'analysisStatus' | 'hasTrash' | 'trashCount' | 'maxTrashConfidence'>;
+
 export type Coupon = {
   id: string;
   shopName: string;